@@ -0,0 +1,28 @@
+from __future__ import annotations
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List
+
+
+class BasicBlock:
+    """Sequence of instructions, which is always executed from its first to its last instruction.
+
+    Only the first instruction of a block can be a target of a jump and only the last one can change the flow of the
+    program.
+
+    """
+
+    __slots__ = ('start', 'end', 'successors', 'predecessors')
+
+    def __init__(self, start: int, end: int):
+        self.start = start
+        """Program counter of the first instruction"""
+        self.end = end
+        """Program counter following the last instruction"""
+        self.successors: List[BasicBlock] = []
+        """Blocks the program can continue with, a CALL is followed by the callee and the block after the CALL"""
+        self.predecessors: List[BasicBlock] = []
+        """Blocks the program can come from"""
+
+    def __repr__(self) -> str:
+        return 'BasicBlock(%d, %d)' % (self.start, self.end)
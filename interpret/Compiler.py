@@ -0,0 +1,353 @@
+from typing import Callable, List, Optional, TextIO, Tuple
+import DataStack as DS
+import Frame as Fr
+import Instruction as Ins
+import MutableString as Mut
+import Program as Prog
+import Variable as Var
+import VariableRef as VarRef
+
+
+class Compiler:
+    """Translates hot basic blocks of a program into Python functions.
+
+    Every basic block is first executed by handlers of the interpret and counts its executions. Once a block is
+    executed often enough, it is translated into a function, which executes all its instructions and returns the
+    program counter of the next block. Translation of a single instruction costs much more than its interpretation, so
+    code executed only a few times is never translated.
+    Common instructions are translated into inline Python code guarded by checks of frames, variables and types. If
+    a check fails, or the instruction is not translated at all, the handler of the interpret is called instead, so
+    errors, messages and exit codes are the same as in the interpret.
+
+    """
+
+    _frame_names = {'GF': 'G', 'TF': 'T', 'LF': 'L'}
+    """Names of local variables holding slots of frames in generated functions"""
+    _arithmetic = {'ADD': '+', 'SUB': '-', 'MUL': '*', 'IDIV': '//'}
+    _relational = {'LT': '<', 'GT': '>'}
+    _logical = {'AND': 'and', 'OR': 'or'}
+    _stack_ops = ('PUSHS', 'POPS', 'CLEARS', 'ADDS', 'SUBS', 'MULS', 'IDIVS', 'LTS', 'GTS', 'EQS', 'ANDS', 'ORS', 'NOTS',
+                  'JUMPIFEQS', 'JUMPIFNEQS')
+    """Instructions working with the data stack, which are translated into inline code"""
+    _stack_types = {'ADDS': 'int', 'SUBS': 'int', 'MULS': 'int', 'IDIVS': 'int', 'ANDS': 'bool', 'ORS': 'bool'}
+    """Stack variants of arithmetic and logical instructions with the required type of their operands"""
+    _frame_ops = ('CREATEFRAME', 'PUSHFRAME', 'POPFRAME')
+    """Opcodes changing the temporary or local frame"""
+    _branches = ('JUMP', 'JUMPIFEQ', 'JUMPIFNEQ', 'JUMPIFEQS', 'JUMPIFNEQS', 'CALL', 'RETURN', 'EXIT')
+    """Opcodes, which decide the program counter of the next instruction"""
+    _max_function = 64
+    """Maximal number of instructions in a single function, long blocks are split"""
+    hot_threshold = 50
+    """Default number of executions of a block, after which the block is translated"""
+
+    __slots__ = ('blocks', '__instructions', '__handlers', '__namespace', '__threshold')
+
+    def __init__(self, program: Prog.Program, handlers: List[Callable[[Ins.Instruction, int], int]],
+                 data_stack: DS.DataStack, output: TextIO, threshold: int = hot_threshold):
+        """Prepares all blocks of the program to be executed.
+
+        The global frame must be created before.
+
+        :param program: Loaded program
+        :param handlers: Dispatch table of the interpret indexed by opcode id
+        :param data_stack: Data stack used by handlers of the interpret
+        :param output: Output of the program written by WRITE
+        :param threshold: Number of executions of a block, after which the block is translated
+        """
+        self.__threshold = threshold
+        self.__instructions = program.instructions
+        self.__handlers = handlers
+        self.__namespace = {
+            'G': Fr.Frame.get_global().get_slots(),
+            'frames': Fr.Frame.local_slots,
+            'I': self.__instructions,
+            'H': [handlers[instruction.op_id] for instruction in self.__instructions],
+            'Var': Var.Variable,
+            'MS': Mut.MutableString,
+            # lists of the data stack are never replaced, so generated code can hold them
+            'ST': data_stack.types,
+            'SV': data_stack.values,
+            'w': output.write,
+        }
+        self.blocks: List[Optional[Callable[[], int]]] = [None] * len(self.__instructions)
+        """Functions of blocks indexed by program counter of their first instruction, None for other instructions"""
+
+        # long blocks are split into several functions, each of them returns the start of the next one
+        starts = [start for block in program.blocks for start in range(block.start, block.end, Compiler._max_function)]
+        for start, end in zip(starts, starts[1:] + [len(self.__instructions)]):
+            self.blocks[start] = self.interpret_block(start, end)
+
+    def interpret_block(self, start: int, end: int) -> Callable[[], int]:
+        """Creates a function executing a block by handlers of the interpret, which translates the block once it is hot.
+
+        :param start: Program counter of the first instruction
+        :param end: Program counter following the last instruction
+        :return: Function executing the block
+        """
+        instructions = self.__instructions
+        handlers = self.__handlers
+        threshold = self.__threshold
+        count = 0
+
+        def block() -> int:
+            nonlocal count
+            count = count + 1
+            if count >= threshold:
+                return self.compile_block(start, end)()
+            for pc in range(start, end):
+                instruction = instructions[pc]
+                next_pc = handlers[instruction.op_id](instruction, pc + 1)
+            return next_pc
+
+        return block
+
+    def compile_block(self, start: int, end: int) -> Callable[[], int]:
+        """Translates a block into a Python function, which replaces the block.
+
+        :param start: Program counter of the first instruction
+        :param end: Program counter following the last instruction
+        :return: Function executing the block
+        """
+        source = '\n'.join(Compiler.translate_block(self.__instructions, start, end))
+        exec(compile(source, '<IPPcode22>', 'exec'), self.__namespace)
+        function = self.__namespace.pop('block_%d' % start)
+        self.blocks[start] = function
+        return function
+
+    @staticmethod
+    def translate_block(instructions: List[Ins.Instruction], start: int, end: int) -> List[str]:
+        """Generates source code of a function executing a basic block or its part.
+
+        :param instructions: Instructions of the program
+        :param start: Program counter of the first instruction
+        :param end: Program counter following the last instruction
+        :return: Lines of the function
+        """
+        parts = []
+        for pc in range(start, end):
+            instruction = instructions[pc]
+            if instruction.opcode == 'FUSED':
+                # parts of a superinstruction are translated separately, each with its own handler
+                parts.append((instruction.args[1], pc, 'I[%d].args[0](I[%d].args[1], %d)' % (pc, pc, pc + 1)))
+                parts.append((instruction.args[3], pc, 'I[%d].args[2](I[%d].args[3], %d)' % (pc, pc, pc + 1)))
+            else:
+                parts.append((instruction, pc, 'H[%d](I[%d], %d)' % (pc, pc, pc + 1)))
+
+        uses_locals = any(isinstance(arg, VarRef.VariableRef) and arg.frame != 'GF'
+                          for instruction, pc, fallback in parts for arg in instruction.args)
+        lines = ['def block_%d():' % start]
+        if uses_locals:
+            lines.append('    T, L = frames()')
+        for instruction, pc, fallback in parts:
+            lines.append('    # %d: %s' % (pc, instruction.opcode))
+            lines.extend(Compiler.translate(instruction, pc, fallback))
+            if uses_locals and instruction.opcode in Compiler._frame_ops:
+                lines.append('    T, L = frames()')
+        if Compiler.checked_opcode(parts[-1][0]) not in Compiler._branches:
+            lines.append('    return %d' % end)
+        return lines
+
+    @staticmethod
+    def translate(instruction: Ins.Instruction, pc: int, fallback: str) -> List[str]:
+        """Generates source code executing a single instruction.
+
+        :param instruction: Instruction to translate
+        :param pc: Program counter of the instruction
+        :param fallback: Call of the handler executing the instruction
+        :return: Lines of code indented into the body of a function
+        """
+        if Compiler.checked_opcode(instruction) in Compiler._branches:
+            fallback = 'return ' + fallback
+        translated = Compiler.translate_inline(instruction, pc)
+        if translated is None:
+            return ['    ' + fallback]
+        guards, actions = translated
+        if not guards:
+            return ['    ' + action for action in actions]
+        return (['    if %s:' % ' and '.join(guards)] + ['        ' + action for action in actions]
+                + ['    else:', '        ' + fallback])
+
+    @staticmethod
+    def checked_opcode(instruction: Ins.Instruction) -> str:
+        """
+
+        :param instruction: Instruction of the program
+        :return: Opcode of the instruction, or the opcode of its checked variant for an unchecked instruction
+        """
+        return Ins.Instruction._checked.get(instruction.opcode, instruction.opcode)
+
+    @staticmethod
+    def translate_inline(instruction: Ins.Instruction, pc: int) -> Optional[Tuple[List[str], List[str]]]:
+        """Generates inline code of an instruction, which is correct only if all its guards hold.
+
+        :param instruction: Instruction to translate
+        :param pc: Program counter of the instruction
+        :return: Guards and actions, or None if the instruction is always executed by its handler
+        """
+        # unchecked variants are translated as checked instructions, their guards always hold
+        opcode = Compiler.checked_opcode(instruction)
+        args = instruction.args
+        if opcode in Compiler._stack_ops:
+            return Compiler.translate_stack(opcode, args, pc)
+        if opcode == 'JUMP':
+            return [], ['return %d' % args[0]]
+        if opcode == 'DEFVAR':
+            ref = args[0]
+            frame = Compiler._frame_names[ref.frame]
+            guards = [] if frame == 'G' else ['%s is not None' % frame]
+            guards.append('%s[%d] is None' % (frame, ref.slot))
+            return guards, ['%s[%d] = Var(%r)' % (frame, ref.slot, ref.name)]
+        if opcode == 'WRITE':
+            if isinstance(args[0], Var.Variable):
+                return [], ['w(%r)' % str(args[0])]
+            guards, value, typ = Compiler.operand(args[0], 'a1')
+            return guards + ['a1.typ is not None'], ['w(str(a1))']
+        if opcode in ('JUMPIFEQ', 'JUMPIFNEQ'):
+            guards, (a, b) = Compiler.operands(args[1:], None)
+            taken, not_taken = (args[0], pc + 1) if opcode == 'JUMPIFEQ' else (pc + 1, args[0])
+            guards.extend(Compiler.initialized(a[1]) + ['%s == %s' % (a[1], b[1])])
+            return guards, ['return %d if %s == %s else %d' % (taken, a[0], b[0], not_taken)]
+
+        if opcode == 'MOVE':
+            guards, ((value, typ),) = Compiler.operands(args[1:], None)
+            guards.extend(Compiler.initialized(typ))
+            if isinstance(args[1], VarRef.VariableRef):
+                # a mutable string stays owned by its variable, the target gets a copy
+                value = '%s if type(%s) is not MS else str(%s)' % (value, value, value)
+            return Compiler.store(args[0], guards, value, typ)
+        if opcode in Compiler._arithmetic:
+            operands = Compiler.operands(args[1:], 'int')
+            if operands is None:
+                return None
+            guards, (a, b) = operands
+            if opcode == 'IDIV':
+                guards.append('%s != 0' % b[0])
+            return Compiler.store(args[0], guards, '%s %s %s' % (a[0], Compiler._arithmetic[opcode], b[0]), "'int'")
+        if opcode in Compiler._relational:
+            guards, (a, b) = Compiler.operands(args[1:], None)
+            guards.append("%s in ('int', 'bool', 'string') and %s == %s" % (a[1], a[1], b[1]))
+            return Compiler.store(args[0], guards, '%s %s %s' % (a[0], Compiler._relational[opcode], b[0]), "'bool'")
+        if opcode == 'EQ':
+            guards, (a, b) = Compiler.operands(args[1:], None)
+            guards.extend(Compiler.initialized(a[1]) + ['%s == %s' % (a[1], b[1])])
+            return Compiler.store(args[0], guards, '%s == %s' % (a[0], b[0]), "'bool'")
+        if opcode in Compiler._logical:
+            operands = Compiler.operands(args[1:], 'bool')
+            if operands is None:
+                return None
+            guards, (a, b) = operands
+            return Compiler.store(args[0], guards, '%s %s %s' % (a[0], Compiler._logical[opcode], b[0]), "'bool'")
+        if opcode == 'NOT':
+            operands = Compiler.operands(args[1:], 'bool')
+            if operands is None:
+                return None
+            guards, ((value, typ),) = operands
+            return Compiler.store(args[0], guards, 'not %s' % value, "'bool'")
+        return None
+
+    @staticmethod
+    def translate_stack(opcode: str, args, pc: int) -> Optional[Tuple[List[str], List[str]]]:
+        """Generates inline code of an instruction working with the data stack, ST are its types and SV its values.
+
+        Binary instructions pop the second operand and replace the first one by the result in place.
+
+        :param opcode: Opcode of the instruction
+        :param args: Arguments of the instruction
+        :param pc: Program counter of the instruction
+        :return: Guards and actions, or None if the instruction is always executed by its handler
+        """
+        if opcode == 'PUSHS':
+            guards, value, typ = Compiler.operand(args[0], 'a1')
+            if isinstance(args[0], VarRef.VariableRef):
+                # a mutable string stays owned by its variable, the stack gets a copy
+                value = '%s if type(%s) is not MS else str(%s)' % (value, value, value)
+            return guards + Compiler.initialized(typ), ['ST.append(%s)' % typ, 'SV.append(%s)' % value]
+        if opcode == 'POPS':
+            frame = Compiler._frame_names[args[0].frame]
+            guards = [] if frame == 'G' else ['%s is not None' % frame]
+            guards.extend(['(v := %s[%d]) is not None' % (frame, args[0].slot), 'ST'])
+            return guards, ['v.typ = ST.pop()', 'v.value = SV.pop()']
+        if opcode == 'CLEARS':
+            return [], ['ST.clear()', 'SV.clear()']
+        if opcode == 'NOTS':
+            return ["ST and ST[-1] == 'bool'"], ['SV[-1] = not SV[-1]']
+
+        if opcode in Compiler._stack_types:
+            guards = ["len(ST) >= 2 and ST[-1] == ST[-2] == '%s'" % Compiler._stack_types[opcode]]
+            if opcode == 'IDIVS':
+                guards.append('SV[-1] != 0')
+            operator = Compiler._arithmetic.get(opcode[:-1]) or Compiler._logical[opcode[:-1]]
+            return guards, ['b = SV.pop()', 'ST.pop()', 'SV[-1] = SV[-1] %s b' % operator]
+        if opcode in ('LTS', 'GTS'):
+            return (["len(ST) >= 2 and ST[-1] == ST[-2] and ST[-1] in ('int', 'bool', 'string')"],
+                    ['b = SV.pop()', 'ST.pop()', 'SV[-1] = SV[-1] %s b' % Compiler._relational[opcode[:-1]],
+                     "ST[-1] = 'bool'"])
+        if opcode == 'EQS':
+            return ['len(ST) >= 2 and ST[-1] == ST[-2]'], ['b = SV.pop()', 'ST.pop()', 'SV[-1] = SV[-1] == b',
+                                                            "ST[-1] = 'bool'"]
+        if opcode in ('JUMPIFEQS', 'JUMPIFNEQS'):
+            taken, not_taken = (args[0], pc + 1) if opcode == 'JUMPIFEQS' else (pc + 1, args[0])
+            return (['len(ST) >= 2 and ST[-1] == ST[-2]'],
+                    ['del ST[-2:]', 'b = SV.pop()', 'return %d if SV.pop() == b else %d' % (taken, not_taken)])
+        return None
+
+    @staticmethod
+    def operand(arg, name: str) -> Optional[Tuple[List[str], str, str]]:
+        """Generates expressions retrieving a value and a type of a symbol.
+
+        :param arg: Constant or a reference to a variable
+        :param name: Name of a local variable holding the variable in generated code
+        :return: Guards, expression of the value and expression of the type
+        """
+        if isinstance(arg, Var.Variable):
+            return [], repr(arg.value), repr(arg.typ)
+        frame = Compiler._frame_names[arg.frame]
+        guards = [] if frame == 'G' else ['%s is not None' % frame]
+        guards.append('(%s := %s[%d]) is not None' % (name, frame, arg.slot))
+        return guards, '%s.value' % name, '%s.typ' % name
+
+    @staticmethod
+    def initialized(typ: str) -> List[str]:
+        """Generates a guard checking, that a symbol has a value. Constants always have one.
+
+        :param typ: Expression of the type of a symbol
+        :return: Guard, or no guard for a constant
+        """
+        return ['%s is not None' % typ] if typ.endswith('.typ') else []
+
+    @staticmethod
+    def operands(args, typ: Optional[str]) -> Optional[Tuple[List[str], List[Tuple[str, str]]]]:
+        """Generates expressions retrieving values and types of symbols, which must be of a given type.
+
+        :param args: Constants or references to variables
+        :param typ: Required type of all symbols, or None for any type
+        :return: Guards and pairs of expressions of the value and the type, or None if a constant has a wrong type
+        """
+        guards: List[str] = []
+        values: List[Tuple[str, str]] = []
+        for i, arg in enumerate(args, 1):
+            if typ is not None and isinstance(arg, Var.Variable) and arg.typ != typ:
+                return None
+            arg_guards, value, arg_typ = Compiler.operand(arg, 'a%d' % i)
+            if typ is not None and not isinstance(arg, Var.Variable):
+                arg_guards.append("%s == '%s'" % (arg_typ, typ))
+            guards.extend(arg_guards)
+            values.append((value, arg_typ))
+        return guards, values
+
+    @staticmethod
+    def store(ref: VarRef.VariableRef, guards: List[str], value: str, typ: str) -> Tuple[List[str], List[str]]:
+        """Generates code storing a value into a variable.
+
+        The variable is checked first, before operands, so the check is put in front of other guards.
+
+        :param ref: Reference to the target variable
+        :param guards: Guards of operands
+        :param value: Expression of the value
+        :param typ: Expression of the type
+        :return: Guards and actions
+        """
+        frame = Compiler._frame_names[ref.frame]
+        target = [] if frame == 'G' else ['%s is not None' % frame]
+        target.append('(v := %s[%d]) is not None' % (frame, ref.slot))
+        return target + guards, ['v.value = %s' % value, 'v.typ = %s' % typ]
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import sys
+import Instruction as Ins
+from errorCodes import *
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Tuple
+
+
+class DataStack:
+    """Data stack of values used by PUSHS, POPS and stack variants of instructions (ADDS, JUMPIFEQS, ...).
+
+    Values are not wrapped in Variable objects. The stack is made of two parallel lists, type tags (int, bool, string or
+    nil) and native values, so pushing a value only fills two slots of lists, which grow by amortized reallocation.
+    Values are immutable, a MutableString is converted to str before it is pushed.
+
+    """
+
+    __slots__ = ('types', 'values')
+
+    def __init__(self):
+        self.types: List[str] = []
+        """Type tags of values from the bottom to the top of the stack"""
+        self.values: List = []
+        """Native values from the bottom to the top of the stack"""
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def push(self, typ: str, value) -> None:
+        """Pushes a value to the top of the stack.
+
+        :param typ: Type of the value
+        :param value: Native value, which is not a MutableString
+        :return: None
+        """
+        self.types.append(typ)
+        self.values.append(value)
+
+    def pop(self, instruction: Ins.Instruction) -> Tuple[str, object]:
+        """Removes a value from the top of the stack. If the stack is empty, interpret is terminated.
+
+        :param instruction: Instruction taking the value
+        :return: Type and native value
+        """
+        if not self.types:
+            sys.stderr.write('Cannot %s - data stack is empty.\n' % instruction.opcode)
+            exit(ERR_MISSING_VALUE)
+        return self.types.pop(), self.values.pop()
+
+    def pop_pair(self, instruction: Ins.Instruction) -> Tuple[str, object, str, object]:
+        """Removes two values from the top of the stack, the second operand of an instruction is on the top.
+
+        If the stack has less than two values, interpret is terminated.
+
+        :param instruction: Instruction taking the values
+        :return: Type and value of the first operand and type and value of the second operand
+        """
+        types = self.types
+        if len(types) < 2:
+            sys.stderr.write('Cannot %s - data stack has less than two values.\n' % instruction.opcode)
+            exit(ERR_MISSING_VALUE)
+        values = self.values
+        b_typ = types.pop()
+        b = values.pop()
+        return types.pop(), values.pop(), b_typ, b
+
+    def clear(self) -> None:
+        """Removes all values from the stack.
+
+        :return: None
+        """
+        self.types.clear()
+        self.values.clear()
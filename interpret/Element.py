@@ -0,0 +1,138 @@
+from __future__ import annotations
+import xml.parsers.expat as expat
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+ParseError = expat.ExpatError
+"""Error raised by iterparse(), if the source is not well-formed"""
+
+
+class Element:
+    """Element of the source XML with the part of the interface of xml.etree.ElementTree.Element used by the interpret.
+
+    Importing ElementTree (with re and enum) takes longer than importing the whole rest of the interpret, so the source
+    is parsed by expat directly, see iterparse(). Tails of elements are not kept.
+
+    """
+
+    __slots__ = ('tag', 'attrib', 'text', 'children', 'get', 'keys')
+
+    def __init__(self, tag: str, attrib: Dict[str, str]):
+        self.tag = tag
+        self.attrib = attrib
+        self.text: Optional[str] = None
+        """Text before the first child element, None if there is none"""
+        self.children: List[Element] = []
+        # methods of the dictionary are called directly, attributes are read many times by the checks of instructions
+        self.get = attrib.get
+        self.keys = attrib.keys
+
+    def __len__(self) -> int:
+        return len(self.children)
+
+    def __iter__(self) -> Iterator[Element]:
+        return iter(self.children)
+
+    def find(self, tag: str) -> Optional[Element]:
+        """
+
+        :param tag: Tag of a child element
+        :return: The first child element with the tag, or None
+        """
+        for child in self.children:
+            if child.tag == tag:
+                return child
+        return None
+
+    @staticmethod
+    def fix_name(name: str) -> str:
+        """
+
+        :param name: Name reported by expat, the namespace is separated by }
+        :return: Name in the notation of ElementTree, e.g. {namespace}tag
+        """
+        return '{' + name if '}' in name else name
+
+    @staticmethod
+    def iterparse(source: str | BinaryIO, chunk_size: int = 16 * 1024) -> Iterator[Element]:
+        """Parses the XML as a stream, yields the root element once it starts and every its child once it ends.
+
+        Children of the root are not added to the root, so the whole tree is never held in memory. Elements, their
+        text and errors are the same as those of xml.etree.ElementTree.iterparse(), which also reads the source in
+        chunks of the same size, so elements preceding an error in the XML are yielded the same way. If the source is
+        not well-formed, ParseError is raised after them.
+
+        :param source: Filename of the XML, or a binary file
+        :param chunk_size: Number of bytes read at once
+        :return: Iterator of the root element and its children
+        """
+        elements: List[Element] = []
+        stack: List[Element] = []
+        data: List[str] = []
+        owner: Optional[Element] = None
+
+        def start(tag: str, attrib: Dict[str, str]) -> None:
+            nonlocal owner
+            # text belongs to the element, only if no element started or ended since its start tag
+            if data:
+                if owner is not None:
+                    owner.text = ''.join(data)
+                data.clear()
+            # names are rarely in a namespace, the dictionary of attributes is usually kept
+            if '}' in tag:
+                tag = '{' + tag
+            for name in attrib:
+                if '}' in name:
+                    attrib = {Element.fix_name(name): value for name, value in attrib.items()}
+                    break
+            element = Element(tag, attrib)
+            if len(stack) > 1:
+                stack[-1].children.append(element)
+            elif not stack:
+                elements.append(element)
+            stack.append(element)
+            owner = element
+
+        def end(tag: str) -> None:
+            nonlocal owner
+            if data:
+                if owner is not None:
+                    owner.text = ''.join(data)
+                data.clear()
+            owner = None
+            element = stack.pop()
+            if len(stack) == 1:
+                elements.append(element)
+
+        def skipped_entity(name: str, is_parameter_entity: bool) -> None:
+            # ElementTree rejects references to entities declared in an external DTD, which expat does not read
+            if not is_parameter_entity:
+                raise ParseError('undefined entity &%s;: line %d, column %d'
+                                 % (name, parser.CurrentLineNumber, parser.CurrentColumnNumber))
+
+        parser = expat.ParserCreate(namespace_separator='}')
+        parser.buffer_text = True
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        parser.CharacterDataHandler = data.append
+        parser.SkippedEntityHandler = skipped_entity
+
+        file = open(source, 'rb') if isinstance(source, str) else source
+        try:
+            while True:
+                chunk = file.read(chunk_size)
+                error = None
+                try:
+                    parser.Parse(chunk, not chunk)
+                except ParseError as exception:
+                    error = exception
+                yield from elements
+                elements.clear()
+                if error is not None:
+                    raise error
+                if not chunk:
+                    return
+        finally:
+            if file is not source:
+                file.close()
@@ -1,23 +1,59 @@
+from __future__ import annotations
 import sys
-from typing import Dict
 import Frame
 import Variable as Var
 from errorCodes import *
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Optional, Tuple
 
 
 class Frame:
     """Class representing a frame in the memory model.
 
     Contains a stack of local frames, the temporary frame, global frame and operations over them.
+    Variables of a frame are stored in a list of slots. Every variable reference is assigned its slot index at load
+    time (see OperandTable), so a variable is accessed by a single index. Frames are sized by the running program,
+    every temporary and local frame has a slot for every name of a local variable of the whole program.
+    Frames discarded by CREATEFRAME or POPFRAME are kept in a free list and reused by the next CREATEFRAME.
 
     """
-    __frames: Frame = []
-    """Stack of frames"""
+    __frames: List[Frame] = []
+    """Stack of local frames"""
+    __global_frame: Frame = None
+    """Global frame"""
     __tmp_frame: Frame = None
     """Temporary frame"""
+    __free_frames: List[Frame] = []
+    """Discarded frames ready to be reused"""
+    __empty_local: List[Var.Variable] = []
+    """Slots of an empty temporary or local frame of the running program, used to create and clear frames"""
 
-    def __init__(self):
-        self.__variables: Dict[str] = {}
+    __slots__ = ('__variables',)
+
+    def __init__(self, size: int):
+        self.__variables: List[Var.Variable] = [None] * size
+
+    @staticmethod
+    def new_state(local_size: int) -> tuple:
+        """
+
+        :param local_size: Number of slots of temporary and local frames of a program
+        :return: State of a program without any frames, see swap_state()
+        """
+        return [], None, None, [], [None] * local_size
+
+    @classmethod
+    def swap_state(cls, state: tuple = None) -> tuple:
+        """Replaces all frames by frames of another program, which are kept in a state returned by this method.
+
+        :param state: State returned by a previous call or by new_state(), or None for no frames and no variables
+        :return: Previous state of frames
+        """
+        previous = (cls.__frames, cls.__global_frame, cls.__tmp_frame, cls.__free_frames, cls.__empty_local)
+        cls.__frames, cls.__global_frame, cls.__tmp_frame, cls.__free_frames, cls.__empty_local = \
+            Frame.new_state(0) if state is None else state
+        return previous
 
     @classmethod
     def create_frame(cls):
@@ -25,7 +61,14 @@ class Frame:
 
         :return:
         """
-        Frame.__tmp_frame = Frame()
+        if cls.__tmp_frame is not None:
+            cls.__free_frames.append(cls.__tmp_frame)
+        if cls.__free_frames:
+            frame = cls.__free_frames.pop()
+            frame.__variables[:] = cls.__empty_local
+        else:
+            frame = Frame(len(cls.__empty_local))
+        cls.__tmp_frame = frame
 
     @classmethod
     def push_frame(cls):
@@ -50,10 +93,20 @@ class Frame:
 
         :return:
         """
-        if Frame.top_local_frame() is None:
+        if not cls.__frames:
             sys.stderr.write('There are no local frames on the stack to pop.\n')
             exit(ERR_FRAME)
-        Frame.__tmp_frame = Frame.__frames.pop()
+        if cls.__tmp_frame is not None:
+            cls.__free_frames.append(cls.__tmp_frame)
+        cls.__tmp_frame = cls.__frames.pop()
+
+    @classmethod
+    def depth(cls) -> int:
+        """
+
+        :return: Number of local frames on the frame stack
+        """
+        return len(cls.__frames)
 
     @classmethod
     def top_local_frame(cls) -> Frame.Frame:
@@ -61,8 +114,7 @@ class Frame:
 
         :return: Local frame from the top of the stack, or None if there are no local frames.
         """
-        top = cls.__frames[-1]
-        return None if top is cls.get_global() else top
+        return cls.__frames[-1] if cls.__frames else None
 
     @classmethod
     def check_local_frame(cls):
@@ -70,31 +122,29 @@ class Frame:
 
         :return:
         """
-        if cls.top_local_frame() is None:
+        if not cls.__frames:
             sys.stderr.write('There is no local frame on the stack\n')
             exit(ERR_FRAME)
 
     @classmethod
-    def create_global(cls) -> Frame:
-        """Creates a global frame on the frame stack and returns it.
+    def create_global(cls, size: int) -> Frame:
+        """Creates the global frame and returns it.
 
         If there already is a global frame it is returned.
 
+        :param size: Number of slots of the global frame of the program
         :return: Global frame
         """
-        if len(Frame.__frames) == 0:
-            glbl = Frame()
-            cls.__frames.append(glbl)
-            return glbl
-        else:
-            return cls.get_global()
+        if cls.__global_frame is None:
+            cls.__global_frame = Frame(size)
+        return cls.__global_frame
 
     def is_global(self) -> bool:
         """
 
         :return: True, if a frame is the global frame.
         """
-        return Frame.__frames.index(self) == 0
+        return self is Frame.__global_frame
 
     @classmethod
     def frame_for_name(cls, frame_name: str):
@@ -104,13 +154,15 @@ class Frame:
         :return: Frame corresponding to a given name.
         """
         if frame_name == 'GF':
-            return cls.get_global()
+            return cls.__global_frame
         elif frame_name == 'TF':
-            cls.check_tmp_frame()
-            return cls.get_tmp()
+            if cls.__tmp_frame is None:
+                cls.check_tmp_frame()
+            return cls.__tmp_frame
         else:
-            cls.check_local_frame()
-            return cls.top_local_frame()
+            if not cls.__frames:
+                cls.check_local_frame()
+            return cls.__frames[-1]
 
     @classmethod
     def get_global(cls) -> Frame.Frame:
@@ -118,7 +170,7 @@ class Frame:
 
         :return: Global frame
         """
-        return cls.__frames[0]
+        return cls.__global_frame
 
     @classmethod
     def get_tmp(cls) -> Frame.Frame:
@@ -138,34 +190,51 @@ class Frame:
             sys.stderr.write('The temporary frame must be first created')
             exit(ERR_FRAME)
 
+    @classmethod
+    def local_slots(cls) -> Tuple[Optional[List[Var.Variable]], Optional[List[Var.Variable]]]:
+        """Retrieves slots of the temporary frame and of the local frame on top of the stack without any checks.
+
+        Slots of a frame are a single list for the whole life of the frame, so they can be kept until the next
+        CREATEFRAME, PUSHFRAME or POPFRAME.
+
+        :return: Slots of the temporary and the local frame, None for a frame, which is not defined
+        """
+        tmp = cls.__tmp_frame.__variables if cls.__tmp_frame is not None else None
+        return tmp, cls.__frames[-1].__variables if cls.__frames else None
+
+    def get_slots(self) -> List[Var.Variable]:
+        """
+
+        :return: Slots of a frame indexed by slot indexes of variables, None for a variable, which is not defined
+        """
+        return self.__variables
+
     def get_variables(self):
         """
 
         :return: A list of all variables inside a frame
         """
-        return self.__variables
+        return [var for var in self.__variables if var is not None]
 
-    def find_variable(self, var_name: str) -> Var.Variable:
+    def find_variable(self, slot: int) -> Var.Variable:
         """Retrieves a variable from the list.
 
-        :param var_name: Name of a variable
-        :return: Object of a variable from a given frame
+        :param slot: Slot index of a variable
+        :return: Object of a variable from a given frame, or None if it is not defined
         """
-        if var_name not in self.get_variables():
-            return None
-        else:
-            return self.__variables[var_name]
+        return self.__variables[slot]
 
-    def add_variable(self, var: Var.Variable):
+    def add_variable(self, slot: int, var: Var.Variable):
         """Adds a variable to a frame.
 
         If a variable with the same name has been defined, iterpret gets terminated.
 
+        :param slot: Slot index of a variable
         :param var: Instance of Variable
         :return:
         """
-        if var.get_name() in self.__variables:
+        if self.__variables[slot] is not None:
             sys.stderr.write('Variable %s has already been defined.\n' % var.get_name())
             exit(ERR_SEMANTICS)
 
-        self.__variables[var.get_name()] = var
+        self.__variables[slot] = var
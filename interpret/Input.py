@@ -0,0 +1,83 @@
+from __future__ import annotations
+import Variable as Var
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Optional, TextIO
+
+
+class Input:
+    """Reader of the input of the interpreted program used by the READ instruction.
+
+    The input is read in large chunks, which are split into lines at once. Lines are then handed out one by one, so the
+    input file is never loaded into memory as a whole.
+
+    """
+
+    __slots__ = ('__stream', '__chunk_size', '__lines', '__index', '__eof')
+
+    def __init__(self, stream: TextIO, chunk_size: int = 1 << 20):
+        self.__stream = stream
+        self.__chunk_size = chunk_size
+        self.__lines: List[str] = []
+        """Complete lines of the last chunk, the last item is an unfinished line"""
+        self.__index = 0
+        self.__eof = False
+
+    def read_line(self) -> Optional[str]:
+        """Retrieves the next line of the input without the line break.
+
+        :return: Next line, or None if the end of the input was reached
+        """
+        lines = self.__lines
+        # the last item of lines is kept, it can continue in the next chunk
+        while self.__index >= len(lines) - 1:
+            if self.__eof:
+                if self.__index < len(lines) and lines[self.__index] != '':
+                    self.__index = self.__index + 1
+                    return lines[-1]
+                return None
+            self.__read_chunk()
+            lines = self.__lines
+        line = lines[self.__index]
+        self.__index = self.__index + 1
+        return line
+
+    def __read_chunk(self) -> None:
+        """Reads the next chunk of the input and splits it into lines.
+
+        A line longer than a chunk is read in several chunks, which are joined only once the line is complete.
+
+        :return: None
+        """
+        parts = [self.__lines[-1]] if self.__index < len(self.__lines) else []
+        while True:
+            chunk = self.__stream.read(self.__chunk_size)
+            if not chunk:
+                self.__eof = True
+                break
+            parts.append(chunk)
+            if '\n' in chunk:
+                break
+        self.__lines = ''.join(parts).split('\n')
+        self.__index = 0
+
+    def read_value(self, typ: str) -> Var.Variable:
+        """Reads the next line and converts it to a constant of a given type.
+
+        If the input is missing or it is not a valid value of the type, the constant is nil.
+
+        :param typ: Type of the value i.e. int, bool or string
+        :return: Constant with the read value
+        """
+        line = self.read_line()
+        if line is None:
+            return Var.Variable(None, 'nil', None)
+        if typ == 'string':
+            return Var.Variable(None, typ, line)
+        if typ == 'bool':
+            return Var.Variable(None, typ, line.lower() == 'true')
+        # int() alone would accept also whitespace, separators _ and digits of other scripts
+        digits = line[1:] if line[:1] in ('+', '-') else line
+        if digits.isascii() and digits.isdigit():
+            return Var.Variable(None, typ, int(line))
+        return Var.Variable(None, 'nil', None)
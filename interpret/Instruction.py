@@ -1,10 +1,11 @@
-import xml.etree.ElementTree as ET
+from __future__ import annotations
 import sys
-import re
-from typing import List, Dict
 from errorCodes import *
-import Frame as Fr
-import Variable as Var
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Dict, Tuple, Sequence
+    import Element as El
+    import OperandTable as OpT
 
 
 class Instruction:
@@ -13,75 +14,238 @@ class Instruction:
     _valid_Opcodes = (
         'MOVE', 'CREATEFRAME', 'PUSHFRAME', 'POPFRAME', 'DEFVAR', 'CALL', 'RETURN', 'PUSHS', 'POPS', 'ADD', 'SUB',
         'MUL', 'IDIV', 'LT', 'GT', 'EQ', 'AND', 'OR', 'NOT', 'INT2CHAR', 'STRI2INT', 'READ', 'WRITE', 'CONCAT',
-        'STRLEN', 'GETCHAR', 'SETCHAR', 'TYPE', 'LABEL', 'JUMP', 'JUMPIFEQ', 'JUMPIFNEQ', 'EXIT', 'DPRINT', 'BREAK')
+        'STRLEN', 'GETCHAR', 'SETCHAR', 'TYPE', 'LABEL', 'JUMP', 'JUMPIFEQ', 'JUMPIFNEQ', 'EXIT', 'DPRINT', 'BREAK',
+        'CLEARS', 'ADDS', 'SUBS', 'MULS', 'IDIVS', 'LTS', 'GTS', 'EQS', 'ANDS', 'ORS', 'NOTS', 'INT2CHARS', 'STRI2INTS',
+        'JUMPIFEQS', 'JUMPIFNEQS')
 
-    def __init__(self, opcode: str, args: List):
-        self._args: List = []
-        for arg in args:
-            self._args.append(arg)
-        self._opcode = opcode
+    _signatures: Dict[str, Tuple[str, ...]] = {
+        'CREATEFRAME': (), 'PUSHFRAME': (), 'POPFRAME': (), 'RETURN': (), 'BREAK': (),
+        'CLEARS': (), 'ADDS': (), 'SUBS': (), 'MULS': (), 'IDIVS': (), 'LTS': (), 'GTS': (), 'EQS': (), 'ANDS': (),
+        'ORS': (), 'NOTS': (), 'INT2CHARS': (), 'STRI2INTS': (),
+        'DEFVAR': ('var',), 'POPS': ('var',),
+        'PUSHS': ('symb',), 'WRITE': ('symb',), 'EXIT': ('symb',), 'DPRINT': ('symb',),
+        'CALL': ('label',), 'LABEL': ('label',), 'JUMP': ('label',), 'JUMPIFEQS': ('label',), 'JUMPIFNEQS': ('label',),
+        'READ': ('var', 'type'),
+        'MOVE': ('var', 'symb'), 'NOT': ('var', 'symb'), 'INT2CHAR': ('var', 'symb'), 'STRLEN': ('var', 'symb'),
+        'TYPE': ('var', 'symb'),
+        'STRI2INT': ('var', 'symb', 'symb'), 'ADD': ('var', 'symb', 'symb'), 'SUB': ('var', 'symb', 'symb'),
+        'MUL': ('var', 'symb', 'symb'), 'IDIV': ('var', 'symb', 'symb'), 'LT': ('var', 'symb', 'symb'),
+        'GT': ('var', 'symb', 'symb'), 'EQ': ('var', 'symb', 'symb'), 'AND': ('var', 'symb', 'symb'),
+        'OR': ('var', 'symb', 'symb'), 'CONCAT': ('var', 'symb', 'symb'), 'GETCHAR': ('var', 'symb', 'symb'),
+        'SETCHAR': ('var', 'symb', 'symb'),
+        'JUMPIFEQ': ('label', 'symb', 'symb'), 'JUMPIFNEQ': ('label', 'symb', 'symb')}
+    """Kinds of arguments (var, symb, label or type) every opcode expects"""
 
-    @staticmethod
-    def create_arith_ins(opcode: str, arguments: List[ET.Element]):
-        """Factory method for an arithmetic instruction and its arguments.
+    _unchecked: Dict[str, str] = {opcode: opcode + '_UNCHECKED' for opcode in (
+        'MOVE', 'WRITE', 'ADD', 'SUB', 'MUL', 'IDIV', 'LT', 'GT', 'EQ', 'AND', 'OR', 'NOT', 'JUMPIFEQ', 'JUMPIFNEQ')}
+    """Variants of opcodes without runtime checks of types of operands and existence of variables"""
+    _checked: Dict[str, str] = {unchecked: opcode for opcode, unchecked in _unchecked.items()}
+    """Opcodes with runtime checks of their unchecked variants"""
+    _internal_opcodes = ('FUSED',) + tuple(_unchecked.values())
+    """Opcodes of instructions created by the optimizer, which cannot appear in the source code"""
+    _opcodes = _valid_Opcodes + _internal_opcodes
+
+    _opcode_ids: Dict[str, int] = {opcode: op_id for op_id, opcode in enumerate(_opcodes)}
+    """Small integer id of every valid opcode, used as an index into the dispatch table"""
+
+    _arg_types = ('int', 'bool', 'string', 'nil', 'label', 'type', 'var')
+    _name_start = frozenset('_-$&%*!?abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+    """Characters a name of a label or a variable can start with"""
 
-        Performs check on instruction arguments and stores their value in the object.
+    __slots__ = ('opcode', 'op_id', 'args', 'order')
+
+    def __init__(self, opcode: str, args: Sequence, order: int = None):
+        self.opcode = opcode
+        self.op_id = Instruction._opcode_ids[opcode]
+        self.args: Sequence = args
+        self.order = order
+
+    def validate(self) -> None:
+        """Checks all arguments of the instruction once before the program is executed.
+
+        Instruction specific checks are done by the method validate_<opcode>, other instructions are checked against
+        their signature. References to labels are resolved later by resolve_labels(), once all labels are known.
+        If a problem is found, interpret is terminated with a proper error message.
 
-        :param opcode: Name (operation code) of instruction
-        :param arguments: List of arguments still in XML representation
-        :return: Object of a type Instruction
+        :return: None
+        """
+        validator = getattr(self, 'validate_' + self.opcode.lower(), None)
+        if validator is None:
+            self.validate_signature()
+        else:
+            validator()
+
+    def decode(self, operands: OpT.OperandTable) -> None:
+        """Replaces validated arguments in their XML representation by decoded operands.
+
+        Variables are replaced by their VariableRef, literals by a constant Variable holding a native value, labels and
+        types by their name. Every argument is decoded only once here, so the handlers can use them directly.
+        Equal operands of all instructions of the program share a single object, see OperandTable.
+
+        :param operands: Operands of the program the instruction belongs to
+        :return: None
+        """
+        args = []
+        for arg in self.args:
+            typ = arg.get('type')
+            if typ == 'var':
+                args.append(operands.reference(arg.text))
+            elif typ in ['int', 'bool', 'string', 'nil']:
+                args.append(operands.constant(typ, arg.text))
+            else:
+                args.append(arg.text)
+        self.args = tuple(args)
+
+    def resolve_labels(self, labels: Dict[str, int]) -> None:
+        """Replaces names of labels used as arguments of the instruction by their program counters.
+
+        If a label is not defined, interpret is terminated.
+
+        :param labels: Dictionary of all labels defined in the program
+        :return: None
+        """
+        signature = Instruction._signatures[self.opcode]
+        if 'label' not in signature:
+            return
+        args = list(self.args)
+        for i, kind in enumerate(signature):
+            if kind != 'label':
+                continue
+            if args[i] not in labels:
+                sys.stderr.write('Label %s is not defined.\n' % args[i])
+                exit(ERR_SEMANTICS)
+            args[i] = labels[args[i]]
+        self.args = tuple(args)
+
+    def validate_signature(self) -> None:
+        """Checks count and kinds of arguments according to the signature of the opcode.
+
+        :return: None
+        """
+        signature = Instruction._signatures[self.opcode]
+        Instruction.check_args(self.args, len(signature), self.opcode)
+        i = 1
+        for kind, arg in zip(signature, self.args):
+            typ = arg.get('type')
+            if kind == 'symb':
+                if typ not in ['var', 'int', 'bool', 'string', 'nil']:
+                    sys.stderr.write('%s has invalid arg%d type: %s\n' % (self.opcode, i, typ))
+                    exit(ERR_OPERAND)
+                if typ != 'var':
+                    Instruction.check_data_types(typ, arg.text)
+            else:
+                if typ != kind:
+                    sys.stderr.write('%s must have arg%d of type %s, not: %s\n' % (self.opcode, i, kind, typ))
+                    exit(ERR_OPERAND)
+                if kind == 'type' and arg.text not in ['int', 'bool', 'string']:
+                    sys.stderr.write('Invalid type name: %s\n' % arg.text)
+                    exit(ERR_XML_STRUC)
+                if kind == 'label':
+                    Instruction.check_label_name(arg.text)
+            i = i + 1
+
+    def validate_defvar(self) -> None:
+        """Checks the argument of DEFVAR instruction.
+
+        :return: None
         """
+        ET_args = Instruction.check_args(self.args, 1, 'DEFVAR')
+        if ET_args[0].get('type') != 'var':
+            sys.stderr.write('DEFVAR must have argument of type var, not: %s\n' % ET_args[0].get('type'))
+            exit(ERR_OPERAND)
+
+    def validate_write(self) -> None:
+        """Checks the argument of WRITE instruction.
+
+        :return: None
+        """
+        ET_args = Instruction.check_args(self.args, 1, 'WRITE')
+        typ = ET_args[0].get('type')
+        if typ not in ['var', 'int', 'string', 'bool', 'nil']:
+            sys.stderr.write('Invalid type of argument for WRITE: %s\n' % ET_args[0].get('type'))
+            exit(ERR_OPERAND)
+        if typ != 'var':
+            Instruction.check_data_types(typ, ET_args[0].text)
+
+    def validate_add(self) -> None:
+        """Checks arguments of arithmetic instructions ADD, SUB, MUL and IDIV.
+
+        :return: None
+        """
+        arguments = Instruction.check_args(self.args, 3, self.opcode)
         if arguments[0].get('type') != 'var':
             sys.stderr.write('Arg1 must be the type var for arithmetic instruction: %s\n')
             exit(ERR_OPERAND)
-
-        # Finds instruction in a given frame
-        var = arguments[0].text
-        var = Var.Variable(var)
-        var_frame = var.get_var_ids()
-        var_frame = Fr.Frame.frame_for_name(var_frame)
-        var = var_frame.find_variable(var.get_name())
-
-        # Checks for valid argument types
-        if var is None:
-            sys.stderr.write('Variable does not exist\n')
-            exit(ERR_VARIABLE)
-        if arguments[1].get('type') != arguments[2].get('type'):
+        typ1 = arguments[1].get('type')
+        typ2 = arguments[2].get('type')
+        if typ1 != 'var' and typ2 != 'var' and typ1 != typ2:
             sys.stderr.write('Operands must be the same type\n')
             exit(ERR_OPERAND)
-        if arguments[1].get('type') not in 'int':
-            sys.stderr.write('Operands must be type int\n')
-            exit(ERR_OPERAND)
 
-        # Checks that the value is (negative) integer
-        value1 = arguments[1].text
-        value2 = arguments[2].text
-        if value1[0] == '-':
-            value1 = arguments[1].text[1:]
-        if value2[0] == '-':
-            value2 = arguments[2].text[1:]
-        if not value1.isnumeric() or not value2.isnumeric():
-            sys.stderr.write('Operands must have int value\n')
+        # Types of variables are checked during execution, literals are checked here
+        for arg in arguments[1:]:
+            if arg.get('type') == 'var':
+                continue
+            if arg.get('type') != 'int':
+                sys.stderr.write('Operands must be type int\n')
+                exit(ERR_OPERAND)
+            # Checks that the value is (negative) integer
+            if arg.text is None or not Instruction.is_int(arg.text):
+                sys.stderr.write('Operands must have int value\n')
+                exit(ERR_OPERAND)
+
+    validate_sub = validate_mul = validate_idiv = validate_add
+
+    def validate_jump(self) -> None:
+        """Checks the argument of JUMP instruction.
+
+        :return: None
+        """
+        ET_args = Instruction.check_args(self.args, 1, self.opcode)
+        Instruction.check_label_name(ET_args[0].text)
+        if ET_args[0].get('type') != 'label':
+            sys.stderr.write('Jump can only have attribute of type label\n')
             exit(ERR_OPERAND)
 
-        return Instruction(opcode, [var, arguments[1].text, arguments[2].text])
+    @staticmethod
+    def is_int(text: str) -> bool:
+        """Checks a literal of type int without a regular expression, so loading a program does not import re.
+
+        Digits are ASCII only. A single trailing line break is allowed, as it was by the former pattern ^[+-]?[0-9]+$.
+
+        :param text: Text of the literal
+        :return: True, if the text is an optionally signed integer
+        """
+        if text.endswith('\n'):
+            text = text[:-1]
+        digits = text[1:] if text[:1] in ('+', '-') else text
+        return digits.isascii() and digits.isdigit()
+
+    @staticmethod
+    def is_name(name: str) -> bool:
+        """Checks a name of a label or a variable without a regular expression.
+
+        Letters are ASCII only, digits are any decimal digits. A single trailing line break is allowed, as it was by
+        the former pattern ^[_\\-$&%*!?a-zA-Z][_\\-$&%*!?a-zA-Z\\d]*$.
 
-    def exec_arithmetic_ins(self):
-        """Performs the arithmetic operation.
+        :param name: Name to check
+        :return: True, if the name is valid
+        """
+        if name.endswith('\n'):
+            name = name[:-1]
+        start = Instruction._name_start
+        return name != '' and name[0] in start and all(char in start or char.isdecimal() for char in name[1:])
 
+    @staticmethod
+    def check_label_name(name: str):
+        """Terminates the script if name is not a valid label name.
+
+        :param name: Name of a label
         :return: None
         """
-        if self._opcode == 'ADD':
-            self._args[0].value = int(self._args[1]) + int(self._args[2])
-        elif self._opcode == 'SUB':
-            self._args[0].value = int(self._args[1]) - int(self._args[2])
-        elif self._opcode == 'MUL':
-            self._args[0].value = int(self._args[1]) * int(self._args[2])
-        elif self._opcode == 'IDIV':
-            if self._args[2] == '0':
-                sys.stderr.write('Cannot divide by zero.\n')
-                exit(ERR_INVALID_OPERAND)
-            self._args[0].value = int(self._args[1]) // int(self._args[2])
+        if name is None or not Instruction.is_name(name):
+            sys.stderr.write('Invalid name for label: %s.\n' % name)
+            exit(ERR_SEMANTICS)
 
     @staticmethod
     def check_data_types(typ: str, value: str):
@@ -96,9 +260,7 @@ class Instruction:
                 sys.stderr.write('Type nil can hold only value nil.\n')
                 exit(ERR_INVALID_OPERAND)
         elif typ == 'int':
-            if value[0] == '-':
-                value = value[1:]
-            if not value.isnumeric():
+            if value is None or not Instruction.is_int(value):
                 sys.stderr.write('Type int can hold only integer values.\n')
                 exit(ERR_INVALID_OPERAND)
         elif typ == 'bool':
@@ -107,7 +269,7 @@ class Instruction:
                 exit(ERR_INVALID_OPERAND)
 
     @staticmethod
-    def is_instruction_valid(instruction: ET.Element) -> None:
+    def is_instruction_valid(instruction: El.Element) -> None:
         """Checks if the instruction has all attributes and correct values.
 
         If a problem is found, interpret is terminated with a proper error message.
@@ -134,7 +296,7 @@ class Instruction:
             exit(ERR_XML_STRUC)
 
     @staticmethod
-    def check_arg_valid(argument: ET.Element) -> None:
+    def check_arg_valid(argument: El.Element) -> None:
         """Checks if the instruction argument has all attributes and their correct values.
 
         If a problem is found, interpret is terminated with a proper error message.
@@ -142,10 +304,10 @@ class Instruction:
         :param argument: Argument of an instruction
         :return:
         """
-        if not re.search('\Aarg[1-3]\Z', argument.tag):
+        if argument.tag not in ('arg1', 'arg2', 'arg3'):
             sys.stderr.write('Instructions can contain only arg elements.\n')
             exit(ERR_XML_STRUC)
-        for attr in argument.findall('./'):
+        if len(argument) != 0:
             sys.stderr.write('Instruction argument cannot contain any sub-elements.\n')
             exit(ERR_XML_STRUC)
         if len(argument.keys()) != 1:
@@ -154,12 +316,14 @@ class Instruction:
         if 'type' not in argument.attrib:
             sys.stderr.write('Instruction argument must specify a type.\n')
             exit(ERR_XML_STRUC)
-        if not re.search('int|bool|string|nil|label|type|var', argument.get('type')):
+        # any type containing a name of a type passes here, it is checked against the signature later
+        typ = argument.get('type')
+        if typ not in Instruction._arg_types and not any(name in typ for name in Instruction._arg_types):
             sys.stderr.write('Invalid instruction argument type.\n')
             exit(ERR_XML_STRUC)
 
     @staticmethod
-    def check_args(args: List[ET.Element], arg_count: int, instruction_name: str = 'Instruction') -> List[ET.Element]:
+    def check_args(args: List[El.Element], arg_count: int, instruction_name: str = 'Instruction') -> List[El.Element]:
         """Performs a check on a list of arguments.
 
         Checks that the list of arguments is correctly tagged, contains all mandatory attributes and does not have any
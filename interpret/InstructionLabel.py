@@ -1,62 +1,41 @@
-import re
+from __future__ import annotations
 import sys
-from typing import Dict
-import xml.etree.ElementTree as ET
 import Instruction as ins
 from errorCodes import *
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict
+    import Element as El
 
 
 class InstructionLabel(ins.Instruction):
-    """InstructionLabel has all methods regarding label, including a dictionary of all labels in the program."""
-    __labels: Dict[str, int] = {}
+    """InstructionLabel has all methods regarding label, labels themselves are stored in the Program."""
 
-    @classmethod
-    def get_labels(cls) -> Dict:
-        """
-
-        :return: Returns dictionary of labels
-        """
-        return cls.__labels
-
-    @classmethod
-    def order_for_label_name(cls, name_label: str) -> int:
-        """Retrieves order of a label.
-
-        :param name_label: Name of a label
-        :return: Order of a label
-        """
-        return cls.__labels[name_label]
-
-    @classmethod
-    def add_label(cls, lbl: str, order: int) -> None:
+    @staticmethod
+    def add_label(labels: Dict[str, int], lbl: str, pc: int) -> None:
         """Adds a label to the dictionary.
 
         If a label name is not unique, the interpret is terminated.
 
-        :param order: Order value of the label
+        :param labels: Dictionary of labels of the program
         :param lbl: Name of the label
+        :param pc: Index of the instruction following the label in the program array
         :return:
         """
-        if lbl in cls.__labels.values():
+        if lbl in labels:
             sys.stderr.write('Label: "%s" is already defined.\n' % lbl)
-            exit(ERR_OPERAND)
-        cls.__labels[lbl] = order
-
-    @staticmethod
-    def check_label_name(name: str):
-        if name is None or not re.search('^[_\\-$&%*!?a-zA-Z][_\\-$&%*!?a-zA-Z\d]*$', name):
-            sys.stderr.write('Invalid name for label: %s.\n' % name)
             exit(ERR_SEMANTICS)
+        labels[lbl] = pc
 
     @staticmethod
-    def check_instruction(instruction: ET.Element) -> None:
+    def check_instruction(instruction: El.Element) -> None:
         """Checks, that the instruction has all the attributes and appropriate values.
 
         :param instruction: An instruction todo
         :return:
         """
         i = 0
-        for arg in instruction.findall('./'):
+        for arg in instruction:
             # todo error codes
             ins.Instruction.check_arg_valid(arg)
             if arg.tag != 'arg1':
@@ -0,0 +1,74 @@
+from array import array, typecodes
+
+
+class MutableString:
+    """Value of a string variable, which is changed in place by CONCAT and SETCHAR.
+
+    Characters are stored in an array of code points, so appending is O(1) amortized and replacing a character is O(1).
+    The str representation is created only when it is needed (WRITE, comparison, MOVE) and kept until the next change.
+    A MutableString is never shared by two variables, MOVE stores its str representation into the target variable.
+
+    """
+
+    _typecode = 'w' if 'w' in typecodes else 'u'
+    """Type code of an array of Unicode characters"""
+
+    __slots__ = ('__chars', '__text')
+
+    def __init__(self, text: str = ''):
+        self.__chars = array(MutableString._typecode, text)
+        self.__text = text
+
+    @staticmethod
+    def frozen(value):
+        """
+
+        :param value: Native value of a variable
+        :return: The value, or its str representation, if it is a MutableString
+        """
+        return str(value) if type(value) is MutableString else value
+
+    def append(self, text) -> None:
+        """Appends text to the end of the string.
+
+        :param text: str or MutableString
+        :return: None
+        """
+        if type(text) is MutableString:
+            self.__chars.extend(text.__chars)
+        else:
+            self.__chars.extend(array(MutableString._typecode, text))
+        self.__text = None
+
+    def __setitem__(self, index: int, char: str) -> None:
+        self.__chars[index] = char
+        self.__text = None
+
+    def __getitem__(self, index: int) -> str:
+        return self.__chars[index]
+
+    def __len__(self) -> int:
+        return len(self.__chars)
+
+    def __str__(self) -> str:
+        if self.__text is None:
+            self.__text = self.__chars.tounicode()
+        return self.__text
+
+    def __repr__(self) -> str:
+        return 'MutableString(%r)' % str(self)
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def __eq__(self, other) -> bool:
+        return str(self) == str(other) if isinstance(other, (str, MutableString)) else NotImplemented
+
+    def __ne__(self, other) -> bool:
+        return str(self) != str(other) if isinstance(other, (str, MutableString)) else NotImplemented
+
+    def __lt__(self, other) -> bool:
+        return str(self) < str(other) if isinstance(other, (str, MutableString)) else NotImplemented
+
+    def __gt__(self, other) -> bool:
+        return str(self) > str(other) if isinstance(other, (str, MutableString)) else NotImplemented
@@ -0,0 +1,81 @@
+from __future__ import annotations
+import Variable as Var
+import VariableRef as VarRef
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, Tuple
+
+
+class OperandTable:
+    """Decoded operands and slot indexes of variables of a single program.
+
+    Equal operands of all instructions of a program share a single object. Every variable reference is assigned its slot
+    index, so a variable is accessed by a single index. The table belongs to the program, so a process loading many
+    programs (server, batch runner) does not accumulate names of variables of all of them, and frames of a program are
+    sized only by its own variables.
+
+    """
+
+    __slots__ = ('references', 'constants', 'global_slots', 'local_slots')
+
+    def __init__(self):
+        self.references: Dict[str, VarRef.VariableRef] = {}
+        """Decoded variable operands by their identifier"""
+        self.constants: Dict[Tuple[str, str], Var.Variable] = {}
+        """Decoded literal operands by their type and text"""
+        self.global_slots: Dict[str, int] = {}
+        """Slot indexes of variables in the global frame"""
+        self.local_slots: Dict[str, int] = {}
+        """Slot indexes of variables in temporary and local frames"""
+
+    def reference(self, identifier: str) -> VarRef.VariableRef:
+        """Decodes a variable operand. If the identifier is not valid, interpret is terminated.
+
+        :param identifier: Whole identifier of a variable, e.g. GF@counter
+        :return: Reference to the variable with its slot assigned
+        """
+        ref = self.references.get(identifier)
+        if ref is None:
+            ref = VarRef.VariableRef.parse(identifier)
+            self.assign_slot(ref)
+            self.references[identifier] = ref
+        return ref
+
+    def constant(self, typ: str, text: str) -> Var.Variable:
+        """Decodes a literal operand.
+
+        :param typ: Type of the literal
+        :param text: Literal in the XML representation
+        :return: Constant holding the native value
+        """
+        const = self.constants.get((typ, text))
+        if const is None:
+            const = Var.Variable.from_literal(typ, text)
+            self.constants[(typ, text)] = const
+        return const
+
+    def assign_slot(self, ref: VarRef.VariableRef) -> None:
+        """Assigns a slot index to a variable reference.
+
+        Names of variables are static, so all references to a variable of the same name share the slot. Temporary
+        and local frames share the slot indexes, because a temporary frame becomes a local frame when pushed.
+
+        :param ref: Reference to a variable
+        :return: None
+        """
+        slots = self.global_slots if ref.frame == 'GF' else self.local_slots
+        ref.slot = slots.setdefault(ref.name, len(slots))
+
+    def global_size(self) -> int:
+        """
+
+        :return: Number of slots of the global frame
+        """
+        return len(self.global_slots)
+
+    def local_size(self) -> int:
+        """
+
+        :return: Number of slots of a temporary or local frame
+        """
+        return len(self.local_slots)
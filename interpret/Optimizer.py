@@ -0,0 +1,245 @@
+from typing import Dict, List, Optional, Set, Tuple
+import Instruction as Ins
+import Program as Prog
+import Variable as Var
+
+
+class Optimizer:
+    """Optimization pass over a loaded program, which runs before the program is executed.
+
+    Arithmetic, relational and logical instructions with constant operands are folded into MOVE of the result and
+    conditional jumps with constant operands into JUMP, or they are removed. Code, which cannot be reached from the
+    start of the program, is removed. Common pairs of instructions inside a basic block are fused into a single
+    superinstruction FUSED, which executes both of them with a single dispatch.
+    Instructions, which would fail at runtime, are never folded, so the program terminates with the same error. An
+    instruction with a target variable is folded only if the variable is defined earlier in the same basic block.
+
+    """
+
+    _fusible = {('CREATEFRAME', 'PUSHFRAME'), ('POPFRAME', 'RETURN'), ('DEFVAR', 'MOVE'), ('PUSHFRAME', 'DEFVAR')} \
+        | {(first, second) for first in ('MOVE', 'ADD', 'SUB', 'MUL', 'IDIV')
+           for second in ('ADD', 'SUB', 'MUL', 'IDIV', 'LT', 'GT', 'EQ', 'JUMPIFEQ', 'JUMPIFNEQ')} \
+        | {(first, second) for first in ('LT', 'GT', 'EQ', 'AND', 'OR', 'NOT') for second in ('JUMPIFEQ', 'JUMPIFNEQ')}
+    """Pairs of opcodes, which are fused into a superinstruction"""
+
+    _arithmetic = {'ADD': lambda a, b: a + b, 'SUB': lambda a, b: a - b, 'MUL': lambda a, b: a * b,
+                   'IDIV': lambda a, b: a // b}
+    _relational = {'LT': lambda a, b: a < b, 'GT': lambda a, b: a > b}
+
+    __slots__ = ('handlers', 'folded', 'removed', 'fused')
+
+    def __init__(self, handlers: list):
+        self.handlers = handlers
+        """Dispatch table of the interpret indexed by opcode id, used by superinstructions"""
+        self.folded = 0
+        """Number of folded instructions"""
+        self.removed = 0
+        """Number of removed instructions"""
+        self.fused = 0
+        """Number of instructions fused into superinstructions"""
+
+    def optimize(self, program: Prog.Program) -> Prog.Program:
+        """Runs all optimizations over a program.
+
+        :param program: Loaded program
+        :return: Optimized program
+        """
+        instructions = list(program.instructions)
+        labels = dict(program.labels)
+
+        removed = set()
+        for block in program.blocks:
+            defined: Set[Tuple[str, str]] = set()
+            for pc in range(block.start, block.end):
+                instruction = instructions[pc]
+                folded = Optimizer.fold(instruction, defined)
+                if folded is not instruction:
+                    self.folded = self.folded + 1
+                    if folded is None:
+                        removed.add(pc)
+                    else:
+                        instructions[pc] = folded
+                Optimizer.define(instruction, defined)
+        instructions = Optimizer.compact(instructions, labels, removed)
+
+        removed = Optimizer.unreachable(instructions)
+        self.removed = self.removed + len(removed)
+        instructions = Optimizer.compact(instructions, labels, removed)
+
+        removed = self.fuse(instructions)
+        instructions = Optimizer.compact(instructions, labels, removed)
+        return Prog.Program(instructions, labels, program.operands)
+
+    def report(self) -> str:
+        """
+
+        :return: Summary of the optimizations made
+        """
+        return 'Optimizer: %d instructions folded, %d unreachable instructions removed, %d instructions fused\n' \
+               % (self.folded, self.removed, self.fused)
+
+    @staticmethod
+    def define(instruction: Ins.Instruction, defined: Set[Tuple[str, str]]) -> None:
+        """Updates variables known to be defined after an instruction of a basic block.
+
+        :param instruction: Instruction of the block
+        :param defined: Frames and names of variables defined before the instruction, updated in place
+        :return: None
+        """
+        if instruction.opcode == 'DEFVAR':
+            defined.add((instruction.args[0].frame, instruction.args[0].name))
+        elif instruction.opcode in ('CREATEFRAME', 'PUSHFRAME', 'POPFRAME'):
+            # temporary and local frames are replaced
+            for key in [key for key in defined if key[0] != 'GF']:
+                defined.remove(key)
+
+    @staticmethod
+    def fold(instruction: Ins.Instruction, defined: Set[Tuple[str, str]]) -> Optional[Ins.Instruction]:
+        """Folds an instruction with constant operands.
+
+        An instruction with a target variable, which is not known to be defined, is not folded, so a missing variable
+        is reported by the instruction itself.
+
+        :param instruction: Instruction to fold
+        :param defined: Frames and names of variables defined before the instruction in its basic block
+        :return: Instruction to execute instead, the same instruction if it cannot be folded, or None if it has no effect
+        """
+        opcode = instruction.opcode
+        args = instruction.args
+        if opcode not in ('ADD', 'SUB', 'MUL', 'IDIV', 'LT', 'GT', 'EQ', 'AND', 'OR', 'NOT', 'JUMPIFEQ', 'JUMPIFNEQ'):
+            return instruction
+        if not all(isinstance(arg, Var.Variable) for arg in args[1:]):
+            return instruction
+        if opcode not in ('JUMPIFEQ', 'JUMPIFNEQ') and (args[0].frame, args[0].name) not in defined:
+            return instruction
+
+        if opcode == 'NOT':
+            a = args[1]
+            if a.typ != 'bool':
+                return instruction
+            return Optimizer.move(instruction, 'bool', not a.value)
+        a, b = args[1], args[2]
+        if opcode in Optimizer._arithmetic:
+            if a.typ != 'int' or b.typ != 'int' or (opcode == 'IDIV' and b.value == 0):
+                return instruction
+            return Optimizer.move(instruction, 'int', Optimizer._arithmetic[opcode](a.value, b.value))
+        if opcode in Optimizer._relational:
+            if a.typ != b.typ or a.typ == 'nil':
+                return instruction
+            return Optimizer.move(instruction, 'bool', Optimizer._relational[opcode](a.value, b.value))
+        if opcode in ('AND', 'OR'):
+            if a.typ != 'bool' or b.typ != 'bool':
+                return instruction
+            return Optimizer.move(instruction, 'bool', a.value and b.value if opcode == 'AND' else a.value or b.value)
+
+        # EQ, JUMPIFEQ and JUMPIFNEQ, nil can be compared with any type
+        if a.typ != b.typ and a.typ != 'nil' and b.typ != 'nil':
+            return instruction
+        equal = a.typ == b.typ and a.value == b.value
+        if opcode == 'EQ':
+            return Optimizer.move(instruction, 'bool', equal)
+        if equal == (opcode == 'JUMPIFEQ'):
+            return Ins.Instruction('JUMP', (args[0],), instruction.order)
+        return None
+
+    @staticmethod
+    def move(instruction: Ins.Instruction, typ: str, value) -> Ins.Instruction:
+        """
+
+        :param instruction: Folded instruction with the target variable as its first argument
+        :param typ: Type of the result
+        :param value: Native value of the result
+        :return: MOVE of the result into the target variable
+        """
+        return Ins.Instruction('MOVE', (instruction.args[0], Var.Variable(None, typ, value)), instruction.order)
+
+    @staticmethod
+    def unreachable(instructions: List[Ins.Instruction]) -> Set[int]:
+        """Finds instructions, which cannot be reached from the start of the program in the control-flow graph.
+
+        :param instructions: Instructions with resolved labels
+        :return: Program counters of unreachable instructions
+        """
+        blocks = Prog.Program.find_blocks(instructions)
+        if not blocks:
+            return set()
+        reached = {blocks[0].start}
+        stack = [blocks[0]]
+        while stack:
+            for successor in stack.pop().successors:
+                if successor.start not in reached:
+                    reached.add(successor.start)
+                    stack.append(successor)
+        return {pc for block in blocks if block.start not in reached for pc in range(block.start, block.end)}
+
+    def fuse(self, instructions: List[Ins.Instruction]) -> Set[int]:
+        """Fuses pairs of instructions inside basic blocks into superinstructions.
+
+        The superinstruction replaces the first instruction of a pair, the second instruction is to be removed.
+
+        :param instructions: Instructions with resolved labels
+        :return: Program counters of instructions fused into the preceding instruction
+        """
+        leaders = {block.start for block in Prog.Program.find_blocks(instructions)}
+        removed = set()
+        pc = 0
+        while pc + 1 < len(instructions):
+            first, second = instructions[pc], instructions[pc + 1]
+            if pc + 1 not in leaders and (first.opcode, second.opcode) in Optimizer._fusible:
+                instructions[pc] = Ins.Instruction(
+                    'FUSED', (self.handlers[first.op_id], first, self.handlers[second.op_id], second), first.order)
+                removed.add(pc + 1)
+                self.fused = self.fused + 2
+                pc = pc + 2
+            else:
+                pc = pc + 1
+        return removed
+
+    @staticmethod
+    def compact(instructions: List[Ins.Instruction], labels: Dict[str, int], removed: Set[int]) \
+            -> List[Ins.Instruction]:
+        """Removes instructions from the program and moves program counters of labels and jumps accordingly.
+
+        A label of a removed instruction moves to the next instruction, which is kept.
+
+        :param instructions: Instructions with resolved labels
+        :param labels: Labels of the program, updated in place
+        :param removed: Program counters of instructions to remove
+        :return: Remaining instructions
+        """
+        if not removed:
+            return instructions
+        new_pcs = []
+        kept = []
+        for pc, instruction in enumerate(instructions):
+            new_pcs.append(len(kept))
+            if pc not in removed:
+                kept.append(instruction)
+        new_pcs.append(len(kept))
+
+        kept = [Optimizer.retarget(instruction, new_pcs) for instruction in kept]
+        for name, pc in labels.items():
+            labels[name] = new_pcs[pc]
+        return kept
+
+    @staticmethod
+    def retarget(instruction: Ins.Instruction, new_pcs: List[int]) -> Ins.Instruction:
+        """Replaces program counters of labels used by an instruction by their new values.
+
+        Instructions are shared with the program being optimized, so a new instruction is created instead of changing
+        the original one.
+
+        :param instruction: Instruction with resolved labels
+        :param new_pcs: New program counters indexed by the old ones
+        :return: Instruction with new program counters, or the same instruction if it does not use a label
+        """
+        if instruction.opcode == 'FUSED':
+            first_handler, first, second_handler, second = instruction.args
+            retargeted = Optimizer.retarget(second, new_pcs)
+            if retargeted is second:
+                return instruction
+            return Ins.Instruction('FUSED', (first_handler, first, second_handler, retargeted), instruction.order)
+        if instruction.opcode in Prog.Program._branches:
+            return Ins.Instruction(instruction.opcode, (new_pcs[instruction.args[0]],) + tuple(instruction.args[1:]),
+                                   instruction.order)
+        return instruction
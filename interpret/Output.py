@@ -0,0 +1,45 @@
+from __future__ import annotations
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, TextIO
+
+
+class Output:
+    """Buffered text stream for the output of the interpreted program.
+
+    Written text is accumulated in a buffer, which is written to the underlying stream once it reaches the threshold
+    size and when the program terminates, by EXIT or by exit() with an error code (see VM).
+
+    """
+
+    __slots__ = ('stream', 'threshold', '__buffer', '__size')
+
+    def __init__(self, stream: TextIO, threshold: int = 65536):
+        self.stream = stream
+        self.threshold = threshold
+        self.__buffer: List[str] = []
+        self.__size = 0
+
+    def write(self, text: str) -> int:
+        """Adds text to the buffer and flushes it, if the buffer exceeds the threshold.
+
+        :param text: Text to write
+        :return: Number of written characters
+        """
+        self.__buffer.append(text)
+        self.__size = self.__size + len(text)
+        if self.__size >= self.threshold:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        """Writes content of the buffer to the underlying stream.
+
+        :return: None
+        """
+        if self.__buffer:
+            self.stream.write(''.join(self.__buffer))
+            self.__buffer.clear()
+            self.__size = 0
+        self.stream.flush()
+
@@ -0,0 +1,153 @@
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+import Frame as Fr
+import Instruction as Ins
+import Program as Prog
+
+
+class Profiler:
+    """Call-graph profiler attributing executed instructions and wall time to stacks of called labels.
+
+    The profiler keeps a stack of labels alongside the call stack of the interpret: CALL pushes the called label, RETURN
+    pops it. Instructions are counted by the profiling dispatch loop of the VM (see VM.execute_with_profile()), which
+    reports only instructions changing the call stack or the frame stack. The clock is thus read only when the call
+    stack changes and the rest of instructions costs a single lookup.
+    Profile is written as collapsed stacks (one stack per line, labels separated by semicolons, followed by the value),
+    which is the input format of flamegraph.pl and compatible tools.
+
+    """
+
+    root = 'main'
+    """Name of the bottom of every stack, the code outside of any call"""
+
+    __slots__ = ('program', 'stacks', 'max_call_depth', 'max_frame_depth', 'events', '__labels', '__callers',
+                 '__stack', '__last')
+
+    def __init__(self, program: Prog.Program):
+        self.program = program
+        self.stacks: Dict[Tuple[str, ...], List] = {}
+        """Executed instructions and wall time in seconds by stacks of labels"""
+        self.max_call_depth = 0
+        """Maximal number of nested calls"""
+        self.max_frame_depth = 0
+        """Maximal number of local frames on the frame stack"""
+        self.__labels: Dict[int, str] = {}
+        """Names of labels by program counters of instructions following them"""
+        for name, pc in program.labels.items():
+            self.__labels.setdefault(pc, name)
+        self.events: List[Optional[Callable[[int, int], None]]] = \
+            [self.event(instruction) for instruction in program.instructions]
+        """Handlers of instructions changing stacks indexed by program counter, None for other instructions"""
+        self.__callers: List[Tuple[str, ...]] = []
+        self.__stack: Tuple[str, ...] = (Profiler.root,)
+        self.__last = 0.0
+
+    def event(self, instruction: Ins.Instruction) -> Optional[Callable[[int, int], None]]:
+        """
+
+        :param instruction: Instruction of the program
+        :return: Handler of the instruction, if it changes the call stack or the frame stack, None otherwise
+        """
+        opcodes = [instruction.opcode] if instruction.opcode != 'FUSED' \
+            else [instruction.args[1].opcode, instruction.args[3].opcode]
+        if 'CALL' in opcodes:
+            return self.call
+        if 'RETURN' in opcodes:
+            return self.ret
+        if 'PUSHFRAME' in opcodes:
+            return self.push_frame
+        return None
+
+    def start(self) -> None:
+        """Starts measuring the time of the bottom of the stack, when the program begins executing.
+
+        :return: None
+        """
+        self.__last = perf_counter()
+
+    def flush(self, count: int) -> None:
+        """Attributes instructions and time since the last change of the call stack to the current stack.
+
+        :param count: Number of instructions executed since the last change
+        :return: None
+        """
+        now = perf_counter()
+        totals = self.stacks.get(self.__stack)
+        if totals is None:
+            self.stacks[self.__stack] = [count, now - self.__last]
+        else:
+            totals[0] = totals[0] + count
+            totals[1] = totals[1] + now - self.__last
+        self.__last = now
+
+    def call(self, pc: int, count: int) -> None:
+        """Handles an executed CALL.
+
+        :param pc: Program counter of the called label
+        :param count: Number of instructions executed since the last reported instruction
+        :return: None
+        """
+        self.flush(count)
+        self.__callers.append(self.__stack)
+        self.__stack = self.__stack + (self.__labels.get(pc, 'pc%d' % pc),)
+        if len(self.__callers) > self.max_call_depth:
+            self.max_call_depth = len(self.__callers)
+
+    def ret(self, pc: int, count: int) -> None:
+        """Handles an executed RETURN.
+
+        :param pc: Program counter of the instruction following CALL
+        :param count: Number of instructions executed since the last reported instruction
+        :return: None
+        """
+        self.flush(count)
+        self.__stack = self.__callers.pop()
+
+    def push_frame(self, pc: int, count: int) -> None:
+        """Handles an executed PUSHFRAME.
+
+        :param pc: Program counter of the next instruction
+        :param count: Number of instructions executed since the last reported instruction
+        :return: None
+        """
+        depth = Fr.Frame.depth()
+        if depth > self.max_frame_depth:
+            self.max_frame_depth = depth
+        totals = self.stacks.get(self.__stack)
+        if totals is None:
+            self.stacks[self.__stack] = [count, 0.0]
+        else:
+            totals[0] = totals[0] + count
+
+    def collapsed(self, metric: str) -> str:
+        """
+
+        :param metric: 'instructions' for counts of instructions, 'time' for wall time in microseconds
+        :return: Collapsed stacks
+        """
+        index = 0 if metric == 'instructions' else 1
+        scale = 1 if metric == 'instructions' else 1000000
+        lines = []
+        for stack, totals in sorted(self.stacks.items()):
+            value = round(totals[index] * scale)
+            if value > 0:
+                lines.append('%s %d\n' % (';'.join(stack), value))
+        return ''.join(lines)
+
+    def report(self) -> str:
+        """
+
+        :return: Summary of the profile
+        """
+        return 'Profiler: %d instructions, max call depth %d, max frame stack depth %d\n' \
+               % (sum(totals[0] for totals in self.stacks.values()), self.max_call_depth, self.max_frame_depth)
+
+    def write(self, filename: str, metric: str) -> None:
+        """Writes collapsed stacks to a file.
+
+        :param filename: Output file
+        :param metric: 'instructions' or 'time', see collapsed()
+        :return: None
+        """
+        with open(filename, 'w', encoding='utf-8') as file:
+            file.write(self.collapsed(metric))
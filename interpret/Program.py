@@ -0,0 +1,177 @@
+from __future__ import annotations
+import bisect
+import sys
+import BasicBlock as BB
+import Instruction as Ins
+import InstructionLabel as InsLa
+import OperandTable as OpT
+import Variable as Var
+import VariableRef as VarRef
+from errorCodes import *
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, List
+
+
+class Program:
+    """Decoded program ready to be executed.
+
+    Holds the array of instructions indexed by program counter, labels with program counters of instructions following
+    them, basic blocks forming the control-flow graph and the table of operands, which sizes frames of the program.
+    All references to labels are resolved to program counters at load time, so names of labels are not needed during
+    execution.
+
+    """
+
+    _branches = ('JUMP', 'JUMPIFEQ', 'JUMPIFNEQ', 'CALL', 'JUMPIFEQ_UNCHECKED', 'JUMPIFNEQ_UNCHECKED', 'JUMPIFEQS',
+                 'JUMPIFNEQS')
+    """Opcodes, which have a program counter of a label as their first argument"""
+    _no_fallthrough = ('JUMP', 'RETURN', 'EXIT')
+    """Opcodes, which never continue with the following instruction"""
+
+    __slots__ = ('instructions', 'labels', 'operands', 'blocks', '__block_starts')
+
+    def __init__(self, instructions: List[Ins.Instruction], labels: Dict[str, int], operands: OpT.OperandTable):
+        self.instructions = instructions
+        self.labels = labels
+        self.operands = operands
+        self.blocks = Program.find_blocks(instructions)
+        self.__block_starts = [block.start for block in self.blocks]
+
+    @staticmethod
+    def build(records: List[Ins.Instruction], operands: OpT.OperandTable) -> 'Program':
+        """Creates the program from decoded instructions, including labels, in any order.
+
+        Records are sorted by their order and gaps in order values are compacted away, so every instruction is
+        addressed by its index (program counter). Labels are saved with the program counter of the instruction
+        following them and are not a part of the program array. References to labels are then replaced by program
+        counters. Duplicate orders, duplicate labels and undefined labels terminate the interpret.
+
+        :param records: Decoded instructions
+        :param operands: Table, which operands of the records were decoded by
+        :return: Program ready to be executed
+        """
+        records.sort(key=lambda record: record.order)
+        instructions: List[Ins.Instruction] = []
+        labels: Dict[str, int] = {}
+        oldorder = -1
+        for instruction in records:
+            if oldorder == instruction.order:
+                sys.stderr.write('Instructions with duplicate order value were found: %d\n' % oldorder)
+                exit(ERR_XML_STRUC)
+            oldorder = instruction.order
+
+            if instruction.opcode == 'LABEL':
+                InsLa.InstructionLabel.add_label(labels, instruction.args[0], len(instructions))
+            else:
+                instructions.append(instruction)
+
+        for instruction in instructions:
+            instruction.resolve_labels(labels)
+        return Program(instructions, labels, operands)
+
+    def to_records(self) -> tuple:
+        """Converts the program into plain values, which can be stored by marshal.
+
+        Every variable reference and constant is stored only once, operands refer to them by index. Slots are not
+        stored, they are assigned again when the program is loaded.
+
+        :return: Tuple of references, constants, instructions and labels
+        """
+        refs: Dict[VarRef.VariableRef, int] = {}
+        consts: Dict[Var.Variable, int] = {}
+        instructions = []
+        for instruction in self.instructions:
+            args = []
+            for arg in instruction.args:
+                if isinstance(arg, VarRef.VariableRef):
+                    args.append((0, refs.setdefault(arg, len(refs))))
+                elif isinstance(arg, Var.Variable):
+                    args.append((1, consts.setdefault(arg, len(consts))))
+                else:
+                    # name of a type or program counter of a label
+                    args.append(arg)
+            instructions.append((instruction.opcode, tuple(args), instruction.order))
+        return (tuple((ref.frame, ref.name) for ref in refs),
+                tuple((const.typ, const.value) for const in consts),
+                tuple(instructions),
+                self.labels)
+
+    @staticmethod
+    def from_records(records: tuple) -> 'Program':
+        """Creates the program from values made by to_records().
+
+        Instructions are not validated again, records are expected to come from a valid program.
+
+        :param records: Tuple of references, constants, instructions and labels
+        :return: Program ready to be executed
+        """
+        ref_records, const_records, instruction_records, labels = records
+        table = OpT.OperandTable()
+        refs = []
+        for frame, name in ref_records:
+            ref = VarRef.VariableRef(frame, name)
+            table.assign_slot(ref)
+            refs.append(ref)
+        consts = [Var.Variable(None, typ, value) for typ, value in const_records]
+        operands = (refs, consts)
+
+        instructions = []
+        for opcode, args, order in instruction_records:
+            args = tuple(operands[arg[0]][arg[1]] if type(arg) is tuple else arg for arg in args)
+            instructions.append(Ins.Instruction(opcode, args, order))
+        return Program(instructions, labels, table)
+
+    @staticmethod
+    def find_blocks(instructions: List[Ins.Instruction]) -> List[BB.BasicBlock]:
+        """Splits the program into basic blocks and connects them into the control-flow graph.
+
+        A block starts at the beginning of the program, at every jump target and after every instruction, which can
+        change the flow of the program.
+
+        :param instructions: Instructions with resolved labels
+        :return: Basic blocks sorted by their first instruction
+        """
+        leaders = {0}
+        for pc, instruction in enumerate(instructions):
+            instruction = Program.control(instruction)
+            if instruction.opcode in Program._branches:
+                leaders.add(instruction.args[0])
+                leaders.add(pc + 1)
+            elif instruction.opcode in Program._no_fallthrough:
+                leaders.add(pc + 1)
+        starts = sorted(leader for leader in leaders if leader < len(instructions))
+
+        blocks = [BB.BasicBlock(start, end) for start, end in zip(starts, starts[1:] + [len(instructions)])]
+        by_start = {block.start: block for block in blocks}
+        for block in blocks:
+            last = Program.control(instructions[block.end - 1])
+            targets = []
+            if last.opcode in Program._branches:
+                targets.append(last.args[0])
+            if last.opcode not in Program._no_fallthrough:
+                targets.append(block.end)
+            for target in targets:
+                successor = by_start.get(target)
+                # jump to a label at the very end of the program has no successor
+                if successor is not None and successor not in block.successors:
+                    block.successors.append(successor)
+                    successor.predecessors.append(block)
+        return blocks
+
+    @staticmethod
+    def control(instruction: Ins.Instruction) -> Ins.Instruction:
+        """
+
+        :param instruction: Instruction of the program
+        :return: Instruction deciding the flow of the program, the last one of a superinstruction
+        """
+        return instruction.args[3] if instruction.opcode == 'FUSED' else instruction
+
+    def block_at(self, pc: int) -> BB.BasicBlock:
+        """
+
+        :param pc: Program counter of an instruction
+        :return: Basic block containing the instruction
+        """
+        return self.blocks[bisect.bisect_right(self.__block_starts, pc) - 1]
@@ -0,0 +1,87 @@
+import glob
+import hashlib
+import marshal
+import os
+import sys
+from typing import Optional
+import Program as Prog
+
+
+class ProgramCache:
+    """Persistent cache of loaded programs in a directory.
+
+    A loaded program is stored in the marshal format in a file named by a hash of the source file and of the format, it
+    was loaded from, so the same file loaded as XML and as source code has two entries. The hash also covers sources
+    of the interpreter and the marshal version, so a cached program is never used by a different version of
+    the interpreter. A cache hit skips the XML parsing and validation entirely. Any problem with the cache is ignored
+    and the program is simply loaded from the source file.
+
+    """
+
+    _suffix = '.ippc'
+    _fingerprint: bytes = None
+    """Hash of the interpreter version, computed once"""
+
+    __slots__ = ('__path',)
+
+    def __init__(self, directory: str, source: str, kind: str):
+        self.__path = os.path.join(directory, ProgramCache.key(source, kind) + ProgramCache._suffix)
+
+    @classmethod
+    def fingerprint(cls) -> bytes:
+        """Computes the hash of sources of the interpreter, which identifies its version.
+
+        :return: Digest of the interpreter version
+        """
+        if cls._fingerprint is None:
+            digest = hashlib.sha256(b'%d %d.%d' % (marshal.version, sys.version_info[0], sys.version_info[1]))
+            for module in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+                with open(module, 'rb') as file:
+                    digest.update(file.read())
+            cls._fingerprint = digest.digest()
+        return cls._fingerprint
+
+    @staticmethod
+    def key(source: str, kind: str) -> str:
+        """Computes the cache key of a source file.
+
+        :param source: Filename of xml with source code, or of the source code
+        :param kind: Format of the source file, xml or text
+        :return: Hexadecimal hash of the source file, its format and the interpreter version
+        """
+        digest = hashlib.sha256(ProgramCache.fingerprint())
+        digest.update(kind.encode() + b'\0')
+        with open(source, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def load(self) -> Optional[Prog.Program]:
+        """Loads the program from the cache.
+
+        :return: Cached program, or None if the program is not cached or its file is damaged
+        """
+        try:
+            with open(self.__path, 'rb') as file:
+                records = marshal.loads(file.read())
+            return Prog.Program.from_records(records)
+        except (OSError, EOFError, ValueError, TypeError, IndexError, KeyError):
+            return None
+
+    def store(self, program: Prog.Program) -> None:
+        """Saves the program to the cache.
+
+        The file is written under a temporary name and then renamed, so concurrent runs never read a partial file.
+
+        :param program: Loaded program
+        :return: None
+        """
+        tmp_path = '%s.%d.tmp' % (self.__path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(self.__path), exist_ok=True)
+            with open(tmp_path, 'wb') as file:
+                file.write(marshal.dumps(program.to_records()))
+            os.replace(tmp_path, self.__path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,145 @@
+import re
+import sys
+from typing import List, Optional
+import Element as El
+import Instruction as Ins
+import OperandTable as OpT
+from errorCodes import *
+
+
+class SourceParser:
+    """Lexical and syntactic analysis of the textual IPPcode22 source code.
+
+    Follows the rules of parse.php and terminates with its error codes 21, 22 and 23, but instead of writing the XML
+    representation, every instruction is turned directly into an Instruction record. Arguments are represented by the
+    same elements, which the XML loader reads, so records are validated and decoded by the same code.
+
+    """
+
+    _header = '.ippcode22'
+    _whitespace = ' \t\n\r\f\v'
+    _whitespace_re = re.compile('[ \t\n\r\f\v]+')
+    _identifier = '[_\\-$&%*!?a-zA-Z][_\\-$&%*!?a-zA-Z0-9]*'
+    _var_re = re.compile('(?:GF|LF|TF)@%s\\Z' % _identifier)
+    _label_re = re.compile('%s\\Z' % _identifier)
+    _int_re = re.compile('[+-]?[0-9]+\\Z')
+    _string_re = re.compile('(?:[^ \t\n\r\f\v#\\\\]|\\\\[0-9]{3})*\\Z')
+
+    @staticmethod
+    def parse(lines, operands: OpT.OperandTable) -> List[Ins.Instruction]:
+        """Parses the source code into instruction records ordered from 1.
+
+        If the source code is not valid, interpret is terminated.
+
+        Lexical and syntactic errors of all lines are reported before semantic errors found by the validation, as
+        parse.php runs before the interpret.
+
+        :param lines: Lines of the source code
+        :param operands: Table of operands of the program, which operands are decoded by
+        :return: Instructions, which are validated and decoded, see Interpret.load_program()
+        """
+        lines = iter(lines)
+        if not SourceParser.has_header(lines):
+            sys.stderr.write('Source code does not have the header %s.\n' % SourceParser._header)
+            exit(ERR_HEADER)
+
+        records: List[Ins.Instruction] = []
+        for line in lines:
+            words = SourceParser.split(line)
+            if not words:
+                continue
+            records.append(SourceParser.parse_instruction(words, len(records) + 1))
+
+        for instruction in records:
+            if instruction.opcode != 'LABEL':
+                instruction.validate()
+                instruction.decode(operands)
+        return records
+
+    @staticmethod
+    def split(line: str) -> List[str]:
+        """Removes a comment from a line and splits the rest into words.
+
+        :param line: Line of the source code
+        :return: Opcode followed by arguments, or an empty list for a line without code
+        """
+        line = line.split('#', 1)[0].strip(SourceParser._whitespace)
+        return SourceParser._whitespace_re.split(line) if line else []
+
+    @staticmethod
+    def has_header(lines) -> bool:
+        """Reads lines up to the first line with code and checks, that it is the header.
+
+        :param lines: Iterator of lines of the source code
+        :return: True, if the first line with code is the header
+        """
+        for line in lines:
+            words = SourceParser.split(line)
+            if words:
+                return len(words) == 1 and words[0].lower() == SourceParser._header
+        return False
+
+    @staticmethod
+    def parse_instruction(words: List[str], order: int) -> Ins.Instruction:
+        """Checks an instruction and creates its record.
+
+        :param words: Opcode followed by arguments
+        :param order: Order of the instruction
+        :return: Instruction with arguments in their XML representation, a label with its name
+        """
+        opcode = words[0].upper()
+        if opcode not in Ins.Instruction._valid_Opcodes:
+            sys.stderr.write('Unknown opcode: %s\n' % words[0])
+            exit(ERR_OPCODE)
+        signature = Ins.Instruction._signatures[opcode]
+        if len(words) - 1 != len(signature):
+            sys.stderr.write('Instruction %s must have %d arguments.\n' % (opcode, len(signature)))
+            exit(ERR_LEX_SYN)
+
+        args = []
+        for i, (kind, word) in enumerate(zip(signature, words[1:]), 1):
+            arg = SourceParser.parse_arg(kind, word, i)
+            if arg is None:
+                sys.stderr.write('Invalid arg%d of instruction %s: %s\n' % (i, opcode, word))
+                exit(ERR_LEX_SYN)
+            args.append(arg)
+
+        if opcode == 'LABEL':
+            return Ins.Instruction(opcode, (args[0].text,), order)
+        return Ins.Instruction(opcode, args, order)
+
+    @staticmethod
+    def parse_arg(kind: str, word: str, i: int) -> Optional[El.Element]:
+        """Checks an argument of a given kind and creates its element.
+
+        :param kind: Kind of the argument from the signature of the instruction, i.e. var, symb, label or type
+        :param word: Argument in the source code
+        :param i: Position of the argument
+        :return: Element <argN> of the argument, or None if the argument is not valid
+        """
+        if kind == 'label':
+            typ, text = 'label', word
+            valid = SourceParser._label_re.match(word)
+        elif kind == 'type':
+            typ, text = 'type', word
+            valid = word in ('int', 'string', 'bool')
+        elif SourceParser._var_re.match(word):
+            typ, text = 'var', word
+            valid = True
+        elif kind == 'var':
+            return None
+        else:
+            typ, _, text = word.partition('@')
+            if typ == 'int':
+                valid = SourceParser._int_re.match(text)
+            elif typ == 'string':
+                valid = SourceParser._string_re.match(text)
+            elif typ == 'bool':
+                valid = text in ('true', 'false')
+            else:
+                valid = word == 'nil@nil'
+        if not valid:
+            return None
+        arg = El.Element('arg%d' % i, {'type': typ})
+        arg.text = text
+        return arg
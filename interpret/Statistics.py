@@ -0,0 +1,99 @@
+from __future__ import annotations
+import time
+import Program as Prog
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional
+
+
+class Statistics:
+    """Execution statistics of a program written by the --stats option.
+
+    Durations of phases of the interpret (loading, optimization, execution) are measured always, it is only a few calls
+    of the clock. Counts and cumulative times of executed instructions are recorded by a separate dispatch loop of the
+    VM (see VM.execute_with_statistics()), so the main loop does not pay anything, when the statistics are not written.
+    Loading reads, validates and decodes every instruction in a single pass, so validation is a part of the loading
+    phase.
+
+    """
+
+    __slots__ = ('phases', 'exit_code', 'program', 'counts', 'times', '__phase', '__phase_start')
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        """Durations of phases in seconds by their name"""
+        self.exit_code: Optional[int] = None
+        self.program: Optional[Prog.Program] = None
+        """Executed program"""
+        self.counts: List[int] = []
+        """Number of executions of instructions indexed by program counter"""
+        self.times: List[float] = []
+        """Cumulative time of instructions in seconds indexed by program counter"""
+        self.__phase: Optional[str] = None
+        self.__phase_start = 0.0
+
+    def begin_phase(self, name: str) -> None:
+        """Ends the current phase and begins another one.
+
+        :param name: Name of the phase
+        :return: None
+        """
+        self.end_phase()
+        self.__phase = name
+        self.__phase_start = time.perf_counter()
+
+    def end_phase(self) -> None:
+        """Ends the current phase, if there is one.
+
+        :return: None
+        """
+        if self.__phase is not None:
+            self.phases[self.__phase] = self.phases.get(self.__phase, 0.0) + time.perf_counter() - self.__phase_start
+            self.__phase = None
+
+    def attach(self, program: Prog.Program) -> None:
+        """Prepares counters of instructions of a program, which is going to be executed.
+
+        :param program: Program to execute
+        :return: None
+        """
+        self.program = program
+        self.counts = [0] * len(program.instructions)
+        self.times = [0.0] * len(program.instructions)
+
+    def to_json(self) -> dict:
+        """
+
+        :return: Statistics with counts and times summed by opcode and by the order of instructions
+        """
+        opcodes: Dict[str, dict] = {}
+        instructions = []
+        if self.program is not None:
+            for pc, instruction in enumerate(self.program.instructions):
+                count = self.counts[pc]
+                if count == 0:
+                    continue
+                elapsed = self.times[pc]
+                by_opcode = opcodes.setdefault(instruction.opcode, {'count': 0, 'time': 0.0})
+                by_opcode['count'] = by_opcode['count'] + count
+                by_opcode['time'] = by_opcode['time'] + elapsed
+                instructions.append({'order': instruction.order, 'opcode': instruction.opcode, 'count': count,
+                                     'time': elapsed})
+        return {
+            'exit_code': self.exit_code,
+            'phases': self.phases,
+            'total': {'instructions': sum(self.counts), 'time': sum(self.times)},
+            'opcodes': dict(sorted(opcodes.items(), key=lambda item: -item[1]['time'])),
+            'instructions': sorted(instructions, key=lambda item: item['order']),
+        }
+
+    def write(self, filename: str) -> None:
+        """Writes statistics as JSON.
+
+        :param filename: Output file
+        :return: None
+        """
+        import json
+        with open(filename, 'w', encoding='utf-8') as file:
+            json.dump(self.to_json(), file, indent=2)
+            file.write('\n')
@@ -0,0 +1,264 @@
+from typing import Dict, List, Optional, Tuple
+import BasicBlock as BB
+import Instruction as Ins
+import Program as Prog
+import Variable as Var
+import VariableRef as VarRef
+
+Facts = Dict[Tuple[str, int], str]
+"""Known facts about variables by their frame and slot. A fact is the type of an initialized variable, or 'var' for
+a variable, which is defined, but its type is not known"""
+
+
+class TypeInference:
+    """Dataflow analysis of types of variables over the control-flow graph of a program.
+
+    Facts about variables are propagated through basic blocks until they do not change. Where all operands of an
+    instruction are proven to have the types the instruction requires and its target variable is proven to exist, the
+    instruction is replaced by its unchecked variant (see Instruction._unchecked). All other instructions keep their
+    runtime checks, so errors are reported with the same codes and messages.
+    Calls can change any variable, so nothing is known after a CALL returns. Facts about the temporary frame become
+    facts about the local frame by PUSHFRAME and vice versa by POPFRAME.
+
+    """
+
+    _string_signatures = {'CONCAT': (('string', 'string'), 'string'), 'STRLEN': (('string',), 'int'),
+                          'GETCHAR': (('string', 'int'), 'string'), 'SETCHAR': (('int', 'string'), 'string'),
+                          'INT2CHAR': (('int',), 'string'), 'STRI2INT': (('string', 'int'), 'int')}
+    """Types of operands and of the result of string instructions"""
+
+    __slots__ = ('handlers', 'specialized')
+
+    def __init__(self, handlers: list):
+        self.handlers = handlers
+        """Dispatch table of the interpret indexed by opcode id, used by superinstructions"""
+        self.specialized = 0
+        """Number of instructions replaced by their unchecked variant"""
+
+    def specialize(self, program: Prog.Program) -> Prog.Program:
+        """Infers types of variables and replaces instructions by their unchecked variants where possible.
+
+        :param program: Loaded program
+        :return: Program with unchecked instructions
+        """
+        instructions = list(program.instructions)
+        entry = TypeInference.analyze(instructions, program.blocks)
+        for block in program.blocks:
+            facts = entry.get(block.start)
+            if facts is None:
+                # the block is never executed
+                continue
+            facts = dict(facts)
+            for pc in range(block.start, block.end):
+                instructions[pc] = self.specialize_instruction(instructions[pc], facts)
+        return Prog.Program(instructions, program.labels, program.operands)
+
+    def report(self) -> str:
+        """
+
+        :return: Summary of the specialized instructions
+        """
+        return 'Type inference: %d instructions without runtime checks\n' % self.specialized
+
+    @staticmethod
+    def analyze(instructions: List[Ins.Instruction], blocks: List[BB.BasicBlock]) -> Dict[int, Facts]:
+        """Computes facts about variables at the start of every reachable basic block.
+
+        :param instructions: Instructions of the program
+        :param blocks: Basic blocks of the program
+        :return: Facts at the start of blocks by their first program counter
+        """
+        if not blocks:
+            return {}
+        entry: Dict[int, Facts] = {blocks[0].start: {}}
+        work = [blocks[0]]
+        while work:
+            block = work.pop()
+            facts = dict(entry[block.start])
+            for pc in range(block.start, block.end):
+                TypeInference.transfer(instructions[pc], facts)
+            last = Prog.Program.control(instructions[block.end - 1])
+            for successor in block.successors:
+                # the program continues after CALL only when the callee returns
+                edge = {} if last.opcode == 'CALL' and successor.start == block.end else facts
+                old = entry.get(successor.start)
+                new = edge if old is None else TypeInference.meet(old, edge)
+                if old is None or new != old:
+                    entry[successor.start] = new
+                    work.append(successor)
+        return entry
+
+    @staticmethod
+    def meet(a: Facts, b: Facts) -> Facts:
+        """Merges facts coming from two paths.
+
+        :param a: Facts from one path
+        :param b: Facts from the other path
+        :return: Facts, which hold on both paths
+        """
+        return {key: fact if fact == b[key] else 'var' for key, fact in a.items() if key in b}
+
+    @staticmethod
+    def key(ref: VarRef.VariableRef) -> Tuple[str, int]:
+        """
+
+        :param ref: Reference to a variable
+        :return: Key of the variable in facts
+        """
+        return ref.frame, ref.slot
+
+    @staticmethod
+    def type_of(symb, facts: Facts) -> Optional[str]:
+        """
+
+        :param symb: Constant or a reference to a variable
+        :param facts: Facts before the instruction
+        :return: Proven type of the symbol, or None if it is not known
+        """
+        if isinstance(symb, Var.Variable):
+            return symb.typ
+        fact = facts.get(TypeInference.key(symb))
+        return None if fact == 'var' else fact
+
+    @staticmethod
+    def is_defined(ref: VarRef.VariableRef, facts: Facts) -> bool:
+        """
+
+        :param ref: Reference to a variable
+        :param facts: Facts before the instruction
+        :return: True, if the variable is proven to exist
+        """
+        return TypeInference.key(ref) in facts
+
+    @staticmethod
+    def transfer(instruction: Ins.Instruction, facts: Facts) -> None:
+        """Updates facts by the effect of an instruction, which has been executed successfully.
+
+        :param instruction: Executed instruction
+        :param facts: Facts before the instruction, updated in place
+        :return: None
+        """
+        if instruction.opcode == 'FUSED':
+            TypeInference.transfer(instruction.args[1], facts)
+            TypeInference.transfer(instruction.args[3], facts)
+            return
+        opcode = Ins.Instruction._checked.get(instruction.opcode, instruction.opcode)
+        args = instruction.args
+        key = TypeInference.key
+
+        if opcode == 'CREATEFRAME':
+            TypeInference.forget(facts, 'TF')
+        elif opcode == 'PUSHFRAME':
+            TypeInference.forget(facts, 'LF')
+            for (frame, slot) in [k for k in facts if k[0] == 'TF']:
+                facts[('LF', slot)] = facts.pop((frame, slot))
+        elif opcode == 'POPFRAME':
+            TypeInference.forget(facts, 'TF')
+            for (frame, slot) in [k for k in facts if k[0] == 'LF']:
+                facts[('TF', slot)] = facts.pop((frame, slot))
+        elif opcode == 'DEFVAR':
+            facts[key(args[0])] = 'var'
+        elif opcode == 'MOVE':
+            facts[key(args[0])] = TypeInference.type_of(args[1], facts) or 'var'
+        elif opcode in ('ADD', 'SUB', 'MUL', 'IDIV'):
+            TypeInference.operands_are(args[1:], 'int', facts)
+            facts[key(args[0])] = 'int'
+        elif opcode in ('AND', 'OR', 'NOT'):
+            TypeInference.operands_are(args[1:], 'bool', facts)
+            facts[key(args[0])] = 'bool'
+        elif opcode in ('LT', 'GT'):
+            typ = TypeInference.type_of(args[1], facts) or TypeInference.type_of(args[2], facts)
+            if typ is not None:
+                TypeInference.operands_are(args[1:], typ, facts)
+            facts[key(args[0])] = 'bool'
+        elif opcode in TypeInference._string_signatures:
+            operands, result = TypeInference._string_signatures[opcode]
+            for arg, typ in zip(args[1:], operands):
+                TypeInference.operands_are((arg,), typ, facts)
+            facts[key(args[0])] = result
+        elif opcode in ('EQ', 'TYPE', 'READ'):
+            facts[key(args[0])] = {'EQ': 'bool', 'TYPE': 'string', 'READ': 'var'}[opcode]
+        elif Ins.Instruction._signatures.get(opcode, ('',))[:1] == ('var',) and key(args[0]) in facts:
+            # any other instruction with a target variable can change its type
+            facts[key(args[0])] = 'var'
+
+    @staticmethod
+    def forget(facts: Facts, frame: str) -> None:
+        """Removes all facts about variables of a frame.
+
+        :param facts: Facts, updated in place
+        :param frame: Name of the frame
+        :return: None
+        """
+        for k in [k for k in facts if k[0] == frame]:
+            del facts[k]
+
+    @staticmethod
+    def operands_are(args, typ: str, facts: Facts) -> None:
+        """Records, that variable operands have a given type, after an instruction requiring it succeeded.
+
+        :param args: Constants or references to variables
+        :param typ: Type required by the instruction
+        :param facts: Facts, updated in place
+        :return: None
+        """
+        for arg in args:
+            if isinstance(arg, VarRef.VariableRef):
+                facts[TypeInference.key(arg)] = typ
+
+    def specialize_instruction(self, instruction: Ins.Instruction, facts: Facts) -> Ins.Instruction:
+        """Replaces an instruction by its unchecked variant, if its checks are proven to pass, and updates facts.
+
+        :param instruction: Instruction of the program
+        :param facts: Facts before the instruction, updated in place to facts after the instruction
+        :return: Instruction to execute
+        """
+        if instruction.opcode == 'FUSED':
+            first_handler, first, second_handler, second = instruction.args
+            first = self.specialize_instruction(first, facts)
+            second = self.specialize_instruction(second, facts)
+            # the superinstruction is shared with the input program, so it is not changed in place
+            return Ins.Instruction('FUSED', (self.handlers[first.op_id], first, self.handlers[second.op_id], second),
+                                   instruction.order)
+
+        if TypeInference.is_unchecked(instruction, facts):
+            TypeInference.transfer(instruction, facts)
+            self.specialized = self.specialized + 1
+            return Ins.Instruction(Ins.Instruction._unchecked[instruction.opcode], instruction.args, instruction.order)
+        TypeInference.transfer(instruction, facts)
+        return instruction
+
+    @staticmethod
+    def is_unchecked(instruction: Ins.Instruction, facts: Facts) -> bool:
+        """Decides, if all runtime checks of an instruction are proven to pass.
+
+        Division by zero is still checked by the unchecked IDIV.
+
+        :param instruction: Instruction of the program
+        :param facts: Facts before the instruction
+        :return: True, if the instruction can be replaced by its unchecked variant
+        """
+        opcode = instruction.opcode
+        if opcode not in Ins.Instruction._unchecked:
+            return False
+        args = instruction.args
+        types = [TypeInference.type_of(arg, facts) for arg in args[1:]]
+        if opcode == 'WRITE':
+            return TypeInference.type_of(args[0], facts) is not None
+        if opcode in ('JUMPIFEQ', 'JUMPIFNEQ'):
+            return None not in types and (types[0] == types[1] or 'nil' in types)
+
+        if not TypeInference.is_defined(args[0], facts) or None in types:
+            return False
+        if opcode == 'MOVE':
+            return True
+        if opcode in ('ADD', 'SUB', 'MUL', 'IDIV'):
+            return types == ['int', 'int']
+        if opcode in ('AND', 'OR'):
+            return types == ['bool', 'bool']
+        if opcode == 'NOT':
+            return types == ['bool']
+        if opcode in ('LT', 'GT'):
+            return types[0] == types[1] and types[0] != 'nil'
+        # EQ
+        return types[0] == types[1] or 'nil' in types
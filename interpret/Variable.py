@@ -1,80 +1,68 @@
-import re
-import sys
-from errorCodes import *
-import Frame as Fr
+class Variable:
+    """Class representing a variable in a program.
 
+    Value of a variable is stored as a native Python value (int, bool, str or None for nil) together with a type tag
+    int, bool, string or nil. Constants (literal operands) are represented by a Variable without a name.
 
-class Variable:
-    """Class representing a variable in a program."""
+    """
 
-    def __init__(self, name: str, value: str = None):
+    __slots__ = ('name', 'typ', 'value')
+
+    def __init__(self, name: str = None, typ: str = None, value=None):
         self.name = name
+        self.typ = typ
         self.value = value
-        if value is None:
-            return
-        if value.isnumeric():
-            self.typ = 'int'
-        elif value == 'true' or value == 'false':
-            self.typ = 'bool'
-        elif value == 'nil':
-            self.typ = 'nil'
-        else:
-            self.typ = "string"
 
-    def get_name(self) -> str:
+    def __str__(self) -> str:
         """
 
-        :return: Name of a variable
+        :return: Value of a variable as it is written to the output
         """
-        return self.name
+        if self.typ == 'bool':
+            return 'true' if self.value else 'false'
+        if self.typ == 'nil':
+            return ''
+        return str(self.value)
 
-    def get_var_ids(self) -> str:
-        """Splits frame id and name of a variable and stores them.
+    @staticmethod
+    def from_literal(typ: str, text: str) -> 'Variable':
+        """Decodes an already validated literal operand into a constant of a native value.
 
-        Name of a variable is stored in the object, while the id of a frame is returned.
+        Escape sequences \\ddd in strings are replaced by the character with the decimal code ddd.
 
-        :return: Id (name) of frame
+        :param typ: Type of the literal i.e. int, bool, string or nil
+        :param text: Text representation of the value
+        :return: Constant with the decoded value
         """
-        var_ids = re.split('@', self.name)
-        if len(var_ids) != 2:
-            sys.stderr.write('Invalid variable identifier: %s\n' % self.name)
-            exit(ERR_MISSING_VALUE)
-        if not re.match('^[GLT]F$', var_ids[0]):
-            sys.stderr.write('Invalid frame identifier: %s.\n' % var_ids[0])
-            exit(ERR_MISSING_VALUE)
-        if not re.search('^[_\\-$&%*!?a-zA-Z][_\\-$&%*!?a-zA-Z\d]*$', var_ids[1]):
-            sys.stderr.write('Invalid variable identifier: %s\n' % self.name)
-            exit(ERR_MISSING_VALUE)
-        self.name = var_ids[1]
-        return var_ids[0]
-
-    def defvar(self):
-        """Adds variable to a frame.
+        if typ == 'int':
+            return Variable(None, typ, int(text))
+        elif typ == 'bool':
+            return Variable(None, typ, text == 'true')
+        elif typ == 'nil':
+            return Variable(None, typ, None)
+        if text is None:
+            return Variable(None, typ, '')
+        if '\\' in text:
+            parts = text.split('\\')
+            for i in range(1, len(parts)):
+                code = parts[i][:3]
+                if len(code) == 3 and code.isascii() and code.isdigit():
+                    parts[i] = chr(int(code)) + parts[i][3:]
+                else:
+                    parts[i] = '\\' + parts[i]
+            text = ''.join(parts)
+        return Variable(None, typ, text)
 
-        :return:
+    def get_name(self) -> str:
         """
-        frame_id = self.get_var_ids()
-        Fr.Frame.frame_for_name(frame_id).add_variable(self)
-
-    def move(self):
-        """Assigns variable in a frame a value and a type.
-
-        If there is no such variable in a frame, interpret gets terminated.
 
-        :return:
+        :return: Name of a variable
         """
-        frame_id = self.get_var_ids()
-        var = Fr.Frame.frame_for_name(frame_id).find_variable(self.get_name())
-
-        if var is None:
-            sys.stderr.write('There is no variable %s%s.\n' % (frame_id, self.get_name()))
-            exit(ERR_VARIABLE)
-        var.value = self.value
-        var.typ = self.typ
+        return self.name
 
     def is_init(self) -> bool:
         """
 
         :return: True, if variable initialized (has value and typ assigned)
         """
-        return self.value is not None and self.typ is not None
+        return self.typ is not None
@@ -0,0 +1,45 @@
+import sys
+import Instruction as Ins
+from errorCodes import *
+
+
+class VariableRef:
+    """Operand referring to a variable, resolved at load time to a kind of frame and a name of the variable.
+
+    Slot index of the variable inside a frame is assigned by OperandTable.assign_slot().
+
+    """
+
+    _frames = ('GF', 'LF', 'TF', 'GF\n', 'LF\n', 'TF\n')
+    """Valid frame identifiers, a trailing line break is allowed as it was by the former pattern ^[GLT]F$"""
+
+    __slots__ = ('frame', 'name', 'slot')
+
+    def __init__(self, frame: str, name: str):
+        self.frame = frame
+        self.name = name
+        self.slot = None
+
+    def __str__(self) -> str:
+        return '%s@%s' % (self.frame, self.name)
+
+    @staticmethod
+    def parse(identifier: str) -> 'VariableRef':
+        """Splits frame id and name of a variable and checks both of them.
+
+        If the identifier is not valid, interpret is terminated.
+
+        :param identifier: Whole identifier of a variable, e.g. GF@counter
+        :return: Reference to the variable
+        """
+        var_ids = identifier.split('@') if identifier is not None else []
+        if len(var_ids) != 2:
+            sys.stderr.write('Invalid variable identifier: %s\n' % identifier)
+            exit(ERR_MISSING_VALUE)
+        if var_ids[0] not in VariableRef._frames:
+            sys.stderr.write('Invalid frame identifier: %s.\n' % var_ids[0])
+            exit(ERR_MISSING_VALUE)
+        if not Ins.Instruction.is_name(var_ids[1]):
+            sys.stderr.write('Invalid variable identifier: %s\n' % identifier)
+            exit(ERR_MISSING_VALUE)
+        return VariableRef(var_ids[0], var_ids[1])
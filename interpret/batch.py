@@ -0,0 +1,284 @@
+"""
+Batch runner of many IPPcode22 programs with their inputs and expected outputs.
+
+Brno University of Technology
+Faculty of Information Technology
+
+Principles of Programming Languages
+
+Author: Šimon Vacek - xvacek10@stud.fit.vutbr.cz
+
+"""
+import argparse
+import gc
+import io
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from typing import Dict, List, Optional, Tuple, Union
+import xml.etree.ElementTree as ET
+import interpret as Interp
+import Optimizer as Opt
+import Program as Prog
+import TypeInference as TI
+from errorCodes import *
+
+
+class BatchRunner:
+    """Runs cases of a manifest, each of them a program with its input and the expected output and exit code.
+
+    Every distinct program is loaded once in the main process. Worker processes of the pool are forked after that, so
+    loaded programs are shared with them copy-on-write. Every case runs in a VM with a timeout and an optional limit
+    of executed instructions.
+    The manifest is a JSON list of cases. A case has a name, a program (source with the XML representation, or
+    source_text with the IPPcode22 source code) and optionally input, expected_output and expected_code (0 by
+    default). Paths are relative to the directory of the manifest.
+
+    """
+
+    programs: Dict[Tuple[str, str], Union[Prog.Program, Tuple[int, str]]] = {}
+    """Loaded programs by their kind and path, or exit code and error messages of programs, which failed to load"""
+    cases: List[dict] = []
+    """Cases of the manifest"""
+    timeout: float = None
+    """Wall time limit of a case in seconds"""
+    instruction_limit: int = None
+    """Limit of executed instructions of a case"""
+
+    @staticmethod
+    def proc_args() -> argparse.Namespace:
+        """Handles script arguments.
+
+        :return: Arguments manifest, jobs, timeout, instruction_limit, json, junit, optimize and infer_types
+        """
+        parser = argparse.ArgumentParser(description='Script runs IPPcode22 programs of a manifest in parallel and '
+                                                     'compares their outputs and exit codes with expected ones.')
+        parser.add_argument('--manifest', help='JSON file with the list of cases', type=str, required=True)
+        parser.add_argument('--jobs', help='number of worker processes, the number of CPUs by default', type=int,
+                            default=os.cpu_count())
+        parser.add_argument('--timeout', help='wall time limit of a case in seconds', type=float, default=10.0)
+        parser.add_argument('--instruction-limit', help='limit of executed instructions of a case', type=int,
+                            dest='instruction_limit')
+        parser.add_argument('--json', help='file to write results in JSON', type=str)
+        parser.add_argument('--junit', help='file to write results in the JUnit XML format', type=str)
+        parser.add_argument('--optimize', help='optimize programs before they are executed', action='store_true')
+        parser.add_argument('--infer-types', help='replace instructions by variants without runtime checks',
+                            action='store_true', dest='infer_types')
+        args = parser.parse_args()
+
+        if not Interp.Interpret.is_file_ok(args.manifest):
+            sys.stderr.write('Manifest either does not exist or is not readable.\n')
+            exit(ERR_READ_INPUT)
+        return args
+
+    @classmethod
+    def load_manifest(cls, manifest: str) -> None:
+        """Reads cases of a manifest and makes their paths absolute.
+
+        :param manifest: Filename of the manifest
+        :return: None
+        """
+        directory = os.path.dirname(os.path.abspath(manifest))
+        try:
+            with open(manifest, encoding='utf-8') as file:
+                cases = json.load(file)
+        except ValueError as error:
+            sys.stderr.write('Manifest is not valid JSON: %s\n' % error)
+            exit(ERR_READ_INPUT)
+        for i, case in enumerate(cases):
+            if not isinstance(case, dict) or ('source' in case) == ('source_text' in case):
+                sys.stderr.write('Case %d of the manifest must have either source or source_text.\n' % i)
+                exit(ERR_MISSING_ARG)
+            case.setdefault('name', 'case %d' % i)
+            for key in ('source', 'source_text', 'input', 'expected_output'):
+                if case.get(key) is not None:
+                    case[key] = os.path.join(directory, case[key])
+        cls.cases = cases
+
+    @staticmethod
+    def program_key(case: dict) -> Tuple[str, str]:
+        """
+
+        :param case: Case of the manifest
+        :return: Kind and path of the program of the case
+        """
+        return ('source', case['source']) if 'source' in case else ('source_text', case['source_text'])
+
+    @classmethod
+    def load_programs(cls, optimize: bool, infer_types: bool) -> None:
+        """Loads every distinct program of the cases once.
+
+        Error messages of a program, which fails to load, are kept together with the exit code and reported by all
+        cases of the program.
+
+        :param optimize: True to optimize programs
+        :param infer_types: True to replace instructions by their unchecked variants
+        :return: None
+        """
+        for case in cls.cases:
+            key = cls.program_key(case)
+            if key in cls.programs:
+                continue
+            kind, path = key
+            stderr = sys.stderr
+            sys.stderr = io.StringIO()
+            try:
+                if kind == 'source':
+                    program = Interp.Interpret.load_program(path)
+                else:
+                    program = Interp.Interpret.load_source_text(path)
+                if optimize:
+                    program = Opt.Optimizer(Interp.Interpret.dispatch_table).optimize(program)
+                if infer_types:
+                    program = TI.TypeInference(Interp.Interpret.dispatch_table).specialize(program)
+                cls.programs[key] = program
+            except SystemExit as termination:
+                cls.programs[key] = (termination.code, sys.stderr.getvalue())
+            except OSError as error:
+                cls.programs[key] = (ERR_READ_INPUT, '%s\n' % error)
+            finally:
+                sys.stderr = stderr
+
+    @staticmethod
+    def timed_out(signum, frame) -> None:
+        """Handler of the timer signal, which terminates the running case.
+
+        :return: None
+        """
+        raise TimeoutError()
+
+    @classmethod
+    def run_case(cls, index: int) -> dict:
+        """Runs a single case in a worker process.
+
+        :param index: Index of the case in the manifest
+        :return: Result of the case
+        """
+        case = cls.cases[index]
+        program = cls.programs[cls.program_key(case)]
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        status = None
+        start = time.perf_counter()
+        if isinstance(program, tuple):
+            code, messages = program
+            stderr.write(messages)
+        else:
+            vm = Interp.VM(program, io.StringIO(BatchRunner.read(case.get('input')) or ''), stdout, stderr,
+                           instruction_limit=cls.instruction_limit)
+            signal.setitimer(signal.ITIMER_REAL, cls.timeout)
+            try:
+                code = vm.run()
+            except TimeoutError:
+                code = None
+                status = 'timeout'
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            if vm.limit_exceeded:
+                status = 'instruction limit'
+        elapsed = time.perf_counter() - start
+
+        expected_code = case.get('expected_code', 0)
+        expected_output = BatchRunner.read(case.get('expected_output'))
+        if status is None:
+            if code != expected_code:
+                status = 'failed'
+            elif expected_output is not None and stdout.getvalue() != expected_output:
+                status = 'failed'
+            else:
+                status = 'passed'
+        return {'name': case['name'], 'status': status, 'exit_code': code, 'expected_code': expected_code,
+                'output_matches': expected_output is None or stdout.getvalue() == expected_output,
+                'time': round(elapsed, 6), 'stderr': stderr.getvalue()[-2000:]}
+
+    @staticmethod
+    def read(path: Optional[str]) -> Optional[str]:
+        """
+
+        :param path: Filename, or None
+        :return: Content of the file, or None if there is no file
+        """
+        if path is None:
+            return None
+        with open(path, encoding='utf-8', newline='') as file:
+            return file.read()
+
+    @classmethod
+    def run(cls, jobs: int) -> List[dict]:
+        """Runs all cases in a pool of worker processes forked after programs were loaded.
+
+        :param jobs: Number of worker processes
+        :return: Results of cases in the order of the manifest
+        """
+        signal.signal(signal.SIGALRM, BatchRunner.timed_out)
+        # loaded programs stay in the permanent generation, so the garbage collector of workers does not touch them
+        # and their memory stays shared
+        gc.freeze()
+        if jobs <= 1:
+            return [cls.run_case(i) for i in range(len(cls.cases))]
+        with multiprocessing.get_context('fork').Pool(jobs) as pool:
+            return pool.map(cls.run_case, range(len(cls.cases)), chunksize=max(1, len(cls.cases) // (jobs * 8)))
+
+    @staticmethod
+    def write_json(results: List[dict], filename: str, elapsed: float) -> None:
+        """Writes results and their summary as JSON.
+
+        :param results: Results of cases
+        :param filename: Output file
+        :param elapsed: Wall time of the whole batch in seconds
+        :return: None
+        """
+        summary = {status: sum(1 for result in results if result['status'] == status)
+                   for status in ('passed', 'failed', 'timeout', 'instruction limit')}
+        with open(filename, 'w', encoding='utf-8') as file:
+            json.dump({'summary': dict(summary, total=len(results), time=round(elapsed, 6)), 'cases': results}, file,
+                      indent=2, ensure_ascii=False)
+
+    @staticmethod
+    def write_junit(results: List[dict], filename: str, elapsed: float) -> None:
+        """Writes results in the JUnit XML format.
+
+        :param results: Results of cases
+        :param filename: Output file
+        :param elapsed: Wall time of the whole batch in seconds
+        :return: None
+        """
+        suite = ET.Element('testsuite', name='IPPcode22', tests=str(len(results)), time='%.6f' % elapsed,
+                           failures=str(sum(1 for result in results if result['status'] == 'failed')),
+                           errors=str(sum(1 for result in results if result['status'] not in ('passed', 'failed'))))
+        for result in results:
+            case = ET.SubElement(suite, 'testcase', classname='IPPcode22', name=result['name'],
+                                 time='%.6f' % result['time'])
+            if result['status'] == 'failed':
+                message = 'exit code %s, expected %s' % (result['exit_code'], result['expected_code']) \
+                    if result['exit_code'] != result['expected_code'] else 'output differs'
+                ET.SubElement(case, 'failure', message=message).text = result['stderr']
+            elif result['status'] != 'passed':
+                ET.SubElement(case, 'error', message=result['status']).text = result['stderr']
+        ET.ElementTree(suite).write(filename, encoding='utf-8', xml_declaration=True)
+
+
+if __name__ == '__main__':
+    args = BatchRunner.proc_args()
+    BatchRunner.timeout = args.timeout
+    BatchRunner.instruction_limit = args.instruction_limit
+    begin = time.perf_counter()
+    BatchRunner.load_manifest(args.manifest)
+    BatchRunner.load_programs(args.optimize, args.infer_types)
+    results = BatchRunner.run(args.jobs)
+    total = time.perf_counter() - begin
+
+    if args.json is not None:
+        BatchRunner.write_json(results, args.json, total)
+    if args.junit is not None:
+        BatchRunner.write_junit(results, args.junit, total)
+    for result in results:
+        if result['status'] != 'passed':
+            sys.stdout.write('%s: %s\n' % (result['name'], result['status']))
+    passed = sum(1 for result in results if result['status'] == 'passed')
+    sys.stdout.write('%d of %d cases passed in %.3f s, %d programs loaded\n'
+                     % (passed, len(results), total, len(BatchRunner.programs)))
+    exit(0 if passed == len(results) else 1)
@@ -0,0 +1,429 @@
+"""
+Differential check of the interpret and its compiled and optimized modes.
+
+Runs IPPcode22 programs through interpret.py with and without --compile, --optimize and --infer-types, and loaded from
+their source code by --source-text instead of XML, and checks, that the standard output, the standard error output and
+the exit code are identical. The compiled mode is run with the default threshold and with every block compiled before
+its first execution. Timing of all runs is reported.
+
+Brno University of Technology
+Faculty of Information Technology
+
+Principles of Programming Languages
+
+Author: Šimon Vacek - xvacek10@stud.fit.vutbr.cz
+
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+import programs
+
+MODES = (('compiled', ['--compile']), ('eager', ['--compile', '--compile-threshold', '1']),
+         ('optimized', ['--optimize']), ('optimized eager', ['--optimize', '--compile', '--compile-threshold', '1']),
+         ('typed', ['--optimize', '--infer-types']),
+         ('typed eager', ['--optimize', '--infer-types', '--compile', '--compile-threshold', '1']))
+
+INTERPRET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'interpret.py')
+
+CASES = {
+    'arithmetic': '''
+        DEFVAR GF@a
+        MOVE GF@a int@-7
+        ADD GF@a GF@a int@10
+        MUL GF@a GF@a GF@a
+        SUB GF@a int@1 GF@a
+        IDIV GF@a GF@a int@3
+        WRITE GF@a
+    ''',
+    'compare': '''
+        DEFVAR GF@r
+        LT GF@r string@abc string@abd
+        WRITE GF@r
+        GT GF@r bool@true bool@false
+        WRITE GF@r
+        EQ GF@r nil@nil nil@nil
+        WRITE GF@r
+        EQ GF@r nil@nil int@0
+        WRITE GF@r
+        AND GF@r GF@r bool@true
+        OR GF@r GF@r bool@true
+        NOT GF@r GF@r
+        WRITE GF@r
+    ''',
+    'write': '''
+        DEFVAR GF@s
+        MOVE GF@s string@a\\032b\\010
+        WRITE GF@s
+        WRITE nil@nil
+        WRITE bool@true
+        WRITE int@-0
+        TYPE GF@s GF@s
+        WRITE GF@s
+    ''',
+    'frames': '''
+        CREATEFRAME
+        DEFVAR TF@x
+        MOVE TF@x int@1
+        PUSHFRAME
+        ADD LF@x LF@x int@1
+        WRITE LF@x
+        POPFRAME
+        WRITE TF@x
+        CREATEFRAME
+        DEFVAR TF@x
+        WRITE TF@x
+    ''',
+    'frame switch': '''
+        CREATEFRAME
+        DEFVAR TF@a
+        MOVE TF@a int@1
+        PUSHFRAME
+        CREATEFRAME
+        DEFVAR TF@a
+        MOVE TF@a int@2
+        WRITE LF@a
+        WRITE TF@a
+        POPFRAME
+        WRITE TF@a
+        MOVE TF@a LF@a
+    ''',
+    'jumps': '''
+        DEFVAR GF@x
+        MOVE GF@x nil@nil
+        JUMPIFEQ nil GF@x nil@nil
+        WRITE string@wrong
+        LABEL nil
+        JUMPIFNEQ end GF@x int@1
+        WRITE string@wrong
+        LABEL end
+        WRITE string@ok
+    ''',
+    'constants': '''
+        DEFVAR GF@x
+        ADD GF@x int@40 int@2
+        WRITE GF@x
+        LT GF@x string@a string@b
+        WRITE GF@x
+        EQ GF@x nil@nil string@a
+        WRITE GF@x
+        JUMPIFEQ skip int@1 int@1
+        WRITE string@unreachable
+        IDIV GF@x int@1 int@0
+        LABEL skip
+        JUMPIFNEQ end int@1 int@1
+        NOT GF@x bool@false
+        OR GF@x GF@x bool@false
+        WRITE GF@x
+        LABEL end
+        JUMP really_end
+        LABEL dead
+        WRITE string@dead
+        LABEL really_end
+        LT GF@x int@1 string@a
+    ''',
+    'constant division by zero': '''
+        DEFVAR GF@x
+        WRITE string@before
+        IDIV GF@x int@1 int@0
+    ''',
+    'type changes in a loop': '''
+        DEFVAR GF@x
+        DEFVAR GF@i
+        MOVE GF@i int@0
+        MOVE GF@x int@1
+        LABEL loop
+        ADD GF@x GF@x int@1
+        WRITE GF@x
+        MOVE GF@x string@s
+        ADD GF@i GF@i int@1
+        JUMPIFNEQ loop GF@i int@2
+    ''',
+    'type changes in a call': '''
+        DEFVAR GF@x
+        MOVE GF@x int@1
+        ADD GF@x GF@x int@1
+        CALL change
+        WRITE GF@x
+        ADD GF@x GF@x int@1
+        JUMP end
+        LABEL change
+        MOVE GF@x bool@true
+        RETURN
+        LABEL end
+    ''',
+    'types in frames': '''
+        CREATEFRAME
+        DEFVAR TF@x
+        MOVE TF@x int@1
+        PUSHFRAME
+        CREATEFRAME
+        DEFVAR TF@x
+        MOVE TF@x string@a
+        ADD LF@x LF@x int@1
+        WRITE LF@x
+        POPFRAME
+        WRITE TF@x
+        ADD TF@x TF@x int@1
+    ''',
+    'uninitialized': '''
+        DEFVAR GF@x
+        DEFVAR GF@y
+        WRITE string@before
+        ADD GF@y GF@x int@1
+    ''',
+    'undefined variable': '''
+        WRITE string@before
+        MOVE GF@x int@1
+    ''',
+    'missing frame': '''
+        WRITE string@before
+        DEFVAR LF@x
+    ''',
+    'missing temporary frame': '''
+        WRITE string@before
+        MOVE TF@x int@1
+    ''',
+    'redefinition': '''
+        DEFVAR GF@x
+        DEFVAR GF@x
+    ''',
+    'wrong types': '''
+        DEFVAR GF@x
+        MOVE GF@x string@a
+        LT GF@x GF@x int@1
+    ''',
+    'nil comparison': '''
+        DEFVAR GF@x
+        LT GF@x nil@nil nil@nil
+    ''',
+    'division by zero': '''
+        DEFVAR GF@x
+        MOVE GF@x int@0
+        IDIV GF@x int@1 GF@x
+    ''',
+    'strings': '''
+        DEFVAR GF@s
+        DEFVAR GF@t
+        DEFVAR GF@x
+        MOVE GF@s string@ab
+        CONCAT GF@s GF@s string@c\\010
+        CONCAT GF@s GF@s GF@s
+        MOVE GF@t GF@s
+        SETCHAR GF@s int@0 string@xyz
+        CONCAT GF@s GF@s string@d
+        WRITE GF@s
+        WRITE GF@t
+        STRLEN GF@x GF@s
+        WRITE GF@x
+        GETCHAR GF@x GF@s int@8
+        WRITE GF@x
+        STRI2INT GF@x GF@s int@1
+        WRITE GF@x
+        INT2CHAR GF@x int@382
+        WRITE GF@x
+        CONCAT GF@x GF@t GF@s
+        WRITE GF@x
+        EQ GF@x GF@s GF@t
+        WRITE GF@x
+        LT GF@x GF@t GF@s
+        WRITE GF@x
+        JUMPIFEQ end GF@s string@xbc\\010abc\\010d
+        WRITE string@wrong
+        LABEL end
+        TYPE GF@x GF@s
+        WRITE GF@x
+    ''',
+    'string index out of range': '''
+        DEFVAR GF@x
+        MOVE GF@x string@abc
+        SETCHAR GF@x int@1 string@B
+        WRITE GF@x
+        GETCHAR GF@x GF@x int@-1
+    ''',
+    'empty setchar': '''
+        DEFVAR GF@x
+        MOVE GF@x string@abc
+        SETCHAR GF@x int@1 string@
+    ''',
+    'invalid code point': '''
+        DEFVAR GF@x
+        INT2CHAR GF@x int@1114112
+    ''',
+    'setchar uninitialized': '''
+        DEFVAR GF@x
+        SETCHAR GF@x int@0 string@a
+    ''',
+    'concat types': '''
+        DEFVAR GF@x
+        CONCAT GF@x string@a int@1
+    ''',
+    'exit': '''
+        WRITE string@before
+        EXIT int@42
+        WRITE string@after
+    ''',
+    'return': '''
+        RETURN
+    ''',
+    'fold undefined target': '''
+        DEFVAR GF@y
+        ADD GF@y int@1 int@2
+        WRITE GF@y
+        CREATEFRAME
+        DEFVAR TF@z
+        PUSHFRAME
+        LT LF@z int@1 int@2
+        WRITE LF@z
+        ADD GF@x int@1 int@2
+    ''',
+    'stack': '''
+        DEFVAR GF@x
+        DEFVAR GF@s
+        MOVE GF@s string@ab
+        CONCAT GF@s GF@s string@c
+        PUSHS GF@s
+        SETCHAR GF@s int@0 string@z
+        POPS GF@x
+        WRITE GF@x
+        PUSHS int@7
+        PUSHS int@-3
+        SUBS
+        PUSHS int@4
+        MULS
+        PUSHS int@3
+        IDIVS
+        POPS GF@x
+        WRITE GF@x
+        PUSHS string@abc
+        PUSHS int@1
+        STRI2INTS
+        INT2CHARS
+        PUSHS string@b
+        EQS
+        PUSHS bool@false
+        ORS
+        NOTS
+        PUSHS int@1
+        PUSHS int@2
+        LTS
+        ANDS
+        PUSHS nil@nil
+        PUSHS int@0
+        GTS
+    ''',
+    'stack comparison': '''
+        DEFVAR GF@x
+        PUSHS nil@nil
+        PUSHS int@0
+        EQS
+        POPS GF@x
+        WRITE GF@x
+        PUSHS string@a
+        PUSHS string@b
+        GTS
+        POPS GF@x
+        WRITE GF@x
+        PUSHS int@1
+        PUSHS bool@true
+        CLEARS
+        PUSHS int@1
+        PUSHS int@1
+        JUMPIFNEQS end
+        PUSHS nil@nil
+        PUSHS string@a
+        JUMPIFEQS end
+        PUSHS bool@true
+        PUSHS bool@true
+        JUMPIFEQS end
+        WRITE string@skipped
+        LABEL end
+        WRITE string@end
+        PUSHS int@1
+        PUSHS string@1
+        JUMPIFEQS end
+    ''',
+    'stack loop': '''
+        DEFVAR GF@i
+        MOVE GF@i int@0
+        LABEL loop
+        PUSHS GF@i
+        PUSHS int@1
+        ADDS
+        POPS GF@i
+        PUSHS GF@i
+        PUSHS int@100
+        JUMPIFNEQS loop
+        WRITE GF@i
+        PUSHS int@1
+        PUSHS int@0
+        IDIVS
+    ''',
+    'empty stack': '''
+        DEFVAR GF@x
+        PUSHS int@1
+        ADDS
+    ''',
+    'pops uninitialized': '''
+        DEFVAR GF@x
+        DEFVAR GF@y
+        PUSHS GF@x
+        POPS GF@y
+    ''',
+    'stri2ints index': '''
+        PUSHS string@abc
+        PUSHS int@3
+        STRI2INTS
+    ''',
+}
+
+
+def run(xml: str, options: List[str], source_option: str = '--source') -> Tuple[float, bytes, bytes, int]:
+    """Interprets a program in a separate process.
+
+    :param xml: XML representation of the program, or its source code for --source-text
+    :param options: Additional options of the interpret
+    :param source_option: Option of the interpret, which the program is passed by
+    :return: Wall time in seconds, standard output, standard error output and the exit code
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.xml', delete=False) as file:
+        file.write(xml)
+    try:
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, INTERPRET, source_option, file.name] + options,
+                                 stdin=subprocess.DEVNULL, capture_output=True)
+        return time.perf_counter() - start, process.stdout, process.stderr, process.returncode
+    finally:
+        os.unlink(file.name)
+
+
+def main() -> None:
+    cases = [(name, programs.to_xml(code), programs.to_source(code)) for name, code in CASES.items()]
+    cases += [('fibonacci(18)', programs.fibonacci(18), None), ('countdown(5000)', programs.countdown(5000), None),
+              ('loop(200000)', programs.loop(200000), None),
+              ('straight_line(20000)', programs.straight_line(20000), None)]
+
+    failed = 0
+    for name, xml, source in cases:
+        interpreted = run(xml, [])
+        results = [(mode, run(xml, options)) for mode, options in MODES]
+        if source is not None:
+            results.append(('source text', run(source, [], '--source-text')))
+        if any(result[1:] != interpreted[1:] for mode, result in results):
+            failed = failed + 1
+            print('%s: DIFFERENT' % name)
+            print('  interpreted: %r' % (interpreted[1:],))
+            for mode, result in results:
+                print('  %s: %r' % (mode, result[1:]))
+        else:
+            print('%s: same, exit code %d, %.3f s interpreted, %s' % (name, interpreted[3], interpreted[0], ', '.join(
+                '%.3f s %s' % (result[0], mode) for mode, result in results)))
+    exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
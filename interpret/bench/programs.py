@@ -0,0 +1,326 @@
+"""
+Generators of IPPcode22 programs in XML representation used by benchmarks.
+
+Brno University of Technology
+Faculty of Information Technology
+
+Principles of Programming Languages
+
+Author: Šimon Vacek - xvacek10@stud.fit.vutbr.cz
+
+"""
+from typing import List
+from xml.sax.saxutils import escape
+
+_LITERAL_TYPES = ('int', 'bool', 'string', 'nil')
+_FRAMES = ('GF', 'LF', 'TF')
+
+
+def arg_type(opcode: str, arg: str) -> str:
+    """Finds the XML type of an argument written in the IPPcode22 syntax.
+
+    :param opcode: Opcode of the instruction the argument belongs to
+    :param arg: Argument, e.g. GF@x, int@1 or a name of a label
+    :return: Type of the argument for its <argN> element
+    """
+    prefix = arg.split('@', 1)[0]
+    if '@' in arg and prefix in _FRAMES:
+        return 'var'
+    if '@' in arg and prefix in _LITERAL_TYPES:
+        return prefix
+    if opcode == 'READ':
+        return 'type'
+    return 'label'
+
+
+def to_xml(code: str) -> str:
+    """Translates IPPcode22 source code without the header into its XML representation.
+
+    Every non-empty line holds a single instruction. Comments are not supported.
+
+    :param code: Instructions of the program
+    :return: XML representation of the program
+    """
+    out: List[str] = ['<?xml version="1.0" encoding="UTF-8"?>', '<program language="IPPcode22">']
+    order = 1
+    for line in code.splitlines():
+        words = line.split()
+        if not words:
+            continue
+        opcode = words[0].upper()
+        out.append('    <instruction order="%d" opcode="%s">' % (order, opcode))
+        for i, arg in enumerate(words[1:], 1):
+            typ = arg_type(opcode, arg)
+            text = arg.split('@', 1)[1] if typ in _LITERAL_TYPES else arg
+            out.append('        <arg%d type="%s">%s</arg%d>' % (i, typ, escape(text), i))
+        out.append('    </instruction>')
+        order = order + 1
+    out.append('</program>')
+    return '\n'.join(out) + '\n'
+
+
+def to_source(code: str) -> str:
+    """Adds the header to IPPcode22 source code, which can be loaded by --source-text.
+
+    :param code: Instructions of the program
+    :return: Source code of the program
+    """
+    return '.IPPcode22\n' + code
+
+
+def fibonacci(n: int) -> str:
+    """Recursive computation of the n-th Fibonacci number.
+
+    Argument is passed in TF@n, result is returned in GF@ret. Every call creates and pushes its own frame.
+
+    :param n: Index of the Fibonacci number
+    :return: XML representation of the program
+    """
+    return to_xml('''
+        DEFVAR GF@ret
+        CREATEFRAME
+        DEFVAR TF@n
+        MOVE TF@n int@%d
+        CALL fib
+        WRITE GF@ret
+        JUMP end
+
+        LABEL fib
+        PUSHFRAME
+        DEFVAR LF@r
+        DEFVAR LF@c
+        LT LF@c LF@n int@2
+        JUMPIFEQ fib_base LF@c bool@true
+        CREATEFRAME
+        DEFVAR TF@n
+        SUB TF@n LF@n int@1
+        CALL fib
+        MOVE LF@r GF@ret
+        CREATEFRAME
+        DEFVAR TF@n
+        SUB TF@n LF@n int@2
+        CALL fib
+        ADD GF@ret GF@ret LF@r
+        POPFRAME
+        RETURN
+        LABEL fib_base
+        MOVE GF@ret LF@n
+        POPFRAME
+        RETURN
+        LABEL end
+    ''' % n)
+
+
+def fibonacci_calls(n: int) -> int:
+    """
+
+    :param n: Index of the Fibonacci number
+    :return: Number of calls made by fibonacci(n)
+    """
+    a, b = 1, 1
+    for _ in range(n):
+        a, b = b, a + b + 1
+    return a
+
+
+def countdown(depth: int) -> str:
+    """Recursion of a given depth computing sum of numbers 1..depth on the way back.
+
+    Every level keeps its frame on the frame stack and a return address on the call stack until the deepest level
+    is reached.
+
+    :param depth: Depth of the recursion
+    :return: XML representation of the program
+    """
+    return to_xml('''
+        DEFVAR GF@ret
+        CREATEFRAME
+        DEFVAR TF@n
+        MOVE TF@n int@%d
+        CALL sum
+        WRITE GF@ret
+        JUMP end
+
+        LABEL sum
+        PUSHFRAME
+        JUMPIFNEQ sum_rec LF@n int@0
+        MOVE GF@ret int@0
+        POPFRAME
+        RETURN
+        LABEL sum_rec
+        CREATEFRAME
+        DEFVAR TF@n
+        SUB TF@n LF@n int@1
+        CALL sum
+        ADD GF@ret GF@ret LF@n
+        POPFRAME
+        RETURN
+        LABEL end
+    ''' % depth)
+
+
+def loop(n: int) -> str:
+    """Loop of a given number of iterations summing the iteration counter.
+
+    :param n: Number of iterations
+    :return: XML representation of the program
+    """
+    return to_xml('''
+        DEFVAR GF@i
+        DEFVAR GF@sum
+        DEFVAR GF@c
+        MOVE GF@i int@0
+        MOVE GF@sum int@0
+        LABEL loop
+        ADD GF@sum GF@sum GF@i
+        ADD GF@i GF@i int@1
+        LT GF@c GF@i int@%d
+        JUMPIFEQ loop GF@c bool@true
+        WRITE GF@sum
+    ''' % n)
+
+
+def straight_line(count: int) -> str:
+    """Program of a given number of instructions without any jumps, used to measure loading of large programs.
+
+    :param count: Number of instructions
+    :return: XML representation of the program
+    """
+    lines = ['DEFVAR GF@a', 'DEFVAR GF@b', 'MOVE GF@b int@0']
+    patterns = ('MOVE GF@a int@%d', 'ADD GF@b GF@b GF@a', 'SUB GF@b GF@b int@%d', 'LT GF@a GF@b int@%d')
+    for i in range(count - len(lines)):
+        pattern = patterns[i % len(patterns)]
+        lines.append(pattern % i if '%d' in pattern else pattern)
+    return to_xml('\n'.join(lines))
+
+
+def build_string(size: int, chunk: int, in_place: bool = True) -> str:
+    """Builds a string of a given length by repeated concatenation of a chunk to its end.
+
+    :param size: Length of the built string, a multiple of the chunk length
+    :param chunk: Length of the appended chunk
+    :param in_place: True to concatenate into the built variable itself, False to concatenate into another variable
+                     and move the result back, which copies the string every time
+    :return: XML representation of the program
+    """
+    append = 'CONCAT GF@s GF@s GF@c' if in_place else 'CONCAT GF@t GF@s GF@c\nMOVE GF@s GF@t'
+    return to_xml('''
+        DEFVAR GF@s
+        DEFVAR GF@t
+        DEFVAR GF@c
+        DEFVAR GF@n
+        DEFVAR GF@b
+        MOVE GF@s string@
+        MOVE GF@c string@%s
+        LABEL loop
+        %s
+        STRLEN GF@n GF@s
+        LT GF@b GF@n int@%d
+        JUMPIFEQ loop GF@b bool@true
+        WRITE GF@n
+    ''' % ('a' * chunk, append, size))
+
+
+def mutate_string(size: int, count: int) -> str:
+    """Builds a string of a given length by doubling and replaces its first characters one by one by SETCHAR.
+
+    :param size: Length of the string, a power of two
+    :param count: Number of replaced characters, at most the length of the string
+    :return: XML representation of the program
+    """
+    return to_xml('''
+        DEFVAR GF@s
+        DEFVAR GF@n
+        DEFVAR GF@i
+        DEFVAR GF@b
+        MOVE GF@s string@a
+        LABEL double
+        CONCAT GF@s GF@s GF@s
+        STRLEN GF@n GF@s
+        LT GF@b GF@n int@%d
+        JUMPIFEQ double GF@b bool@true
+        MOVE GF@i int@0
+        LABEL loop
+        SETCHAR GF@s GF@i string@b
+        ADD GF@i GF@i int@1
+        LT GF@b GF@i int@%d
+        JUMPIFEQ loop GF@b bool@true
+        GETCHAR GF@b GF@s int@0
+        WRITE GF@b
+        WRITE GF@n
+    ''' % (size, count))
+
+
+def write_loop(n: int) -> str:
+    """Loop of a given number of iterations writing an integer and a string in every iteration.
+
+    :param n: Number of iterations
+    :return: XML representation of the program
+    """
+    return to_xml('''
+        DEFVAR GF@i
+        DEFVAR GF@c
+        MOVE GF@i int@0
+        LABEL loop
+        WRITE GF@i
+        WRITE string@\\010
+        ADD GF@i GF@i int@1
+        LT GF@c GF@i int@%d
+        JUMPIFEQ loop GF@c bool@true
+    ''' % n)
+
+
+def expression(n: int, stack: bool) -> str:
+    """Loop of a given number of iterations evaluating the same arithmetic and boolean expression in every iteration.
+
+    The expression acc = acc + (i * 3 - i / 2) and the condition i < n are evaluated either with temporary variables
+    in the global frame, or with PUSHS, POPS and stack variants of instructions.
+
+    :param n: Number of iterations
+    :param stack: True for the stack variant, False for the frame variant
+    :return: XML representation of the program
+    """
+    if stack:
+        body = '''
+            PUSHS GF@acc
+            PUSHS GF@i
+            PUSHS int@3
+            MULS
+            PUSHS GF@i
+            PUSHS int@2
+            IDIVS
+            SUBS
+            ADDS
+            POPS GF@acc
+            PUSHS GF@i
+            PUSHS int@1
+            ADDS
+            POPS GF@i
+            PUSHS GF@i
+            PUSHS int@%d
+            LTS
+            PUSHS bool@true
+            JUMPIFEQS loop
+        ''' % n
+    else:
+        body = '''
+            MUL GF@t1 GF@i int@3
+            IDIV GF@t2 GF@i int@2
+            SUB GF@t1 GF@t1 GF@t2
+            ADD GF@acc GF@acc GF@t1
+            ADD GF@i GF@i int@1
+            LT GF@c GF@i int@%d
+            JUMPIFEQ loop GF@c bool@true
+        ''' % n
+    return to_xml('''
+        DEFVAR GF@i
+        DEFVAR GF@acc
+        DEFVAR GF@t1
+        DEFVAR GF@t2
+        DEFVAR GF@c
+        MOVE GF@i int@0
+        MOVE GF@acc int@0
+        LABEL loop
+    ''' + body + '''
+        WRITE GF@acc
+    ''')
@@ -0,0 +1,71 @@
+"""
+Recursion stress benchmark of the interpret.
+
+Runs recursive IPPcode22 programs through interpret.py and reports time per CALL and memory per level of recursion.
+
+Brno University of Technology
+Faculty of Information Technology
+
+Principles of Programming Languages
+
+Author: Šimon Vacek - xvacek10@stud.fit.vutbr.cz
+
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Tuple
+
+import programs
+
+INTERPRET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'interpret.py')
+
+
+def run(xml: str) -> Tuple[float, int, str]:
+    """Interprets a program in a separate process.
+
+    :param xml: XML representation of the program
+    :return: Wall time in seconds, peak resident memory in KiB and the output of the program
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.xml', delete=False) as file:
+        file.write(xml)
+    try:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, INTERPRET, '--source', file.name], stdout=subprocess.PIPE)
+        output = process.stdout.read().decode()
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode != 0:
+            sys.stderr.write('Interpret failed with exit code %d\n' % process.returncode)
+            exit(1)
+        return elapsed, usage.ru_maxrss, output
+    finally:
+        os.unlink(file.name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measures time and memory of recursive calls in the interpret.')
+    parser.add_argument('--fib', type=int, default=22, help='index of the Fibonacci number to compute recursively')
+    parser.add_argument('--depth', type=int, default=100000, help='maximal depth of the recursion')
+    args = parser.parse_args()
+
+    # startup of the interpret is subtracted from the measured times
+    base_time, base_rss, _ = min(run(programs.countdown(0)) for _ in range(3))
+
+    elapsed, _, output = run(programs.fibonacci(args.fib))
+    calls = programs.fibonacci_calls(args.fib)
+    print('fibonacci(%d) = %s: %d calls, %.3f s, %.2f us per call'
+          % (args.fib, output.strip(), calls, elapsed, (elapsed - base_time) / calls * 1e6))
+
+    for depth in (args.depth // 100, args.depth // 10, args.depth):
+        elapsed, rss, _ = run(programs.countdown(depth))
+        print('recursion depth %d: %.3f s, peak memory %d KiB, %.0f B per level, %.2f us per call'
+              % (depth, elapsed, rss, (rss - base_rss) * 1024 / depth, (elapsed - base_time) / depth * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Data stack benchmark of the interpret.
+
+Runs the same expression-heavy loop written with temporary variables in a frame and with PUSHS, POPS and stack
+variants of instructions through interpret.py and reports time per iteration of both variants, interpreted and with
+--compile. Both variants must write the same result.
+
+Brno University of Technology
+Faculty of Information Technology
+
+Principles of Programming Languages
+
+Author: Šimon Vacek - xvacek10@stud.fit.vutbr.cz
+
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+import programs
+
+INTERPRET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'interpret.py')
+
+MODES = (('interpreted', []), ('compiled', ['--compile']))
+
+
+def run(xml: str, options: List[str]) -> Tuple[float, str]:
+    """Interprets a program in a separate process.
+
+    :param xml: XML representation of the program
+    :param options: Additional options of the interpret
+    :return: Wall time in seconds and the output of the program
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.xml', delete=False) as file:
+        file.write(xml)
+    try:
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, INTERPRET, '--source', file.name] + options,
+                                 stdin=subprocess.DEVNULL, stdout=subprocess.PIPE)
+        elapsed = time.perf_counter() - start
+        if process.returncode != 0:
+            sys.stderr.write('Interpret failed with exit code %d\n' % process.returncode)
+            exit(1)
+        return elapsed, process.stdout.decode()
+    finally:
+        os.unlink(file.name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compares stack and frame variants of an expression-heavy program.')
+    parser.add_argument('--iterations', type=int, default=200000, help='number of iterations of the loop')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs, the fastest one is taken')
+    args = parser.parse_args()
+
+    # startup of the interpret is subtracted from the measured times
+    base_time = min(run(programs.countdown(0), [])[0] for _ in range(args.repeat))
+
+    for mode, options in MODES:
+        outputs = {}
+        for stack in (False, True):
+            xml = programs.expression(args.iterations, stack)
+            results = [run(xml, options) for _ in range(args.repeat)]
+            elapsed = min(elapsed for elapsed, _ in results)
+            outputs[stack] = results[0][1]
+            print('%s %s: %.3f s, %.2f us per iteration' % (mode, 'stack' if stack else 'frame', elapsed,
+                                                             (elapsed - base_time) / args.iterations * 1e6))
+        if outputs[False] != outputs[True]:
+            sys.stderr.write('Stack and frame variants wrote different results: %r and %r\n'
+                             % (outputs[True], outputs[False]))
+            exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Startup budget check of the interpret.
+
+Runs a tiny program through run.py with --source and --input, the fast path of the interpret, and measures its imports
+by python -X importtime. The check fails, if the total self time of the imports exceeds the budget, or if a module
+needed only by some options, or a slow module of the standard library, is imported on the fast path. The import time
+is the fastest of several runs and does not include the startup of Python itself, so it does not depend on the load
+of the machine as much as the wall time. The cold start (wall time of run.py and interpret.py above bare Python) is
+only reported.
+
+Bytecode is not compiled by the check. Where PYTHONDONTWRITEBYTECODE is set, run python -m compileall first,
+otherwise compiling the sources is measured as well.
+
+Brno University of Technology
+Faculty of Information Technology
+
+Principles of Programming Languages
+
+Author: Šimon Vacek - xvacek10@stud.fit.vutbr.cz
+
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import programs
+
+DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INTERPRET = os.path.join(DIRECTORY, 'interpret.py')
+RUN = os.path.join(DIRECTORY, 'run.py')
+
+LAZY_MODULES = ('argparse', 'typing', 'json', 'hashlib', 'Compiler', 'Optimizer', 'TypeInference', 'ProgramCache',
+                'SourceParser', 'Profiler', 're', 'xml.etree')
+"""Modules (with their submodules), which must not be imported, when a program is run only with --source and --input"""
+
+
+def wall_time(command: List[str]) -> float:
+    """
+
+    :param command: Command of the process
+    :return: Wall time of the process in seconds
+    """
+    start = time.perf_counter()
+    process = subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        sys.stderr.write('%s failed with exit code %d\n' % (' '.join(command), process.returncode))
+        exit(1)
+    return elapsed
+
+
+def import_times(command: List[str]) -> Dict[str, int]:
+    """Runs a process with python -X importtime.
+
+    :param command: Arguments of Python
+    :return: Self times of imported modules in microseconds by their names
+    """
+    process = subprocess.run([sys.executable, '-X', 'importtime'] + command, stdin=subprocess.DEVNULL,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    modules = {}
+    for line in process.stderr.decode().splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        self_time, _, name = line[len('import time:'):].split('|')
+        if self_time.strip().isdigit():
+            modules[name.strip()] = int(self_time)
+    return modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Checks the startup time of the interpret against a budget.')
+    parser.add_argument('--repeat', type=int, default=20, help='number of runs, the fastest one is taken')
+    parser.add_argument('--import-budget', type=float, default=25.0,
+                        help='allowed total self time of imports of run.py in milliseconds')
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile('w', suffix='.xml', delete=False) as file:
+        file.write(programs.loop(10))
+    try:
+        options = ['--source', file.name, '--input', os.devnull]
+        commands = {'python': [sys.executable, '-c', 'pass'], 'interpret.py': [sys.executable, INTERPRET] + options,
+                    'run.py': [sys.executable, RUN] + options}
+        times = {name: [] for name in commands}
+        for _ in range(args.repeat):
+            # runs are interleaved, so a disturbance of the machine affects all commands alike
+            for name, command in commands.items():
+                times[name].append(wall_time(command))
+        imports = min((import_times([RUN] + options) for _ in range(max(args.repeat // 4, 3))),
+                      key=lambda modules: sum(modules.values()))
+    finally:
+        os.unlink(file.name)
+
+    python = min(times['python'])
+    print('python: %.1f ms' % (python * 1e3))
+    for name in ('interpret.py', 'run.py'):
+        print('%s: %.1f ms, %.1f ms above python' % (name, min(times[name]) * 1e3, (min(times[name]) - python) * 1e3))
+    import_time = sum(imports.values()) / 1e3
+    print('imports of run.py: %.1f ms in %d modules' % (import_time, len(imports)))
+    for name, self_time in sorted(imports.items(), key=lambda item: -item[1])[:5]:
+        print('    %s: %.1f ms' % (name, self_time / 1e3))
+
+    failures = []
+    if import_time > args.import_budget:
+        failures.append('imports %.1f ms exceed the budget of %.1f ms' % (import_time, args.import_budget))
+    for module in LAZY_MODULES:
+        if any(name == module or name.startswith(module + '.') for name in imports):
+            failures.append('module %s is imported on the fast path' % module)
+    for failure in failures:
+        print('failure: %s' % failure)
+    exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+String benchmark of the interpret.
+
+Runs IPPcode22 programs building and mutating strings of up to 1 MiB through interpret.py and reports time per CONCAT
+and per SETCHAR for growing lengths of the string. Concatenation into the string variable itself is compared with
+concatenation into another variable, which copies the whole string every time.
+
+Brno University of Technology
+Faculty of Information Technology
+
+Principles of Programming Languages
+
+Author: Šimon Vacek - xvacek10@stud.fit.vutbr.cz
+
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Tuple
+
+import programs
+
+INTERPRET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'interpret.py')
+
+
+def run(xml: str) -> Tuple[float, str]:
+    """Interprets a program in a separate process.
+
+    :param xml: XML representation of the program
+    :return: Wall time in seconds and the output of the program
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.xml', delete=False) as file:
+        file.write(xml)
+    try:
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, INTERPRET, '--source', file.name], stdin=subprocess.DEVNULL,
+                                 stdout=subprocess.PIPE)
+        elapsed = time.perf_counter() - start
+        if process.returncode != 0:
+            sys.stderr.write('Interpret failed with exit code %d\n' % process.returncode)
+            exit(1)
+        return elapsed, process.stdout.decode()
+    finally:
+        os.unlink(file.name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measures building and mutating of long strings in the interpret.')
+    parser.add_argument('--size', type=int, default=2 ** 20, help='length of the longest string, a power of two')
+    parser.add_argument('--chunk', type=int, default=16, help='length of a string appended by a single CONCAT')
+    args = parser.parse_args()
+
+    # startup of the interpret is subtracted from the measured times
+    base_time, _ = min(run(programs.countdown(0)) for _ in range(3))
+
+    for size in (args.size // 64, args.size // 8, args.size):
+        appends = size // args.chunk
+        for in_place in (True, False):
+            elapsed, _ = run(programs.build_string(size, args.chunk, in_place))
+            print('build %d characters by %d CONCAT %s: %.3f s, %.2f us per iteration'
+                  % (size, appends, 'in place' if in_place else 'with a copy', elapsed,
+                     (elapsed - base_time) / appends * 1e6))
+        count = min(size, 100000)
+        elapsed, _ = run(programs.mutate_string(size, count))
+        print('mutate %d characters by %d SETCHAR: %.3f s, %.2f us per iteration'
+              % (size, count, elapsed, (elapsed - base_time) / count * 1e6))
+
+
+if __name__ == '__main__':
+    main()
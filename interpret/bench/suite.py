@@ -0,0 +1,193 @@
+"""
+Benchmark suite of the interpret with a comparison against a baseline.
+
+Generates workloads (arithmetic loop, deep recursion, string building, loop writing output and a large straight-line
+program) in several sizes, runs each of them through interpret.py in a separate process and reports executed
+instructions per second, load time, startup time and peak memory. Results are saved as JSON and optionally compared
+with results of a previous run, a regression beyond the threshold fails the suite.
+
+The number of executed instructions is taken from a run with --stats. Load and execution are timed in fresh processes
+running this script with --measure, which loads the program and runs it in a VM, so neither of them includes
+the startup. The startup is the time of interpret.py running an empty program.
+
+Brno University of Technology
+Faculty of Information Technology
+
+Principles of Programming Languages
+
+Author: Šimon Vacek - xvacek10@stud.fit.vutbr.cz
+
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+import programs
+
+INTERPRET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'interpret.py')
+
+WORKLOADS: Dict[str, Tuple[Callable[[int], str], Tuple[int, ...]]] = {
+    'arithmetic': (programs.loop, (10000, 100000, 1000000)),
+    'recursion': (programs.countdown, (1000, 10000, 100000)),
+    'strings': (lambda size: programs.build_string(size, 16), (16384, 131072, 1048576)),
+    'write': (programs.write_loop, (10000, 100000, 500000)),
+    'straight_line': (programs.straight_line, (1000, 10000, 100000)),
+}
+"""Generators of workloads with their sizes at the scale 1"""
+
+METRICS = {'instructions_per_second': (1, 'execute_time'), 'load_time': (-1, 'load_time'),
+           'startup_time': (-1, 'startup_time'), 'peak_memory': (-1, None)}
+"""Compared metrics with 1 if a higher value is better, -1 if a lower value is better, and the measured duration"""
+
+NOISE_FLOOR = 0.01
+"""Metrics of durations shorter than this number of seconds in the baseline are not compared, they are mostly noise"""
+
+
+def run(command: List[str]) -> Tuple[float, int, str]:
+    """Runs a process.
+
+    :param command: Command of the process
+    :return: Wall time in seconds, peak resident memory in KiB and the output of the process
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE)
+    output = process.stdout.read().decode()
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        sys.stderr.write('Interpret failed with exit code %d\n' % process.returncode)
+        exit(1)
+    return elapsed, usage.ru_maxrss, output
+
+
+def measure_child(source: str) -> None:
+    """Loads and runs a program in this process and writes durations of both phases as JSON.
+
+    :param source: Filename of the XML representation of the program
+    :return: None
+    """
+    sys.path.insert(0, os.path.dirname(INTERPRET))
+    import interpret as Interp
+    start = time.perf_counter()
+    program = Interp.Interpret.load_program(source)
+    loaded = time.perf_counter()
+    with open(os.devnull, 'w') as output:
+        code = Interp.VM(program, io.StringIO(), output).run()
+    finished = time.perf_counter()
+    sys.stdout.write(json.dumps({'code': code, 'load_time': loaded - start, 'execute_time': finished - loaded}))
+
+
+def measure(xml: str, repeat: int, startup_time: float) -> dict:
+    """Measures a single workload.
+
+    :param xml: XML representation of the program
+    :param repeat: Number of timed runs
+    :param startup_time: Time of the startup of the interpret
+    :return: Metrics of the workload
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'program.xml')
+        stats = os.path.join(directory, 'stats.json')
+        with open(source, 'w', encoding='utf-8') as file:
+            file.write(xml)
+        run([sys.executable, INTERPRET, '--source', source, '--stats', stats])
+        with open(stats, encoding='utf-8') as file:
+            instructions = json.load(file)['total']['instructions']
+        runs = []
+        for _ in range(repeat):
+            _, peak_memory, output = run([sys.executable, os.path.abspath(__file__), '--measure', source])
+            runs.append(dict(json.loads(output), peak_memory=peak_memory))
+
+    execute_time = min(measured['execute_time'] for measured in runs)
+    return {'instructions': instructions, 'execute_time': round(execute_time, 6),
+            'instructions_per_second': round(instructions / execute_time),
+            'load_time': round(min(measured['load_time'] for measured in runs), 6),
+            'startup_time': round(startup_time, 6), 'peak_memory': min(measured['peak_memory'] for measured in runs)}
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Compares results with a baseline.
+
+    :param results: Metrics by names of workloads
+    :param baseline: Metrics of the baseline by names of workloads
+    :param threshold: Allowed relative worsening of a metric, e.g. 0.1 for 10 %
+    :return: Descriptions of regressions
+    """
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        for metric, (direction, duration) in METRICS.items():
+            old, new = baseline[name][metric], metrics[metric]
+            if old <= 0 or duration is not None and baseline[name][duration] < NOISE_FLOOR:
+                continue
+            change = (new - old) / old
+            if change * direction < -threshold:
+                regressions.append('%s: %s %s -> %s (%+.1f %%)' % (name, metric, old, new, change * 100))
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Runs the benchmark suite of the interpret.')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier of sizes of workloads')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs of every workload')
+    parser.add_argument('--workload', action='append', choices=sorted(WORKLOADS),
+                        help='workload to run, all of them by default, can be repeated')
+    parser.add_argument('--output', type=str, help='file to save results as JSON')
+    parser.add_argument('--baseline', type=str, help='results of a previous run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed relative regression against the baseline, 0.1 by default')
+    parser.add_argument('--measure', type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure is not None:
+        measure_child(args.measure)
+        return
+
+    # startup of the interpret is measured on an empty program
+    with tempfile.NamedTemporaryFile('w', suffix='.xml', delete=False) as file:
+        file.write(programs.to_xml(''))
+    try:
+        startup_time = min(run([sys.executable, INTERPRET, '--source', file.name])[0]
+                           for _ in range(max(args.repeat, 3)))
+    finally:
+        os.unlink(file.name)
+    print('startup: %.1f ms' % (startup_time * 1e3))
+
+    results: Dict[str, dict] = {}
+    for workload in args.workload or list(WORKLOADS):
+        generator, sizes = WORKLOADS[workload]
+        for size in sizes:
+            size = max(1, int(size * args.scale))
+            name = '%s(%d)' % (workload, size)
+            results[name] = metrics = measure(generator(size), args.repeat, startup_time)
+            print('%s: %d instructions in %.3f s, %.0f instructions/s, load %.1f ms, peak memory %d KiB'
+                  % (name, metrics['instructions'], metrics['execute_time'], metrics['instructions_per_second'],
+                     metrics['load_time'] * 1e3, metrics['peak_memory']))
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({'python': platform.python_version(), 'scale': args.scale, 'results': results}, file, indent=2)
+            file.write('\n')
+
+    if args.baseline is not None:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print('regression: %s' % regression)
+        print('%d regressions against %s beyond %.0f %%' % (len(regressions), args.baseline, args.threshold * 100))
+        if regressions:
+            exit(1)
+
+
+if __name__ == '__main__':
+    main()
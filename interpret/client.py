@@ -0,0 +1,86 @@
+"""
+Client of server.py with the same arguments, output and exit code as interpret.py.
+
+The client imports only a few modules, which are needed to send the request, so its startup is much shorter than the
+startup of interpret.py. If the server is not running, interpret.py is executed instead. The server receives the
+whole standard input with the request, so when the program or its input is read from a terminal, interpret.py is
+executed as well and READ reads the lines interactively.
+
+Brno University of Technology
+Faculty of Information Technology
+
+Principles of Programming Languages
+
+Author: Šimon Vacek - xvacek10@stud.fit.vutbr.cz
+
+"""
+import json
+import os
+import socket
+import struct
+import sys
+
+INTERPRET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'interpret.py')
+
+# the same as Server.default_socket, server.py is not imported, because it imports the whole interpret
+SOCKET = os.environ.get('IPPCODE22_SOCKET', os.path.join('/tmp', 'ippcode22-%d.sock' % os.getuid()))
+
+
+def has_option(argv, option: str) -> bool:
+    """
+
+    :param argv: Arguments of the client
+    :param option: Long option, e.g. --input
+    :return: True, if the option is given
+    """
+    return any(arg == option or arg.startswith(option + '=') for arg in argv)
+
+
+def receive_exactly(connection: socket.socket, size: int) -> bytes:
+    """
+
+    :param connection: Connected socket
+    :param size: Number of bytes to receive
+    :return: Received bytes, fewer if the connection was closed before
+    """
+    chunks = []
+    while size > 0:
+        chunk = connection.recv(min(size, 1 << 20))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size = size - len(chunk)
+    return b''.join(chunks)
+
+
+def main() -> None:
+    argv = sys.argv[1:]
+    # the standard input holds the program or its input, unless both are given by options
+    source = has_option(argv, '--source') or has_option(argv, '--source-text')
+    reads_stdin = not (source and has_option(argv, '--input'))
+    if reads_stdin and sys.stdin.isatty():
+        os.execv(sys.executable, [sys.executable, INTERPRET] + argv)
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(SOCKET)
+    except OSError:
+        os.execv(sys.executable, [sys.executable, INTERPRET] + argv)
+
+    stdin = sys.stdin.read() if reads_stdin else None
+
+    data = json.dumps({'argv': argv, 'cwd': os.getcwd(), 'stdin': stdin}).encode('utf-8')
+    connection.sendall(struct.pack('>I', len(data)) + data)
+    header = receive_exactly(connection, 4)
+    if len(header) != 4:
+        sys.stderr.write('Server terminated without a response.\n')
+        exit(99)
+    response = json.loads(receive_exactly(connection, struct.unpack('>I', header)[0]).decode('utf-8'))
+    sys.stdout.buffer.write(response['stdout'].encode('utf-8'))
+    sys.stdout.flush()
+    sys.stderr.buffer.write(response['stderr'].encode('utf-8'))
+    sys.stderr.flush()
+    exit(response['code'])
+
+
+if __name__ == '__main__':
+    main()
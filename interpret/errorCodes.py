@@ -1,6 +1,13 @@
 """Contains variables with error codes to exit interpret with."""
+# exit() of the site module closes the standard input, sys.exit() is imported with error codes, so a program
+# terminated with an error code does not affect other programs run in the same process
+from sys import exit
+
 ERR_MISSING_ARG = 10
 ERR_READ_INPUT = 11
+ERR_HEADER = 21
+ERR_OPCODE = 22
+ERR_LEX_SYN = 23
 ERR_XML_FORMAT = 31
 ERR_XML_STRUC = 32
 ERR_SEMANTICS = 52
@@ -9,4 +16,5 @@ ERR_VARIABLE = 54
 ERR_FRAME = 55
 ERR_MISSING_VALUE = 56
 ERR_INVALID_OPERAND = 57
+ERR_STRING = 58
 ERR_INTERPRET = 69
@@ -9,22 +9,62 @@ Principles of Programming Languages
 Author: Šimon Vacek - xvacek10@stud.fit.vutbr.cz
 
 """
-import argparse
+from __future__ import annotations
+from array import array
+from itertools import repeat
+from time import perf_counter
 import os.path
 import sys
-from typing import Tuple, List
-import xml.etree.ElementTree as ET
+from types import SimpleNamespace
+import DataStack as DS
+import Element as El
+import Input as In
+import MutableString as Mut
 import Instruction as Ins
+import OperandTable as OpT
+import Output as Out
+import Program as Prog
+import Statistics as Stats
 import InstructionLabel as InsLa
 import Frame as Fr
 import Variable as Var
+import VariableRef as VarRef
 from errorCodes import *
 
+# modules needed only by some options (argparse, Compiler, Optimizer, TypeInference, ProgramCache, SourceParser and
+# Profiler) are imported where they are used and typing only by type checkers, so the startup does not pay for them
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import argparse
+    from typing import Callable, List, Optional, TextIO, Tuple
+    import Profiler as Prof
+
 
 class Interpret:
-    """Class contains methods regarding checking input files and xml parsing."""
-    __call_stack: List[int] = []
-    """Stack for storing instruction order when jump or call instructions are used"""
+    """Class contains methods regarding checking input files, xml parsing and handlers of executed instructions."""
+    __call_stack: array = array('l')
+    """Stack for storing program counter when jump or call instructions are used"""
+    data_stack: DS.DataStack = DS.DataStack()
+    """Stack of values used by PUSHS, POPS and stack variants of instructions"""
+    dispatch_table: List[Callable[[Ins.Instruction, int], int]] = []
+    """Handlers of instructions indexed by opcode id"""
+    input: In.Input = None
+    """Input of the interpreted program read by READ instruction"""
+    output: Out.Output = None
+    """Output of the interpreted program written by WRITE instruction"""
+    error_output: Out.Output = None
+    """Error output of the interpreted program written by DPRINT instruction"""
+
+    @classmethod
+    def swap_state(cls, state: tuple) -> tuple:
+        """Replaces the call stack, the data stack, the input and the outputs by those of another program.
+
+        :param state: Call stack, data stack, input, output and error output of the program
+        :return: Previous state in the same order
+        """
+        previous = cls.__call_stack, cls.data_stack, cls.input, cls.output, cls.error_output
+        cls.__call_stack, cls.data_stack, cls.input, cls.output, cls.error_output = state
+        return previous
 
     @classmethod
     def push_call_stack(cls, order: int) -> None:
@@ -72,209 +112,1487 @@ class Interpret:
         return False
 
     @staticmethod
-    def proc_args() -> Tuple[str, str]:
+    def proc_args() -> SimpleNamespace | argparse.Namespace:
         """Handles script arguments and retrieves source and input file.
 
         Source file contains the source code to be interpreted. Input file contains inputs, which the source code uses.
+        Optional cache directory holds already loaded programs.
+        Arguments made only of --source and --input are parsed without argparse, see parse_args_fast().
 
-        :return: Filenames of source and input file
+        :return: Arguments source, source_text, input, cache_dir, optimize, infer_types, optimize_report, compile,
+            compile_threshold, stats, profile and profile_metric
         """
-        parser = argparse.ArgumentParser(
-            description='Script loads XML representation of a program and interprets it and generates its output.')
-        parser.add_argument('--source', help='input file with XML representation of a source code', type=str,
-                            dest='source')
-        parser.add_argument('--input', help='file with inputs for the interpretation of a given source code', type=str,
-                            dest='input')
-        args = parser.parse_args()
+        args = Interpret.parse_args_fast(sys.argv[1:])
+        if args is None:
+            args = Interpret.parse_args()
+
+        if args.stats is not None and args.profile is not None:
+            sys.stderr.write('Options --stats and --profile cannot be combined.\n')
+            exit(ERR_MISSING_ARG)
 
-        if args.source is None and args.input is None:
+        if args.source is not None and args.source_text is not None:
+            sys.stderr.write('Options --source and --source-text cannot be combined.\n')
+            exit(ERR_MISSING_ARG)
+        if args.source is None and args.source_text is None and args.input is None:
             sys.stderr.write('At least one input file must be specified.\n')
             exit(ERR_MISSING_ARG)
 
-        if args.source is not None and not Interpret.is_file_ok(args.source):
-            sys.stderr.write('Source file either does not exist or is not readable.\n')
-            exit(ERR_READ_INPUT)
+        for source in (args.source, args.source_text):
+            if source is not None and not Interpret.is_file_ok(source):
+                sys.stderr.write('Source file either does not exist or is not readable.\n')
+                exit(ERR_READ_INPUT)
         if args.input is not None and not Interpret.is_file_ok(args.input):
             sys.stderr.write('Source file either does not exist or is not readable.\n')
             exit(ERR_READ_INPUT)
 
-        return args.source, args.input
+        return args
 
     @staticmethod
-    def get_sorted_xml(source: str) -> ET.ElementTree:
-        """Sorts and returns the source xml file by order attribute.
+    def parse_args_fast(argv: List[str]) -> Optional[SimpleNamespace]:
+        """Parses arguments made only of options --source and --input, which is how most programs are run.
 
-        At the same time, this method checks all the child elements in <program> whether they are all instructions and
-        are correctly put.
+        Importing argparse and building its parser takes longer than loading and running a small program. Any other
+        argument, a missing value or a value looking like an option is left to argparse, which also reports errors.
 
-        :param source: Filename of xml with source code
-        :return: Sorted representation of xml source code
+        :param argv: Arguments of the script
+        :return: Arguments with the same names and default values as those of parse_args(), or None if they have to be
+            parsed by argparse
         """
-        source = sys.stdin if source is None else source
+        values = {'source': None, 'input': None}
+        i = 0
+        while i < len(argv):
+            option, separator, value = argv[i].partition('=')
+            if option not in ('--source', '--input'):
+                return None
+            if not separator:
+                i = i + 1
+                if i == len(argv) or argv[i].startswith('-'):
+                    return None
+                value = argv[i]
+            values[option[2:]] = value
+            i = i + 1
+        # compile_threshold is used only together with --compile
+        return SimpleNamespace(source=values['source'], source_text=None, input=values['input'], cache_dir=None,
+                               optimize=False, infer_types=False, optimize_report=False, compile=False,
+                               compile_threshold=None, stats=None, profile=None, profile_metric='time')
+
+    @staticmethod
+    def parse_args() -> argparse.Namespace:
+        """Parses all arguments of the script by argparse.
+
+        :return: Arguments, see proc_args()
+        """
+        import argparse
+        import Compiler as Comp
+        parser = argparse.ArgumentParser(
+            description='Script loads XML representation of a program and interprets it and generates its output.')
+        parser.add_argument('--source', help='input file with XML representation of a source code', type=str,
+                            dest='source')
+        parser.add_argument('--source-text', help='input file with IPPcode22 source code, which is parsed directly '
+                            'instead of its XML representation', type=str, dest='source_text')
+        parser.add_argument('--input', help='file with inputs for the interpretation of a given source code', type=str,
+                            dest='input')
+        parser.add_argument('--cache-dir', help='directory for caching loaded programs, the source must be a file',
+                            type=str, dest='cache_dir')
+        parser.add_argument('--optimize', help='optimize the program before it is executed', action='store_true',
+                            dest='optimize')
+        parser.add_argument('--infer-types', help='replace instructions by variants without runtime checks, where types '
+                            'of operands are proven', action='store_true', dest='infer_types')
+        parser.add_argument('--optimize-report', help='write a summary of optimizations to the standard error output',
+                            action='store_true', dest='optimize_report')
+        parser.add_argument('--compile', help='compile basic blocks of the program into Python functions',
+                            action='store_true', dest='compile')
+        parser.add_argument('--compile-threshold', help='number of executions of a block before it is compiled',
+                            type=int, default=Comp.Compiler.hot_threshold, dest='compile_threshold')
+        parser.add_argument('--stats', help='write counts and times of executed instructions and durations of phases '
+                            'as JSON to a file, the program is only interpreted', type=str, dest='stats')
+        parser.add_argument('--profile', help='write collapsed call stacks of labels for flame graphs to a file, the '
+                            'program is only interpreted', type=str, dest='profile')
+        parser.add_argument('--profile-metric', help='value of collapsed call stacks', choices=('time', 'instructions'),
+                            default='time', dest='profile_metric')
+        return parser.parse_args()
+
+    @staticmethod
+    def load_program(source: str) -> Prog.Program:
+        """Loads the source xml file into a program in a single pass.
+
+        The file is parsed as a stream by expat (see Element.iterparse()). Every <instruction> element is checked,
+        validated and decoded into a single Instruction record as soon as it is read, and the element is then dropped,
+        so the whole XML tree is never held in memory. Records are then turned into the Program, see Program.build().
+
+        :param source: Filename of xml with source code, or None for the standard input
+        :return: Program with instructions indexed by program counter
+        """
+        source = sys.stdin.buffer if source is None else source
+        operands = OpT.OperandTable()
+        records: List[Ins.Instruction] = []
+        root = None
 
         try:
-            tree = ET.parse(source)
-        except ET.ParseError:
+            for element in El.Element.iterparse(source):
+                if root is None:
+                    root = element
+                    if root.tag != 'program' or 'language' not in root.attrib.keys() \
+                            or 'IPPcode22' not in root.attrib.values():
+                        sys.stderr.write('Source code does not have the root <program language="IPPcode22"> element.\n')
+                        exit(ERR_XML_STRUC)
+                    continue
+
+                Ins.Instruction.is_instruction_valid(element)
+                opcode = element.get('opcode').upper()
+                if opcode == 'LABEL':
+                    InsLa.InstructionLabel.check_instruction(element)
+                    instruction = Ins.Instruction(opcode, (element.find('arg1').text,), int(element.get('order')))
+                else:
+                    instruction = Ins.Instruction(opcode, list(element), int(element.get('order')))
+                    instruction.validate()
+                    instruction.decode(operands)
+                records.append(instruction)
+        except El.ParseError:
             sys.stderr.write('Source code xml file is not well-formed.\n')
             exit(ERR_XML_FORMAT)
 
-        root = tree.getroot()
-        if root.tag != 'program' or 'language' not in root.attrib.keys() or 'IPPcode22' not in root.attrib.values():
-            sys.stderr.write('Source code does not have the root <program language="IPPcode22"> element.\n')
-            exit()
+        return Prog.Program.build(records, operands)
+
+    @staticmethod
+    def load_source_text(source: str) -> Prog.Program:
+        """Loads the IPPcode22 source code into a program without its XML representation, see SourceParser.
+
+        :param source: Filename of the source code, or None for the standard input
+        :return: Program with instructions indexed by program counter
+        """
+        import SourceParser as Src
+        operands = OpT.OperandTable()
+        if source is None:
+            return Prog.Program.build(Src.SourceParser.parse(sys.stdin, operands), operands)
+        with open(source, encoding='utf-8') as file:
+            return Prog.Program.build(Src.SourceParser.parse(file, operands), operands)
+
+    @staticmethod
+    def load_source(args: SimpleNamespace | argparse.Namespace) -> Prog.Program:
+        """Loads the program given by --source or --source-text, or its XML representation from the standard input.
+
+        With --cache-dir, a program of a source file is taken from the cache, or stored there once it is loaded.
+
+        :param args: Arguments returned by proc_args()
+        :return: Program with instructions indexed by program counter
+        """
+        if args.source_text is not None:
+            source, kind, load = args.source_text, 'text', Interpret.load_source_text
+        else:
+            source, kind, load = args.source, 'xml', Interpret.load_program
+        if args.cache_dir is None or source is None:
+            return load(source)
+        import ProgramCache as Cache
+        cache = Cache.ProgramCache(args.cache_dir, source, kind)
+        loaded = cache.load()
+        if loaded is None:
+            loaded = load(source)
+            cache.store(loaded)
+        return loaded
+
+    @staticmethod
+    def main(args: SimpleNamespace | argparse.Namespace) -> int:
+        """Loads, optionally optimizes and runs the program given by arguments of the script.
+
+        Statistics and the profile are written also when the program fails to load.
+
+        :param args: Arguments returned by proc_args()
+        :return: Exit code of the program
+        """
+        stats = Stats.Statistics()
+        profiler = None
+        program_input = None
+        try:
+            stats.begin_phase('load')
+            loaded = Interpret.load_source(args)
+            if args.optimize:
+                import Optimizer as Opt
+                stats.begin_phase('optimize')
+                optimizer = Opt.Optimizer(Interpret.dispatch_table)
+                loaded = optimizer.optimize(loaded)
+                if args.optimize_report:
+                    sys.stderr.write(optimizer.report())
+            if args.infer_types:
+                import TypeInference as TI
+                stats.begin_phase('infer_types')
+                inference = TI.TypeInference(Interpret.dispatch_table)
+                loaded = inference.specialize(loaded)
+                if args.optimize_report:
+                    sys.stderr.write(inference.report())
+            stats.begin_phase('execute')
+            program_input = sys.stdin if args.input is None else open(args.input, encoding='utf-8')
+            compile_threshold = args.compile_threshold if args.compile else None
+            if args.profile is not None:
+                import Profiler as Prof
+                profiler = Prof.Profiler(loaded)
+            stats.exit_code = VM(loaded, program_input, sys.stdout, compile_threshold=compile_threshold,
+                                 stats=None if args.stats is None else stats, profiler=profiler).run()
+        except SystemExit as termination:
+            # the program failed to load
+            stats.exit_code = termination.code
+            raise
+        finally:
+            if program_input is not None and program_input is not sys.stdin:
+                program_input.close()
+            stats.end_phase()
+            if args.stats is not None:
+                stats.write(args.stats)
+            if profiler is not None:
+                profiler.write(args.profile, args.profile_metric)
+                sys.stderr.write(profiler.report())
+        return stats.exit_code
+
+    @staticmethod
+    def get_variable(ref: VarRef.VariableRef) -> Var.Variable:
+        """Finds a variable in its frame. If the variable is not defined, interpret is terminated.
+
+        :param ref: Reference to the variable
+        :return: Variable from the frame
+        """
+        var = Fr.Frame.frame_for_name(ref.frame).find_variable(ref.slot)
+        if var is None:
+            sys.stderr.write('Variable %s does not exist.\n' % ref)
+            exit(ERR_VARIABLE)
+        return var
+
+    @staticmethod
+    def get_symb(symb) -> Var.Variable:
+        """Retrieves value of a symbol operand, which is either a constant or an initialized variable.
+
+        :param symb: Constant or a reference to a variable
+        :return: Constant or variable holding the value of the symbol
+        """
+        if isinstance(symb, VarRef.VariableRef):
+            var = Interpret.get_variable(symb)
+            if var.typ is None:
+                sys.stderr.write('Variable %s is not initialized.\n' % symb)
+                exit(ERR_MISSING_VALUE)
+            return var
+        return symb
+
+    @staticmethod
+    def get_int_operands(instruction: Ins.Instruction) -> Tuple[Var.Variable, int, int]:
+        """Retrieves the target variable and values of integer operands of an arithmetic instruction.
+
+        :param instruction: Instruction with arguments var, symb, symb
+        :return: Target variable and values of both operands
+        """
+        ref = instruction.args[0]
+        var = Fr.Frame.frame_for_name(ref.frame).find_variable(ref.slot)
+        if var is None:
+            sys.stderr.write('Variable does not exist\n')
+            exit(ERR_VARIABLE)
+        a = Interpret.get_symb(instruction.args[1])
+        b = Interpret.get_symb(instruction.args[2])
+        if a.typ != 'int' or b.typ != 'int':
+            sys.stderr.write('Operands must be type int\n')
+            exit(ERR_OPERAND)
+        return var, a.value, b.value
+
+    @staticmethod
+    def get_bool_operands(instruction: Ins.Instruction) -> Tuple[Var.Variable, bool, bool]:
+        """Retrieves the target variable and values of boolean operands of a logical instruction.
+
+        :param instruction: Instruction with arguments var, symb, symb
+        :return: Target variable and values of both operands
+        """
+        var = Interpret.get_variable(instruction.args[0])
+        a = Interpret.get_symb(instruction.args[1])
+        b = Interpret.get_symb(instruction.args[2])
+        if a.typ != 'bool' or b.typ != 'bool':
+            sys.stderr.write('Operands of %s must be type bool\n' % instruction.opcode)
+            exit(ERR_OPERAND)
+        return var, a.value, b.value
+
+    @staticmethod
+    def get_comparable_operands(instruction: Ins.Instruction, nil_allowed: bool) -> Tuple[Var.Variable, Var.Variable]:
+        """Retrieves the second and third operand of a relational instruction and checks, they can be compared.
+
+        Operands must be of the same type. Type nil can be compared only for equality, with an operand of any type.
+
+        :param instruction: Instruction with arguments var (or label), symb, symb
+        :param nil_allowed: True, if nil can be one of the operands
+        :return: Both operands
+        """
+        a = Interpret.get_symb(instruction.args[1])
+        b = Interpret.get_symb(instruction.args[2])
+        if nil_allowed and (a.typ == 'nil' or b.typ == 'nil'):
+            return a, b
+        if a.typ != b.typ or a.typ == 'nil':
+            sys.stderr.write('Operands of %s cannot be compared: %s and %s\n' % (instruction.opcode, a.typ, b.typ))
+            exit(ERR_OPERAND)
+        return a, b
+
+    @staticmethod
+    def exec_nop(instruction: Ins.Instruction, pc: int) -> int:
+        """Handler of opcodes, which are not executed by the interpret.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        return pc
+
+    @staticmethod
+    def exec_createframe(instruction: Ins.Instruction, pc: int) -> int:
+        """Creates a new temporary frame.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        Fr.Frame.create_frame()
+        return pc
+
+    @staticmethod
+    def exec_pushframe(instruction: Ins.Instruction, pc: int) -> int:
+        """Pushes the temporary frame to the frame stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        Fr.Frame.push_frame()
+        return pc
+
+    @staticmethod
+    def exec_popframe(instruction: Ins.Instruction, pc: int) -> int:
+        """Pops the local frame from the frame stack into the temporary frame.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        Fr.Frame.pop_frame()
+        return pc
+
+    @staticmethod
+    def exec_defvar(instruction: Ins.Instruction, pc: int) -> int:
+        """Defines a variable in a frame.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        ref = instruction.args[0]
+        Fr.Frame.frame_for_name(ref.frame).add_variable(ref.slot, Var.Variable(ref.name))
+        return pc
+
+    @staticmethod
+    def exec_move(instruction: Ins.Instruction, pc: int) -> int:
+        """Assigns a value of a symbol to a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        ref = instruction.args[0]
+        var = Fr.Frame.frame_for_name(ref.frame).find_variable(ref.slot)
+        if var is None:
+            sys.stderr.write('There is no variable %s.\n' % ref)
+            exit(ERR_VARIABLE)
+        value = Interpret.get_symb(instruction.args[1])
+        # a mutable string stays owned by its variable, the target gets a copy
+        var.value = str(value.value) if type(value.value) is Mut.MutableString else value.value
+        var.typ = value.typ
+        return pc
+
+    @staticmethod
+    def exec_call(instruction: Ins.Instruction, pc: int) -> int:
+        """Saves the program counter of the following instruction on the call stack and jumps to a label.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        Interpret.push_call_stack(pc)
+        return instruction.args[0]
+
+    @staticmethod
+    def exec_return(instruction: Ins.Instruction, pc: int) -> int:
+        """Jumps to the program counter on top of the call stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        if Interpret.is_empty_call_stack():
+            sys.stderr.write('Cannot return - call stack is empty.\n')
+            exit(ERR_MISSING_VALUE)
+        return Interpret.pop_call_stack()
+
+    @staticmethod
+    def exec_write(instruction: Ins.Instruction, pc: int) -> int:
+        """Writes a value of a symbol to the standard output.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        arg = instruction.args[0]
+        if isinstance(arg, VarRef.VariableRef):
+            var = Fr.Frame.frame_for_name(arg.frame).find_variable(arg.slot)
+
+            if var is None:
+                sys.stderr.write('Cannot WRITE variable: %s. It does not exist.\n' % arg)
+                exit(ERR_VARIABLE)
+            if not var.is_init():
+                sys.stderr.write('Cannot WRITE variable: %s. It is not initialized.\n' % arg)
+                exit(ERR_MISSING_VALUE)
+            arg = var
+        Interpret.output.write(str(arg))
+        return pc
+
+    @staticmethod
+    def exec_read(instruction: Ins.Instruction, pc: int) -> int:
+        """Reads a value of a given type from the input into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var = Interpret.get_variable(instruction.args[0])
+        value = Interpret.input.read_value(instruction.args[1])
+        var.value = value.value
+        var.typ = value.typ
+        return pc
+
+    @staticmethod
+    def exec_dprint(instruction: Ins.Instruction, pc: int) -> int:
+        """Writes a value of a symbol to the standard error output.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        Interpret.error_output.write(str(Interpret.get_symb(instruction.args[0])))
+        return pc
+
+    @staticmethod
+    def exec_exit(instruction: Ins.Instruction, pc: int) -> int:
+        """Terminates the program with an exit code in range 0-49.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        code = Interpret.get_symb(instruction.args[0])
+        if code.typ != 'int':
+            sys.stderr.write('EXIT must have an operand of type int, not: %s\n' % code.typ)
+            exit(ERR_OPERAND)
+        if not 0 <= code.value <= 49:
+            sys.stderr.write('Exit code must be in range 0-49, not: %d\n' % code.value)
+            exit(ERR_INVALID_OPERAND)
+        exit(code.value)
+
+    @staticmethod
+    def exec_add(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores a sum of two integers into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var, a, b = Interpret.get_int_operands(instruction)
+        var.value = a + b
+        var.typ = 'int'
+        return pc
+
+    @staticmethod
+    def exec_sub(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores a difference of two integers into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var, a, b = Interpret.get_int_operands(instruction)
+        var.value = a - b
+        var.typ = 'int'
+        return pc
+
+    @staticmethod
+    def exec_mul(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores a product of two integers into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var, a, b = Interpret.get_int_operands(instruction)
+        var.value = a * b
+        var.typ = 'int'
+        return pc
+
+    @staticmethod
+    def exec_idiv(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores an integer quotient of two integers into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var, a, b = Interpret.get_int_operands(instruction)
+        if b == 0:
+            sys.stderr.write('Cannot divide by zero.\n')
+            exit(ERR_INVALID_OPERAND)
+        var.value = a // b
+        var.typ = 'int'
+        return pc
+
+    @staticmethod
+    def exec_lt(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores result of the comparison lower than into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var = Interpret.get_variable(instruction.args[0])
+        a, b = Interpret.get_comparable_operands(instruction, False)
+        var.value = a.value < b.value
+        var.typ = 'bool'
+        return pc
+
+    @staticmethod
+    def exec_gt(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores result of the comparison greater than into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var = Interpret.get_variable(instruction.args[0])
+        a, b = Interpret.get_comparable_operands(instruction, False)
+        var.value = a.value > b.value
+        var.typ = 'bool'
+        return pc
+
+    @staticmethod
+    def exec_eq(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores result of the comparison equal into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var = Interpret.get_variable(instruction.args[0])
+        a, b = Interpret.get_comparable_operands(instruction, True)
+        var.value = a.typ == b.typ and a.value == b.value
+        var.typ = 'bool'
+        return pc
+
+    @staticmethod
+    def exec_and(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores logical conjunction of two booleans into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var, a, b = Interpret.get_bool_operands(instruction)
+        var.value = a and b
+        var.typ = 'bool'
+        return pc
+
+    @staticmethod
+    def exec_or(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores logical disjunction of two booleans into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var, a, b = Interpret.get_bool_operands(instruction)
+        var.value = a or b
+        var.typ = 'bool'
+        return pc
+
+    @staticmethod
+    def exec_not(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores logical negation of a boolean into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var = Interpret.get_variable(instruction.args[0])
+        a = Interpret.get_symb(instruction.args[1])
+        if a.typ != 'bool':
+            sys.stderr.write('Operand of %s must be type bool\n' % instruction.opcode)
+            exit(ERR_OPERAND)
+        var.value = not a.value
+        var.typ = 'bool'
+        return pc
+
+    @staticmethod
+    def exec_type(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores name of the type of a symbol into a variable.
+
+        Type of an uninitialized variable is an empty string.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var = Interpret.get_variable(instruction.args[0])
+        symb = instruction.args[1]
+        if isinstance(symb, VarRef.VariableRef):
+            symb = Interpret.get_variable(symb)
+        var.value = '' if symb.typ is None else symb.typ
+        var.typ = 'string'
+        return pc
+
+    @staticmethod
+    def get_string_operands(instruction: Ins.Instruction, first: str, second: str) -> Tuple[Var.Variable, Var.Variable,
+                                                                                           Var.Variable]:
+        """Retrieves the target variable and both operands of a string instruction and checks their types.
+
+        :param instruction: Instruction with arguments var, symb, symb
+        :param first: Required type of the first operand
+        :param second: Required type of the second operand
+        :return: Target variable and both operands
+        """
+        var = Interpret.get_variable(instruction.args[0])
+        a = Interpret.get_symb(instruction.args[1])
+        b = Interpret.get_symb(instruction.args[2])
+        if a.typ != first or b.typ != second:
+            sys.stderr.write('Operands of %s must be type %s and %s, not: %s and %s\n'
+                             % (instruction.opcode, first, second, a.typ, b.typ))
+            exit(ERR_OPERAND)
+        return var, a, b
+
+    @staticmethod
+    def check_index(instruction: Ins.Instruction, string, index: int) -> None:
+        """Checks, that an index points to a character of a string. If it does not, interpret is terminated.
+
+        :param instruction: Instruction indexing the string
+        :param string: Native value of a string
+        :param index: Index of a character
+        :return: None
+        """
+        if not 0 <= index < len(string):
+            sys.stderr.write('%s: index %d is out of range of a string of length %d\n'
+                             % (instruction.opcode, index, len(string)))
+            exit(ERR_STRING)
+
+    @staticmethod
+    def exec_int2char(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores a character with a given Unicode code point into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var = Interpret.get_variable(instruction.args[0])
+        code = Interpret.get_symb(instruction.args[1])
+        if code.typ != 'int':
+            sys.stderr.write('INT2CHAR must have an operand of type int, not: %s\n' % code.typ)
+            exit(ERR_OPERAND)
+        if not 0 <= code.value <= sys.maxunicode:
+            sys.stderr.write('INT2CHAR: %d is not a valid Unicode code point\n' % code.value)
+            exit(ERR_STRING)
+        var.value = chr(code.value)
+        var.typ = 'string'
+        return pc
+
+    @staticmethod
+    def exec_stri2int(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores the Unicode code point of a character of a string at a given index into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var, string, index = Interpret.get_string_operands(instruction, 'string', 'int')
+        Interpret.check_index(instruction, string.value, index.value)
+        var.value = ord(string.value[index.value])
+        var.typ = 'int'
+        return pc
+
+    @staticmethod
+    def exec_concat(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores concatenation of two strings into a variable.
+
+        Concatenation to the end of the target variable itself appends to its mutable string in place.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var, a, b = Interpret.get_string_operands(instruction, 'string', 'string')
+        if var is a:
+            if type(var.value) is not Mut.MutableString:
+                var.value = Mut.MutableString(var.value)
+            var.value.append(b.value)
+        else:
+            var.value = str(a.value) + str(b.value)
+            var.typ = 'string'
+        return pc
+
+    @staticmethod
+    def exec_strlen(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores length of a string into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var = Interpret.get_variable(instruction.args[0])
+        string = Interpret.get_symb(instruction.args[1])
+        if string.typ != 'string':
+            sys.stderr.write('STRLEN must have an operand of type string, not: %s\n' % string.typ)
+            exit(ERR_OPERAND)
+        var.value = len(string.value)
+        var.typ = 'int'
+        return pc
+
+    @staticmethod
+    def exec_getchar(instruction: Ins.Instruction, pc: int) -> int:
+        """Stores a character of a string at a given index into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var, string, index = Interpret.get_string_operands(instruction, 'string', 'int')
+        Interpret.check_index(instruction, string.value, index.value)
+        var.value = string.value[index.value]
+        var.typ = 'string'
+        return pc
 
-        # sort by order
-        root = tree.getroot()
-        for instruction in root.findall('./'):
-            Ins.Instruction.is_instruction_valid(instruction)
-        root[:] = sorted(root, key=lambda child: int(child.get('order')))
-        return tree
+    @staticmethod
+    def exec_setchar(instruction: Ins.Instruction, pc: int) -> int:
+        """Replaces a character of a string in a variable at a given index by the first character of a string.
+
+        The string of the variable is replaced in place, after it is converted to a mutable string once.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var, index, char = Interpret.get_string_operands(instruction, 'int', 'string')
+        if var.typ is None:
+            sys.stderr.write('Variable %s is not initialized.\n' % instruction.args[0])
+            exit(ERR_MISSING_VALUE)
+        if var.typ != 'string':
+            sys.stderr.write('SETCHAR must have a target variable of type string, not: %s\n' % var.typ)
+            exit(ERR_OPERAND)
+        Interpret.check_index(instruction, var.value, index.value)
+        if len(char.value) == 0:
+            sys.stderr.write('SETCHAR: cannot set a character from an empty string\n')
+            exit(ERR_STRING)
+        if type(var.value) is not Mut.MutableString:
+            var.value = Mut.MutableString(var.value)
+        var.value[index.value] = char.value[0]
+        return pc
 
     @staticmethod
-    def get_labels(tree: ET.ElementTree) -> None:
-        """Saves all labels inside InstructionLabel dict, checks their syntax and removes them from the xml representation.
+    def exec_jump(instruction: Ins.Instruction, pc: int) -> int:
+        """Jumps to a label.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        return instruction.args[0]
+
+    @staticmethod
+    def exec_jumpifeq(instruction: Ins.Instruction, pc: int) -> int:
+        """Jumps to a label if two symbols are equal.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        a, b = Interpret.get_comparable_operands(instruction, True)
+        if a.typ == b.typ and a.value == b.value:
+            return instruction.args[0]
+        return pc
+
+    @staticmethod
+    def exec_jumpifneq(instruction: Ins.Instruction, pc: int) -> int:
+        """Jumps to a label if two symbols are not equal.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        a, b = Interpret.get_comparable_operands(instruction, True)
+        if a.typ == b.typ and a.value == b.value:
+            return pc
+        return instruction.args[0]
+
+    @staticmethod
+    def exec_pushs(instruction: Ins.Instruction, pc: int) -> int:
+        """Pushes a value of a symbol to the data stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        symb = Interpret.get_symb(instruction.args[0])
+        # a mutable string stays owned by its variable, the stack gets a copy
+        Interpret.data_stack.push(symb.typ, Mut.MutableString.frozen(symb.value))
+        return pc
+
+    @staticmethod
+    def exec_pops(instruction: Ins.Instruction, pc: int) -> int:
+        """Pops a value from the data stack into a variable.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        var = Interpret.get_variable(instruction.args[0])
+        var.typ, var.value = Interpret.data_stack.pop(instruction)
+        return pc
+
+    @staticmethod
+    def exec_clears(instruction: Ins.Instruction, pc: int) -> int:
+        """Removes all values from the data stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        Interpret.data_stack.clear()
+        return pc
+
+    @staticmethod
+    def get_stack_operands(instruction: Ins.Instruction, typ: str) -> Tuple[object, object]:
+        """Pops two operands of a given type of a stack instruction from the data stack.
+
+        :param instruction: Stack instruction
+        :param typ: Required type of both operands
+        :return: Values of the first and the second operand
+        """
+        a_typ, a, b_typ, b = Interpret.data_stack.pop_pair(instruction)
+        if a_typ != typ or b_typ != typ:
+            sys.stderr.write('Operands of %s must be type %s\n' % (instruction.opcode, typ))
+            exit(ERR_OPERAND)
+        return a, b
+
+    @staticmethod
+    def get_comparable_stack_operands(instruction: Ins.Instruction, nil_allowed: bool) -> Tuple[str, object, str, object]:
+        """Pops two operands of a stack relational instruction from the data stack and checks, they can be compared.
+
+        Operands must be of the same type. Type nil can be compared only for equality, with an operand of any type.
+
+        :param instruction: Stack instruction
+        :param nil_allowed: True, if nil can be one of the operands
+        :return: Type and value of the first operand and type and value of the second operand
+        """
+        operands = Interpret.data_stack.pop_pair(instruction)
+        a_typ, a, b_typ, b = operands
+        if nil_allowed and (a_typ == 'nil' or b_typ == 'nil'):
+            return operands
+        if a_typ != b_typ or a_typ == 'nil':
+            sys.stderr.write('Operands of %s cannot be compared: %s and %s\n' % (instruction.opcode, a_typ, b_typ))
+            exit(ERR_OPERAND)
+        return operands
+
+    @staticmethod
+    def exec_adds(instruction: Ins.Instruction, pc: int) -> int:
+        """Pushes a sum of two integers from the data stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        a, b = Interpret.get_stack_operands(instruction, 'int')
+        Interpret.data_stack.push('int', a + b)
+        return pc
+
+    @staticmethod
+    def exec_subs(instruction: Ins.Instruction, pc: int) -> int:
+        """Pushes a difference of two integers from the data stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        a, b = Interpret.get_stack_operands(instruction, 'int')
+        Interpret.data_stack.push('int', a - b)
+        return pc
+
+    @staticmethod
+    def exec_muls(instruction: Ins.Instruction, pc: int) -> int:
+        """Pushes a product of two integers from the data stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        a, b = Interpret.get_stack_operands(instruction, 'int')
+        Interpret.data_stack.push('int', a * b)
+        return pc
+
+    @staticmethod
+    def exec_idivs(instruction: Ins.Instruction, pc: int) -> int:
+        """Pushes an integer quotient of two integers from the data stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        a, b = Interpret.get_stack_operands(instruction, 'int')
+        if b == 0:
+            sys.stderr.write('Cannot divide by zero.\n')
+            exit(ERR_INVALID_OPERAND)
+        Interpret.data_stack.push('int', a // b)
+        return pc
+
+    @staticmethod
+    def exec_lts(instruction: Ins.Instruction, pc: int) -> int:
+        """Pushes result of the comparison lower than of two values from the data stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        a_typ, a, b_typ, b = Interpret.get_comparable_stack_operands(instruction, False)
+        Interpret.data_stack.push('bool', a < b)
+        return pc
+
+    @staticmethod
+    def exec_gts(instruction: Ins.Instruction, pc: int) -> int:
+        """Pushes result of the comparison greater than of two values from the data stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        a_typ, a, b_typ, b = Interpret.get_comparable_stack_operands(instruction, False)
+        Interpret.data_stack.push('bool', a > b)
+        return pc
+
+    @staticmethod
+    def exec_eqs(instruction: Ins.Instruction, pc: int) -> int:
+        """Pushes result of the comparison equal of two values from the data stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        a_typ, a, b_typ, b = Interpret.get_comparable_stack_operands(instruction, True)
+        Interpret.data_stack.push('bool', a_typ == b_typ and a == b)
+        return pc
+
+    @staticmethod
+    def exec_ands(instruction: Ins.Instruction, pc: int) -> int:
+        """Pushes logical conjunction of two booleans from the data stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        a, b = Interpret.get_stack_operands(instruction, 'bool')
+        Interpret.data_stack.push('bool', a and b)
+        return pc
+
+    @staticmethod
+    def exec_ors(instruction: Ins.Instruction, pc: int) -> int:
+        """Pushes logical disjunction of two booleans from the data stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        a, b = Interpret.get_stack_operands(instruction, 'bool')
+        Interpret.data_stack.push('bool', a or b)
+        return pc
+
+    @staticmethod
+    def exec_nots(instruction: Ins.Instruction, pc: int) -> int:
+        """Pushes logical negation of a boolean from the data stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        typ, a = Interpret.data_stack.pop(instruction)
+        if typ != 'bool':
+            sys.stderr.write('Operand of %s must be type bool\n' % instruction.opcode)
+            exit(ERR_OPERAND)
+        Interpret.data_stack.push('bool', not a)
+        return pc
+
+    @staticmethod
+    def exec_int2chars(instruction: Ins.Instruction, pc: int) -> int:
+        """Pushes a character with a Unicode code point from the data stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        typ, code = Interpret.data_stack.pop(instruction)
+        if typ != 'int':
+            sys.stderr.write('INT2CHARS must have an operand of type int, not: %s\n' % typ)
+            exit(ERR_OPERAND)
+        if not 0 <= code <= sys.maxunicode:
+            sys.stderr.write('INT2CHARS: %d is not a valid Unicode code point\n' % code)
+            exit(ERR_STRING)
+        Interpret.data_stack.push('string', chr(code))
+        return pc
+
+    @staticmethod
+    def exec_stri2ints(instruction: Ins.Instruction, pc: int) -> int:
+        """Pushes the Unicode code point of a character of a string at an index, both from the data stack.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        string_typ, string, index_typ, index = Interpret.data_stack.pop_pair(instruction)
+        if string_typ != 'string' or index_typ != 'int':
+            sys.stderr.write('STRI2INTS must have operands of types string and int, not: %s and %s\n'
+                             % (string_typ, index_typ))
+            exit(ERR_OPERAND)
+        Interpret.check_index(instruction, string, index)
+        Interpret.data_stack.push('int', ord(string[index]))
+        return pc
+
+    @staticmethod
+    def exec_jumpifeqs(instruction: Ins.Instruction, pc: int) -> int:
+        """Jumps to a label if two values from the data stack are equal.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        a_typ, a, b_typ, b = Interpret.get_comparable_stack_operands(instruction, True)
+        if a_typ == b_typ and a == b:
+            return instruction.args[0]
+        return pc
+
+    @staticmethod
+    def exec_jumpifneqs(instruction: Ins.Instruction, pc: int) -> int:
+        """Jumps to a label if two values from the data stack are not equal.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        a_typ, a, b_typ, b = Interpret.get_comparable_stack_operands(instruction, True)
+        if a_typ == b_typ and a == b:
+            return pc
+        return instruction.args[0]
+
+    @staticmethod
+    def exec_fused(instruction: Ins.Instruction, pc: int) -> int:
+        """Executes a superinstruction made of two instructions by the optimizer.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        first_handler, first, second_handler, second = instruction.args
+        first_handler(first, pc)
+        return second_handler(second, pc)
+
+    @staticmethod
+    def symb_value(symb):
+        """Retrieves value of a symbol operand, which is proven to be a constant or an initialized variable.
+
+        :param symb: Constant or a reference to a variable
+        :return: Native value of the symbol
+        """
+        if isinstance(symb, VarRef.VariableRef):
+            return Fr.Frame.frame_for_name(symb.frame).find_variable(symb.slot).value
+        return symb.value
+
+    @staticmethod
+    def symb_unchecked(symb) -> Var.Variable:
+        """Retrieves a symbol operand, which is proven to be a constant or an initialized variable.
+
+        :param symb: Constant or a reference to a variable
+        :return: Constant or variable holding the value of the symbol
+        """
+        if isinstance(symb, VarRef.VariableRef):
+            return Fr.Frame.frame_for_name(symb.frame).find_variable(symb.slot)
+        return symb
+
+    @staticmethod
+    def exec_move_unchecked(instruction: Ins.Instruction, pc: int) -> int:
+        """MOVE of an initialized symbol into an existing variable, proven by the type inference.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        ref, symb = instruction.args
+        var = Fr.Frame.frame_for_name(ref.frame).find_variable(ref.slot)
+        value = Interpret.symb_unchecked(symb)
+        var.value = str(value.value) if type(value.value) is Mut.MutableString else value.value
+        var.typ = value.typ
+        return pc
+
+    @staticmethod
+    def exec_write_unchecked(instruction: Ins.Instruction, pc: int) -> int:
+        """WRITE of a symbol proven to be initialized by the type inference.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        Interpret.output.write(str(Interpret.symb_unchecked(instruction.args[0])))
+        return pc
+
+    @staticmethod
+    def exec_add_unchecked(instruction: Ins.Instruction, pc: int) -> int:
+        """ADD of operands proven to be integers by the type inference.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        ref, a, b = instruction.args
+        var = Fr.Frame.frame_for_name(ref.frame).find_variable(ref.slot)
+        var.value = Interpret.symb_value(a) + Interpret.symb_value(b)
+        var.typ = 'int'
+        return pc
+
+    @staticmethod
+    def exec_sub_unchecked(instruction: Ins.Instruction, pc: int) -> int:
+        """SUB of operands proven to be integers by the type inference.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        ref, a, b = instruction.args
+        var = Fr.Frame.frame_for_name(ref.frame).find_variable(ref.slot)
+        var.value = Interpret.symb_value(a) - Interpret.symb_value(b)
+        var.typ = 'int'
+        return pc
+
+    @staticmethod
+    def exec_mul_unchecked(instruction: Ins.Instruction, pc: int) -> int:
+        """MUL of operands proven to be integers by the type inference.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        ref, a, b = instruction.args
+        var = Fr.Frame.frame_for_name(ref.frame).find_variable(ref.slot)
+        var.value = Interpret.symb_value(a) * Interpret.symb_value(b)
+        var.typ = 'int'
+        return pc
+
+    @staticmethod
+    def exec_idiv_unchecked(instruction: Ins.Instruction, pc: int) -> int:
+        """IDIV of operands proven to be integers by the type inference. Division by zero is still checked.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        ref, a, b = instruction.args
+        var = Fr.Frame.frame_for_name(ref.frame).find_variable(ref.slot)
+        divisor = Interpret.symb_value(b)
+        if divisor == 0:
+            sys.stderr.write('Cannot divide by zero.\n')
+            exit(ERR_INVALID_OPERAND)
+        var.value = Interpret.symb_value(a) // divisor
+        var.typ = 'int'
+        return pc
+
+    @staticmethod
+    def exec_lt_unchecked(instruction: Ins.Instruction, pc: int) -> int:
+        """LT of operands proven to be comparable by the type inference.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        ref, a, b = instruction.args
+        var = Fr.Frame.frame_for_name(ref.frame).find_variable(ref.slot)
+        var.value = Interpret.symb_value(a) < Interpret.symb_value(b)
+        var.typ = 'bool'
+        return pc
+
+    @staticmethod
+    def exec_gt_unchecked(instruction: Ins.Instruction, pc: int) -> int:
+        """GT of operands proven to be comparable by the type inference.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        ref, a, b = instruction.args
+        var = Fr.Frame.frame_for_name(ref.frame).find_variable(ref.slot)
+        var.value = Interpret.symb_value(a) > Interpret.symb_value(b)
+        var.typ = 'bool'
+        return pc
+
+    @staticmethod
+    def exec_eq_unchecked(instruction: Ins.Instruction, pc: int) -> int:
+        """EQ of operands proven to be comparable by the type inference.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        ref, a, b = instruction.args
+        var = Fr.Frame.frame_for_name(ref.frame).find_variable(ref.slot)
+        a = Interpret.symb_unchecked(a)
+        b = Interpret.symb_unchecked(b)
+        var.value = a.typ == b.typ and a.value == b.value
+        var.typ = 'bool'
+        return pc
+
+    @staticmethod
+    def exec_and_unchecked(instruction: Ins.Instruction, pc: int) -> int:
+        """AND of operands proven to be booleans by the type inference.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        ref, a, b = instruction.args
+        var = Fr.Frame.frame_for_name(ref.frame).find_variable(ref.slot)
+        var.value = Interpret.symb_value(a) and Interpret.symb_value(b)
+        var.typ = 'bool'
+        return pc
+
+    @staticmethod
+    def exec_or_unchecked(instruction: Ins.Instruction, pc: int) -> int:
+        """OR of operands proven to be booleans by the type inference.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        ref, a, b = instruction.args
+        var = Fr.Frame.frame_for_name(ref.frame).find_variable(ref.slot)
+        var.value = Interpret.symb_value(a) or Interpret.symb_value(b)
+        var.typ = 'bool'
+        return pc
+
+    @staticmethod
+    def exec_not_unchecked(instruction: Ins.Instruction, pc: int) -> int:
+        """NOT of an operand proven to be boolean by the type inference.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        ref, a = instruction.args
+        var = Fr.Frame.frame_for_name(ref.frame).find_variable(ref.slot)
+        var.value = not Interpret.symb_value(a)
+        var.typ = 'bool'
+        return pc
+
+    @staticmethod
+    def exec_jumpifeq_unchecked(instruction: Ins.Instruction, pc: int) -> int:
+        """JUMPIFEQ of operands proven to be comparable by the type inference.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        a = Interpret.symb_unchecked(instruction.args[1])
+        b = Interpret.symb_unchecked(instruction.args[2])
+        if a.typ == b.typ and a.value == b.value:
+            return instruction.args[0]
+        return pc
+
+    @staticmethod
+    def exec_jumpifneq_unchecked(instruction: Ins.Instruction, pc: int) -> int:
+        """JUMPIFNEQ of operands proven to be comparable by the type inference.
+
+        :param instruction: Instruction to execute
+        :param pc: Program counter of the following instruction
+        :return: Program counter of the next instruction to execute
+        """
+        a = Interpret.symb_unchecked(instruction.args[1])
+        b = Interpret.symb_unchecked(instruction.args[2])
+        if a.typ == b.typ and a.value == b.value:
+            return pc
+        return instruction.args[0]
+
+    @classmethod
+    def build_dispatch_table(cls) -> None:
+        """Registers a handler for every opcode in the dispatch table, which is indexed by the opcode id.
+
+        Handler of an opcode is the method named exec_<opcode>. Opcodes without such method are not executed.
+
+        :return: None
+        """
+        cls.dispatch_table = [getattr(cls, 'exec_' + opcode.lower(), cls.exec_nop)
+                              for opcode in Ins.Instruction._opcodes]
+
+
+Interpret.build_dispatch_table()
+
+
+class VM:
+    """Virtual machine running a loaded program with its own frames, call stack, data stack, input and output.
+
+    Handlers of instructions work with the state of classes Frame and Interpret, so run() installs the state of the VM
+    there and restores the previous state once the program terminates. Programs can thus be run one after another in a
+    single process, also from inside of another running program. WRITE writes to the output of the VM, DPRINT and
+    error messages of all modules to its error output, which run() also installs as sys.stderr. The state is global
+    to the process, so the VM is single-threaded and not reentrant: programs must not run in several threads at once.
+    The program is terminated by exit() with an error code, or by the EXIT instruction, run() returns the code.
+
+    """
+
+    __slots__ = ('program', 'stdin', 'stdout', 'stderr', 'compile_threshold', 'instruction_limit', 'limit_exceeded',
+                 'stats', 'profiler', 'frames', 'call_stack', 'data_stack')
+
+    def __init__(self, program: Prog.Program, stdin: TextIO, stdout: TextIO, stderr: TextIO = None,
+                 compile_threshold: int = None, instruction_limit: int = None, stats: Stats.Statistics = None,
+                 profiler: Prof.Profiler = None):
+        self.program = program
+        self.stdin = stdin
+        """Input of the program read by READ"""
+        self.stdout = stdout
+        self.stderr = stderr
+        """Stream for DPRINT and error messages, sys.stderr if it is None"""
+        self.compile_threshold = compile_threshold
+        """Threshold of compilation of hot blocks (see Compiler), or None to only interpret the program"""
+        self.instruction_limit = instruction_limit
+        """Maximal number of executed instructions of an interpreted program, or None for no limit"""
+        self.limit_exceeded = False
+        """True, if the program was terminated, because it exceeded the instruction limit"""
+        self.stats = stats
+        """Statistics recording executed instructions, the program is then only interpreted without a limit"""
+        self.profiler = profiler
+        """Profiler of call stacks, the program is then only interpreted without a limit"""
+        self.frames = None
+        """Frames of the program, see Frame.swap_state()"""
+        self.call_stack = array('l')
+        """Call stack of the program"""
+        self.data_stack = DS.DataStack()
+        """Data stack of the program"""
+
+    def run(self) -> int:
+        """Runs the program from its first instruction.
+
+        :return: Exit code of the program
+        """
+        operands = self.program.operands
+        outer_frames = Fr.Frame.swap_state(Fr.Frame.new_state(operands.local_size()))
+        output = Out.Output(self.stdout)
+        error_output = Out.Output(sys.stderr if self.stderr is None else self.stderr)
+        outer_state = Interpret.swap_state((self.call_stack, self.data_stack, In.Input(self.stdin), output,
+                                            error_output))
+        # error messages of all modules are written to sys.stderr
+        outer_stderr = sys.stderr
+        sys.stderr = error_output
+        try:
+            Fr.Frame.create_global(operands.global_size())
+            self.execute()
+            code = 0
+        except SystemExit as termination:
+            code = termination.code if isinstance(termination.code, int) else int(termination.code is not None)
+        finally:
+            output.flush()
+            error_output.flush()
+            sys.stderr = outer_stderr
+            self.frames = Fr.Frame.swap_state(outer_frames)
+            Interpret.swap_state(outer_state)
+        return code
+
+    def execute(self) -> None:
+        """Executes instructions of the program until the program counter leaves the program.
 
-        :param tree: XML representation of source code file
         :return: None
         """
-        instructions = tree.findall('./instruction')
-        oldorder = -1
+        program = self.program.instructions
+        pc = 0
+        program_end = len(program)
+        if self.stats is not None:
+            self.execute_with_statistics()
+        elif self.profiler is not None:
+            self.execute_with_profile()
+        elif self.compile_threshold is not None:
+            import Compiler as Comp
+            # every block returns the program counter of the next block
+            blocks = Comp.Compiler(self.program, Interpret.dispatch_table, self.data_stack, Interpret.output,
+                                   self.compile_threshold).blocks
+            while pc < program_end:
+                pc = blocks[pc]()
+        elif self.instruction_limit is not None:
+            # the limit is counted by the for loop, the main loop without a limit does not pay for it
+            dispatch = Interpret.dispatch_table
+            for _ in repeat(None, self.instruction_limit):
+                if pc >= program_end:
+                    return
+                instruction = program[pc]
+                pc = dispatch[instruction.op_id](instruction, pc + 1)
+            if pc < program_end:
+                self.limit_exceeded = True
+                sys.stderr.write('Program exceeded the limit of %d instructions.\n' % self.instruction_limit)
+                exit(ERR_INTERPRET)
+        else:
+            # main body of interpret executing instructions
+            dispatch = Interpret.dispatch_table
+            while pc < program_end:
+                instruction = program[pc]
+                pc = dispatch[instruction.op_id](instruction, pc + 1)
 
-        for ins in instructions:
-            if oldorder == int(ins.get('order')):
-                sys.stderr.write('Instructions with duplicate order value were found: %d\n' % oldorder)
-                exit(ERR_XML_STRUC)
-            oldorder = int(ins.get('order'))
+    def execute_with_statistics(self) -> None:
+        """Executes instructions of the program like execute() and records their counts and times in statistics.
 
-            if ins.get('opcode').upper() == 'LABEL':
-                InsLa.InstructionLabel.check_instruction(ins)
-                InsLa.InstructionLabel.add_label(ins.find('arg1').text, int(ins.get('order')))
-                tree.getroot().remove(ins)
+        An instruction is counted before it is executed and its time is added even if it terminates the program, so
+        statistics of a program terminated by an error are complete.
+
+        :return: None
+        """
+        program = self.program.instructions
+        self.stats.attach(self.program)
+        counts = self.stats.counts
+        times = self.stats.times
+        dispatch = Interpret.dispatch_table
+        clock = perf_counter
+        pc = 0
+        program_end = len(program)
+        start = 0.0
+        try:
+            while pc < program_end:
+                instruction = program[pc]
+                counts[pc] += 1
+                start = clock()
+                next_pc = dispatch[instruction.op_id](instruction, pc + 1)
+                times[pc] += clock() - start
+                pc = next_pc
+        except BaseException:
+            times[pc] += clock() - start
+            raise
+
+    def execute_with_profile(self) -> None:
+        """Executes instructions of the program like execute() and reports changes of stacks to the profiler.
+
+        Instructions are counted in a local variable, which is passed to the profiler only by instructions changing
+        the call stack or the frame stack, and when the program terminates.
+
+        :return: None
+        """
+        program = self.program.instructions
+        events = self.profiler.events
+        dispatch = Interpret.dispatch_table
+        pc = 0
+        program_end = len(program)
+        count = 0
+        self.profiler.start()
+        try:
+            while pc < program_end:
+                instruction = program[pc]
+                count += 1
+                next_pc = dispatch[instruction.op_id](instruction, pc + 1)
+                event = events[pc]
+                if event is not None:
+                    event(next_pc, count)
+                    count = 0
+                pc = next_pc
+        finally:
+            self.profiler.flush(count)
 
 
 if __name__ == '__main__':
-    source, inpt = Interpret.proc_args()
-    tree = Interpret.get_sorted_xml(source)
-    Interpret.get_labels(tree)
-
-    Fr.Frame.create_global()
-
-    min_order = int(tree.find('./instruction').get('order'))
-    max_order = int(tree.findall('./instruction')[-1].get('order'))
-
-    order = min_order
-    while order <= max_order:
-        instruction = tree.find('./instruction[@order="%d"]' % order)
-        if instruction is None:
-            # instruction of this order is missing
-            order = order + 1
-            continue
-        if instruction.tag == 'program':
-            order = order + 1
-            continue
-
-        opcode = instruction.attrib.get('opcode')
-
-        # main body of interpret executing instructions
-        if opcode == 'CREATEFRAME':
-            Ins.Instruction.check_args(instruction.findall('./'), 0, 'CREATEFRAME')
-            Fr.Frame.create_frame()
-
-        elif opcode == 'PUSHFRAME':
-            Ins.Instruction.check_args(instruction.findall('./'), 0, 'PUSHFRAME')
-            Fr.Frame.push_frame()
-
-        elif opcode == 'POPFRAME':
-            Ins.Instruction.check_args(instruction.findall('./'), 0, 'POPFRAME')
-            Fr.Frame.pop_frame()
-
-        elif opcode == 'DEFVAR':
-            ET_args = Ins.Instruction.check_args(instruction.findall('./'), 1, 'DEFVAR')
-            if ET_args[0].get('type') != 'var':
-                sys.stderr.write('DEFVAR must have argument of type var, not: %s\n' % ET_args[0].get('type'))
-                exit(ERR_OPERAND)
-            var = Var.Variable(ET_args[0].text)
-            var.defvar()
-
-        elif opcode == 'MOVE':
-            ET_args = Ins.Instruction.check_args(instruction.findall('./'), 2, 'MOVE')
-            if ET_args[0].get('type') != 'var':
-                sys.stderr.write('MOVE must have arg1 of type var, not: %s\n' % ET_args[0].get('type'))
-                exit(ERR_OPERAND)
-            arg2_type = ET_args[1].get('type')
-            if arg2_type not in ['int', 'bool', 'string', 'nil']:
-                sys.stderr.write('MOVE has invalid arg2 type: %s\n' % arg2_type)
-                exit(ERR_OPERAND)
-            Ins.Instruction.check_data_types(arg2_type, ET_args[1].text)
-            var = Var.Variable(ET_args[0].text, ET_args[1].text)
-            var.move()
-
-        elif opcode == 'CALL':
-            ET_args = Ins.Instruction.check_args(instruction.findall('./'), 1, 'CALL')
-            if ET_args[0].get('type') != 'label':
-                sys.stderr.write('CALL must have arg1 of type label, not: %s\n' % ET_args[0].get('type'))
-                exit(ERR_OPERAND)
-            if ET_args[0].text not in InsLa.InstructionLabel.get_labels():
-                sys.stderr.write('Label %s is not defined.\n' % ET_args[0].text)
-                exit(ERR_SEMANTICS)
-            Interpret.push_call_stack(order)
-            order = InsLa.InstructionLabel.order_for_label_name(ET_args[0].text)
-
-        elif opcode == 'RETURN':
-            Ins.Instruction.check_args(instruction.findall('./'), 0, 'RETURN')
-            if Interpret.is_empty_call_stack():
-                sys.stderr.write('Cannot return - call stack is empty.\n')
-                exit(ERR_MISSING_VALUE)
-            order = Interpret.pop_call_stack()
-
-        elif opcode == 'WRITE':
-            ET_args = Ins.Instruction.check_args(instruction.findall('./'), 1, 'WRITE')
-            typ = ET_args[0].get('type')
-            if typ not in ['var', 'int', 'string', 'bool', 'nil']:
-                sys.stderr.write('Invalid type of argument for WRITE: %s\n' % ET_args[0].get('type'))
-                exit(ERR_OPERAND)
-            if typ == 'var':
-                var = Var.Variable(instruction.find('./arg1').text)
-                var_frame = var.get_var_ids()
-                var_name = var.get_name()
-                var = Fr.Frame.frame_for_name(var_frame).find_variable(var_name)
-
-                if var is None:
-                    sys.stderr.write('Cannot WRITE variable: %s@%s. It does not exist.\n' % (var_frame, var_name))
-                    exit(ERR_VARIABLE)
-                if not var.is_init():
-                    sys.stderr.write('Cannot WRITE variable: %s@%s. It is not initialized.\n' % (var_frame, var_name))
-                    exit(ERR_MISSING_VALUE)
-                if var.typ == 'nil':
-                    print('')
-                else:
-                    print(var.value)
-
-            else:
-                Ins.Instruction.check_data_types(typ, ET_args[0].text)
-                if typ == 'nil':
-                    print('')
-                elif typ == 'int':
-                    print(int(ET_args[0].text))
-                elif typ == 'string':
-                    print(ET_args[0].text.decode('escape_string'))
-
-        elif opcode in ['ADD', 'SUB', 'MUL', 'IDIV', 'LT', 'GT', 'EQ', 'AND', 'OR']:
-            ET_args = Ins.Instruction.check_args(instruction.findall('./'), 3, opcode)
-            if opcode in ['ADD', 'SUB', 'MUL', 'IDIV']:
-                arith_inst = Ins.Instruction.create_arith_ins(opcode, ET_args)
-                arith_inst.exec_arithmetic_ins()
-
-        elif opcode == 'JUMP':
-            ET_args = Ins.Instruction.check_args(instruction.findall('./'), 1, opcode)
-            InsLa.InstructionLabel.check_label_name(ET_args[0].text)
-            if ET_args[0].get('type') != 'label':
-                sys.stderr.write('Jump can only have attribute of type label\n')
-                exit(ERR_OPERAND)
-            lbl = InsLa.InstructionLabel.order_for_label_name(ET_args[0].text)
-            if lbl is None:
-                sys.stderr.write('Label %s does not exist.\n' % ET_args[0].text)
-                exit(ERR_OPERAND)
-            else:
-                order = InsLa.InstructionLabel.order_for_label_name(ET_args[0].text)
-        order = order + 1
+    exit(Interpret.main(Interpret.proc_args()))
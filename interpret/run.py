@@ -0,0 +1,18 @@
+"""
+Entry point of the interpret optimized for startup, it takes the same arguments as interpret.py.
+
+Python compiles a script run directly on every start, while imported modules are loaded from cached bytecode. This
+script only imports interpret, so programs run through it do not pay for compiling interpret.py.
+
+Brno University of Technology
+Faculty of Information Technology
+
+Principles of Programming Languages
+
+Author: Šimon Vacek - xvacek10@stud.fit.vutbr.cz
+
+"""
+import interpret as Interp
+from errorCodes import *
+
+exit(Interp.Interpret.main(Interp.Interpret.proc_args()))
@@ -0,0 +1,292 @@
+"""
+Persistent server interpreting programs sent by client.py over a Unix socket.
+
+Brno University of Technology
+Faculty of Information Technology
+
+Principles of Programming Languages
+
+Author: Šimon Vacek - xvacek10@stud.fit.vutbr.cz
+
+"""
+import argparse
+from collections import OrderedDict
+import hashlib
+import io
+import json
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+from typing import Optional, Tuple
+import interpret as Interp
+import Optimizer as Opt
+import Profiler as Prof
+import Program as Prog
+import Statistics as Stats
+import TypeInference as TI
+from errorCodes import *
+
+
+class Server:
+    """Server running programs with the same arguments as interpret.py, without the startup of Python for every run.
+
+    A request holds arguments of interpret.py, the working directory of the client and the standard input of the client,
+    if the program or its input is read from it. The response holds the standard output, the standard error output and
+    the exit code. Every message is JSON preceded by its length (see send() and receive()).
+    Loaded programs are kept in a bounded LRU cache keyed by the file, its modification time and size and options
+    of the optimization, so a repeated program is not loaded again. A program read from the standard input is keyed by
+    a hash of its content. Operands and slot tables belong to the program (see OperandTable), so an evicted program
+    leaves nothing behind. Each program is executed in a forked process, so a program, which runs for long, does not
+    block other requests and nothing is left over in the server after a program terminates.
+
+    """
+
+    default_socket = os.path.join('/tmp', 'ippcode22-%d.sock' % os.getuid())
+    """Socket used by the server and the client, if the environment variable IPPCODE22_SOCKET is not set"""
+
+    __slots__ = ('path', 'cache_size', '__programs', '__socket')
+
+    def __init__(self, path: str, cache_size: int):
+        self.path = path
+        self.cache_size = cache_size
+        self.__programs: OrderedDict = OrderedDict()
+        """Loaded programs with their optimization reports from the least to the most recently used"""
+        self.__socket: Optional[socket.socket] = None
+
+    @staticmethod
+    def send(connection: socket.socket, message: dict) -> None:
+        """Sends a message as JSON preceded by its length as a 4 byte unsigned integer.
+
+        :param connection: Connected socket
+        :param message: Message to send
+        :return: None
+        """
+        data = json.dumps(message).encode('utf-8')
+        connection.sendall(struct.pack('>I', len(data)) + data)
+
+    @staticmethod
+    def receive(connection: socket.socket) -> Optional[dict]:
+        """Receives a message sent by send().
+
+        :param connection: Connected socket
+        :return: Received message, or None if the connection was closed
+        """
+        header = Server.receive_exactly(connection, 4)
+        if header is None:
+            return None
+        data = Server.receive_exactly(connection, struct.unpack('>I', header)[0])
+        return None if data is None else json.loads(data.decode('utf-8'))
+
+    @staticmethod
+    def receive_exactly(connection: socket.socket, size: int) -> Optional[bytes]:
+        """
+
+        :param connection: Connected socket
+        :param size: Number of bytes to receive
+        :return: Received bytes, or None if the connection was closed before
+        """
+        chunks = []
+        while size > 0:
+            chunk = connection.recv(min(size, 1 << 20))
+            if not chunk:
+                return None
+            chunks.append(chunk)
+            size = size - len(chunk)
+        return b''.join(chunks)
+
+    def serve(self) -> None:
+        """Accepts requests until the server is terminated by a signal.
+
+        :return: None
+        """
+        if os.path.exists(self.path):
+            Server.remove_stale_socket(self.path)
+        self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__socket.bind(self.path)
+        self.__socket.listen(64)
+        # finished children are reaped by the system
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda signum, frame: exit(0))
+        try:
+            while True:
+                connection, _ = self.__socket.accept()
+                with connection:
+                    try:
+                        request = Server.receive(connection)
+                        if request is not None:
+                            self.handle(connection, request)
+                    except Exception as error:
+                        # a malformed request must not terminate the server
+                        Server.reject(connection, 'Invalid request: %s\n' % error)
+        finally:
+            self.__socket.close()
+            os.unlink(self.path)
+
+    @staticmethod
+    def remove_stale_socket(path: str) -> None:
+        """Removes a socket left over by a server, which is not running anymore.
+
+        If another server accepts connections on the socket, or the path is not a socket, the server is terminated.
+
+        :param path: Path of the socket
+        :return: None
+        """
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            sys.stderr.write('%s already exists and it is not a socket.\n' % path)
+            exit(ERR_INTERPRET)
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+        finally:
+            probe.close()
+        sys.stderr.write('Another server is already running on %s.\n' % path)
+        exit(ERR_INTERPRET)
+
+    @staticmethod
+    def reject(connection: socket.socket, message: str) -> None:
+        """Answers a request, which cannot be handled, by an error. The client may be gone already.
+
+        :param connection: Connection of the client
+        :param message: Error message for the standard error output of the client
+        :return: None
+        """
+        try:
+            Server.send(connection, {'stdout': '', 'stderr': message, 'code': ERR_INTERPRET})
+        except OSError:
+            pass
+
+    def handle(self, connection: socket.socket, request: dict) -> None:
+        """Loads the program of a request and runs it in a forked process, which sends the response.
+
+        :param connection: Connection of the client
+        :param request: Arguments argv, working directory cwd and standard input stdin of the client (None, if it is
+                        not sent)
+        :return: None
+        """
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = io.StringIO(), io.StringIO()
+        stats = Stats.Statistics()
+        args = None
+        try:
+            os.chdir(request['cwd'])
+            sys.argv = ['interpret.py'] + request['argv']
+            args = Interp.Interpret.proc_args()
+            stats.begin_phase('load')
+            program = self.load(args, request.get('stdin'), stats)
+        except SystemExit as termination:
+            code = termination.code if isinstance(termination.code, int) else 1
+            if args is not None and args.stats is not None:
+                # statistics are written also when the program fails to load, like by interpret.py
+                stats.exit_code = code
+                stats.end_phase()
+                stats.write(args.stats)
+            Server.send(connection, {'stdout': sys.stdout.getvalue(), 'stderr': sys.stderr.getvalue(), 'code': code})
+            return
+        finally:
+            messages = sys.stderr.getvalue()
+            sys.stdout, sys.stderr = stdout, stderr
+
+        if os.fork() != 0:
+            return
+        # child process
+        code = 1
+        try:
+            self.__socket.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            if args.input is not None:
+                program_input = open(args.input, encoding='utf-8')
+            else:
+                program_input = io.StringIO(request.get('stdin') or '')
+            program_stdout = io.StringIO()
+            program_stderr = io.StringIO(messages)
+            program_stderr.seek(0, io.SEEK_END)
+            stats.begin_phase('execute')
+            profiler = None if args.profile is None else Prof.Profiler(program)
+            vm = Interp.VM(program, program_input, program_stdout, program_stderr,
+                           compile_threshold=args.compile_threshold if args.compile else None,
+                           stats=None if args.stats is None else stats, profiler=profiler)
+            code = vm.run()
+            stats.end_phase()
+            if args.stats is not None:
+                stats.exit_code = code
+                stats.write(args.stats)
+            if profiler is not None:
+                profiler.write(args.profile, args.profile_metric)
+                program_stderr.write(profiler.report())
+            Server.send(connection, {'stdout': program_stdout.getvalue(), 'stderr': program_stderr.getvalue(),
+                                     'code': code})
+            code = 0
+        finally:
+            os._exit(code)
+
+    def load(self, args: argparse.Namespace, stdin: Optional[str], stats: Stats.Statistics) -> Prog.Program:
+        """Retrieves the program of a request from the cache, or loads it.
+
+        :param args: Arguments of the request
+        :param stdin: Standard input of the client
+        :param stats: Statistics of the request, which durations of phases are recorded to
+        :return: Loaded program
+        """
+        key = self.key(args, stdin)
+        cached = self.__programs.get(key)
+        if cached is not None:
+            self.__programs.move_to_end(key)
+            program, report = cached
+            if args.optimize_report:
+                sys.stderr.write(report)
+            return program
+
+        if args.source_text is None and args.source is None:
+            program = Interp.Interpret.load_program(io.BytesIO((stdin or '').encode('utf-8')))
+        else:
+            # a program of a file is taken also from the cache directory given by --cache-dir
+            program = Interp.Interpret.load_source(args)
+        report = ''
+        if args.optimize:
+            stats.begin_phase('optimize')
+            optimizer = Opt.Optimizer(Interp.Interpret.dispatch_table)
+            program = optimizer.optimize(program)
+            report = optimizer.report()
+        if args.infer_types:
+            stats.begin_phase('infer_types')
+            inference = TI.TypeInference(Interp.Interpret.dispatch_table)
+            program = inference.specialize(program)
+            report = report + inference.report()
+        if args.optimize_report:
+            sys.stderr.write(report)
+
+        self.__programs[key] = (program, report)
+        if len(self.__programs) > self.cache_size:
+            self.__programs.popitem(last=False)
+        return program
+
+    @staticmethod
+    def key(args: argparse.Namespace, stdin: Optional[str]) -> Tuple:
+        """
+
+        :param args: Arguments of the request
+        :param stdin: Standard input of the client
+        :return: Key of the program of the request in the cache
+        """
+        options = (args.optimize, args.infer_types)
+        source = args.source_text if args.source_text is not None else args.source
+        if source is None:
+            return ('stdin', hashlib.sha256((stdin or '').encode('utf-8')).hexdigest()) + options
+        status = os.stat(source)
+        return (args.source_text is not None, os.path.abspath(source), status.st_mtime_ns, status.st_size) + options
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Server interpreting programs sent by client.py.')
+    parser.add_argument('--socket', help='path of the Unix socket', type=str,
+                        default=os.environ.get('IPPCODE22_SOCKET', Server.default_socket))
+    parser.add_argument('--cache-size', help='number of loaded programs kept in memory', type=int, default=64,
+                        dest='cache_size')
+    server_args = parser.parse_args()
+    Server(server_args.socket, server_args.cache_size).serve()